@@ -0,0 +1,49 @@
+"""
+Сравнение двух отчётов benchmarks.run:
+
+    python -m benchmarks.compare before.json after.json
+"""
+import json
+import sys
+
+METRICS = ('p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps')
+
+
+def change(before, after):
+    if not before or after is None:
+        return ''
+    return f'{(after - before) / before:+.0%}'
+
+
+def compare(before, after):
+    """Строки таблицы: эндпоинт, метрика, было, стало, изменение."""
+    rows = []
+    for label in sorted(set(before['endpoints']) | set(after['endpoints'])):
+        old = before['endpoints'].get(label, {})
+        new = after['endpoints'].get(label, {})
+        for metric in METRICS:
+            rows.append((label, metric, old.get(metric), new.get(metric), change(old.get(metric), new.get(metric))))
+    return rows
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        sys.exit('Использование: python -m benchmarks.compare before.json after.json')
+    with open(argv[0], encoding='utf-8') as file:
+        before = json.load(file)
+    with open(argv[1], encoding='utf-8') as file:
+        after = json.load(file)
+
+    for name, report in (('до', before), ('после', after)):
+        meta = report['meta']
+        print(f"{name}: {meta.get('commit') or '?'}{' (есть изменения)' if meta.get('dirty') else ''}, "
+              f"смесь {meta['mix']}, потоков {meta['concurrency']}")
+    if (before['meta']['mix'], before['meta']['dataset']) != (after['meta']['mix'], after['meta']['dataset']):
+        print('Внимание: смесь трафика или объём данных различаются, сравнение неточное')
+    for label, metric, old, new, delta in compare(before, after):
+        print(f'{label:<26} {metric:<15} {old!s:>10} {new!s:>10} {delta:>6}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""
+Микробенчмарк JSON-рендерера и парсера: стандартные классы DRF против ujson.
+
+    python -m benchmarks.json_renderers --products 10000 --repeat 20
+
+Ответ — список товаров в форме ответа /api/products/ с JSON-параметрами в двух вариантах:
+serialized — как его отдаёт ProductSerializer (цена строкой), raw — с Decimal-ценой, как из values().
+Перед замером проверяется, что оба рендерера дают одинаковый по смыслу JSON.
+"""
+import argparse
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from decimal import Decimal
+
+
+def make_payload(products=10000, random_seed=42, serialized=False):
+    from .seed import WORDS, COLORS, SUPPLIERS
+
+    rng = random.Random(random_seed)
+    payload = [
+        {
+            'id': number + 1,
+            'name': f'{WORDS[number % len(WORDS)].capitalize()} модель {number}',
+            'description': f'{WORDS[number % len(WORDS)]} {rng.choice(COLORS)}, гарантия {rng.randint(1, 3)} года',
+            'category': number % 20 + 1,
+            'category_name': f'Категория {number % 20}',
+            'supplier': SUPPLIERS[number % len(SUPPLIERS)],
+            'price': Decimal(rng.randint(50000, 15000000)) / 100,
+            'quantity': rng.randint(0, 500),
+            'parameters': {'Цвет': rng.choice(COLORS), 'Память': f'{rng.choice([64, 128, 256, 512])} ГБ'},
+            'image': None,
+        }
+        for number in range(products)
+    ]
+    if serialized:
+        for product in payload:
+            product['price'] = f"{product['price']:.2f}"
+    return payload
+
+
+def timings(func, repeat):
+    """Время одного вызова в мс: минимум и медиана по repeat прогонам."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return {'min_ms': round(min(samples), 2), 'median_ms': round(statistics.median(samples), 2)}
+
+
+def measure(payload, repeat):
+    from rest_framework.parsers import JSONParser
+    from rest_framework.renderers import JSONRenderer
+    from retail_automation.renderers import UJSONParser, UJSONRenderer
+
+    rendered = {}
+    for name, renderer in (('drf', JSONRenderer()), ('ujson', UJSONRenderer())):
+        rendered[name] = renderer.render(payload, 'application/json')
+    if json.loads(rendered['drf']) != json.loads(rendered['ujson']):
+        raise AssertionError('Рендереры дают разный JSON')
+
+    report = {'bytes': len(rendered['drf'])}
+    for name, renderer, parser in (
+        ('drf', JSONRenderer(), JSONParser()),
+        ('ujson', UJSONRenderer(), UJSONParser()),
+    ):
+        report[name] = {
+            'render': timings(lambda: renderer.render(payload, 'application/json'), repeat),
+            'parse': timings(lambda: parser.parse(io.BytesIO(rendered[name])), repeat),
+        }
+    for operation in ('render', 'parse'):
+        report[f'{operation}_speedup'] = round(
+            report['drf'][operation]['median_ms'] / report['ujson'][operation]['median_ms'], 2
+        )
+    return report
+
+
+def measure_request_body(repeat, batch=1000):
+    """Разбор типичного тела запроса (пакет из 30 операций с корзиной): мс на batch разборов."""
+    from rest_framework.parsers import JSONParser
+    from retail_automation.renderers import UJSONParser
+
+    body = json.dumps({'operations': [
+        {'op': 'add', 'product_id': number, 'quantity': 1} for number in range(30)
+    ]}).encode()
+    report = {'bytes': len(body), 'batch': batch}
+    for name, parser in (('drf', JSONParser()), ('ujson', UJSONParser())):
+        report[name] = timings(lambda: [parser.parse(io.BytesIO(body)) for _ in range(batch)], repeat)
+    report['parse_speedup'] = round(report['drf']['median_ms'] / report['ujson']['median_ms'], 2)
+    return report
+
+
+def run(products=10000, repeat=20, random_seed=42):
+    return {
+        'products': products,
+        'repeat': repeat,
+        'payloads': {
+            kind: measure(make_payload(products, random_seed, serialized=kind == 'serialized'), repeat)
+            for kind in ('serialized', 'raw')
+        },
+        'request_body': measure_request_body(repeat),
+    }
+
+
+def main(argv=None):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+    import django
+    django.setup()
+
+    parser = argparse.ArgumentParser(description='Микробенчмарк JSON-рендерера и парсера')
+    parser.add_argument('--products', type=int, default=10000, help='товаров в ответе')
+    parser.add_argument('--repeat', type=int, default=20, help='повторов каждого замера')
+    parser.add_argument('--seed', type=int, default=42, help='зерно генератора данных')
+    args = parser.parse_args(argv)
+
+    report = run(args.products, args.repeat, args.seed)
+    sys.stdout.write(json.dumps(report, ensure_ascii=False, indent=2) + '\n')
+    return report
+
+
+if __name__ == '__main__':
+    main()
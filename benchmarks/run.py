@@ -0,0 +1,227 @@
+"""
+Нагрузочный бенчмарк API в одном процессе.
+
+    python -m benchmarks.run --mix shopping --concurrency 8 --duration 30 --output bench.json
+
+Поднимает приложение с настройками benchmarks.settings на чистой БД, засевает данные
+(benchmarks/seed.py) и гоняет смесь сценариев (benchmarks/scenarios.py) из нескольких
+потоков. Результат — JSON с p50/p95/p99 и пропускной способностью по каждому эндпоинту
+и коммитом, на котором снят замер. Данные и случайные последовательности фиксированы
+параметрами, поэтому прогоны на разных коммитах сравнимы (см. benchmarks.compare).
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+
+def percentile(sorted_values, fraction):
+    """Перцентиль по методу ближайшего ранга; sorted_values отсортирован по возрастанию."""
+    if not sorted_values:
+        return None
+    # round убирает хвосты двоичной арифметики: 0.07 * 100 == 7.000000000000001
+    rank = max(1, math.ceil(round(fraction * len(sorted_values), 9)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(samples, elapsed):
+    """Сводка по списку замеров (elapsed_ms, ok) за elapsed секунд."""
+    durations = sorted(duration for duration, _ in samples)
+    return {
+        'requests': len(samples),
+        'errors': sum(1 for _, ok in samples if not ok),
+        'throughput_rps': round(len(samples) / elapsed, 1) if elapsed else None,
+        'mean_ms': round(sum(durations) / len(durations), 2) if durations else None,
+        'p50_ms': round(percentile(durations, 0.50), 2) if durations else None,
+        'p95_ms': round(percentile(durations, 0.95), 2) if durations else None,
+        'p99_ms': round(percentile(durations, 0.99), 2) if durations else None,
+        'max_ms': round(durations[-1], 2) if durations else None,
+    }
+
+
+def git_revision():
+    """Текущий коммит и наличие незакоммиченных изменений; None вне git-репозитория."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=root, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = bool(subprocess.run(
+            ['git', 'status', '--porcelain', '--untracked-files=no'], cwd=root, capture_output=True, text=True
+        ).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, dirty
+
+
+class Recorder:
+    """Потокобезопасный сборщик замеров по меткам эндпоинтов."""
+
+    def __init__(self):
+        self.samples = {}
+        self.lock = threading.Lock()
+        self.enabled = True
+
+    def __call__(self, label, elapsed_ms, ok):
+        if self.enabled:
+            with self.lock:
+                self.samples.setdefault(label, []).append((elapsed_ms, ok))
+
+    def count(self):
+        with self.lock:
+            return sum(len(samples) for samples in self.samples.values())
+
+
+def make_sessions(data, concurrency, random_seed):
+    """По виртуальному покупателю на поток, каждому — свой JWT-токен и свой генератор."""
+    from django.test import Client
+    from rest_framework_simplejwt.tokens import RefreshToken
+    from django.contrib.auth import get_user_model
+    from .scenarios import Session
+
+    User = get_user_model()
+    recorder = Recorder()
+    users = User.objects.in_bulk(data['users'])
+    sessions = []
+    for number in range(concurrency):
+        user = users[data['users'][number % len(data['users'])]]
+        sessions.append(Session(
+            client=Client(),
+            token=str(RefreshToken.for_user(user).access_token),
+            contact_id=data['contacts'][user.id],
+            product_ids=data['products'],
+            rng=random.Random(random_seed + number),
+            record=recorder,
+        ))
+    return sessions, recorder
+
+
+def run_load(sessions, recorder, mix, duration=None, max_requests=None, warmup=1):
+    """Гоняет смесь сценариев во всех сессиях параллельно и возвращает время замера в секундах."""
+    from django.db import connection
+    from .scenarios import MIXES, pick
+
+    # Прогрев: каждый сценарий смеси по разу, без записи результатов
+    recorder.enabled = False
+    for _ in range(warmup):
+        for scenario in MIXES[mix]:
+            scenario(sessions[0])
+    recorder.enabled = True
+
+    stop = threading.Event()
+    start = threading.Barrier(len(sessions) + 1)
+    errors = []
+
+    def worker(session):
+        try:
+            start.wait()
+            while not stop.is_set():
+                pick(mix, session.rng)(session)
+                if max_requests and recorder.count() >= max_requests:
+                    stop.set()
+        except Exception as e:  # pragma: no cover - ошибка попадёт в отчёт
+            errors.append(repr(e))
+            stop.set()
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=worker, args=(session,)) for session in sessions]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    started = time.perf_counter()
+    if duration:
+        stop.wait(duration)
+        stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    if errors:
+        raise RuntimeError(f"Сценарий завершился с ошибкой: {errors[0]}")
+    return elapsed
+
+
+def build_report(recorder, elapsed, meta):
+    all_samples = [sample for samples in recorder.samples.values() for sample in samples]
+    return {
+        'meta': meta,
+        'summary': summarize(all_samples, elapsed),
+        'endpoints': {label: summarize(samples, elapsed) for label, samples in sorted(recorder.samples.items())},
+    }
+
+
+def parse_args(argv=None):
+    from .scenarios import MIXES
+
+    parser = argparse.ArgumentParser(description='Нагрузочный бенчмарк API')
+    parser.add_argument('--mix', choices=sorted(MIXES), default='shopping', help='смесь трафика')
+    parser.add_argument('--concurrency', type=int, default=4, help='число параллельных покупателей')
+    parser.add_argument('--duration', type=float, default=30, help='длительность замера, секунд')
+    parser.add_argument('--requests', type=int, default=None, help='остановиться после стольких запросов')
+    parser.add_argument('--products', type=int, default=2000, help='товаров в каталоге')
+    parser.add_argument('--users', type=int, default=50, help='покупателей')
+    parser.add_argument('--orders-per-user', type=int, default=20, help='заказов в истории каждого покупателя')
+    parser.add_argument('--seed', type=int, default=42, help='зерно генератора данных и сценариев')
+    parser.add_argument('--output', help='файл для JSON-отчёта (по умолчанию stdout)')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+    import django
+    django.setup()
+    from django.conf import settings
+    from django.core.management import call_command
+    from products.cache import get_query_cache_stats
+    from .seed import seed
+
+    args = parse_args(argv)
+    call_command('migrate', verbosity=0)
+    dataset = {'products': args.products, 'users': args.users, 'orders_per_user': args.orders_per_user}
+    data = seed(random_seed=args.seed, **dataset)
+
+    sessions, recorder = make_sessions(data, args.concurrency, args.seed)
+    elapsed = run_load(sessions, recorder, args.mix, duration=args.duration, max_requests=args.requests)
+
+    commit, dirty = git_revision()
+    report = build_report(recorder, elapsed, {
+        'commit': commit,
+        'dirty': dirty,
+        'started_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'mix': args.mix,
+        'concurrency': args.concurrency,
+        'duration_s': round(elapsed, 2),
+        'seed': args.seed,
+        'dataset': dataset,
+        'cart_store': settings.CART_STORE_BACKEND,
+        'query_cache': getattr(settings, 'CACHEOPS_ENABLED', True),
+    })
+    # Попадания кэша запросов ORM по моделям, включая прогрев
+    report['query_cache'] = get_query_cache_stats()
+    # Временную БД удаляем, если каталог не был задан явно через BENCH_DIR
+    if not os.environ.get('BENCH_DIR'):
+        from django.db import connections
+        connections.close_all()
+        shutil.rmtree(settings.BENCH_DIR, ignore_errors=True)
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(output + '\n')
+    else:
+        sys.stdout.write(output + '\n')
+    return report
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Сценарии поведения покупателя и смеси трафика. Сценарий — функция от сессии,
+делающая один или несколько запросов; каждый запрос замеряется под своей меткой.
+"""
+import time
+from urllib.parse import quote
+
+SEARCH_TERMS = ['смартфон', 'ноутбуки', 'наушники черный', 'телевизор', 'часы', 'камера синий']
+
+
+class Session:
+    """Виртуальный покупатель: свой клиент, токен и генератор случайных чисел."""
+
+    def __init__(self, client, token, contact_id, product_ids, rng, record):
+        self.client = client
+        self.headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+        self.contact_id = contact_id
+        self.product_ids = product_ids
+        self.rng = rng
+        self.record = record
+
+    def request(self, label, method, url, data=None):
+        started = time.perf_counter()
+        response = getattr(self.client, method)(url, data, content_type='application/json', **self.headers)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.record(label, elapsed_ms, response.status_code < 400)
+        return response
+
+    def product_id(self):
+        return self.rng.choice(self.product_ids)
+
+
+def browse(session):
+    response = session.request('products-list', 'get', '/api/products/')
+    if response.status_code == 200 and response.json().get('next'):
+        session.request('products-list-next', 'get', response.json()['next'])
+
+
+def search(session):
+    term = quote(session.rng.choice(SEARCH_TERMS))
+    session.request('products-search', 'get', f'/api/products/?search={term}')
+    if session.rng.random() < 0.3:
+        session.request('products-facets', 'get', f'/api/products/facets/?name={term}')
+
+
+def view_product(session):
+    session.request('products-detail', 'get', f'/api/products/{session.product_id()}/')
+
+
+def add_to_cart(session):
+    session.request('cart-add', 'post', '/api/orders/cart/add/', {
+        'product_id': session.product_id(), 'quantity': session.rng.randint(1, 3),
+    })
+
+
+def checkout(session):
+    for _ in range(session.rng.randint(1, 3)):
+        add_to_cart(session)
+    session.request('cart-view', 'get', '/api/orders/cart/')
+    session.request('orders-create-from-cart', 'post', '/api/orders/create-from-cart/', {
+        'contact_id': session.contact_id,
+    })
+
+
+def order_history(session):
+    response = session.request('orders-list', 'get', '/api/orders/orders/')
+    if response.status_code == 200 and response.json().get('results'):
+        order_id = response.json()['results'][0]['id']
+        session.request('orders-detail', 'get', f'/api/orders/orders/{order_id}/')
+
+
+# Веса сценариев в смеси
+MIXES = {
+    'browse': {browse: 50, search: 30, view_product: 20},
+    'shopping': {browse: 20, search: 15, view_product: 20, add_to_cart: 25, checkout: 10, order_history: 10},
+    'checkout': {add_to_cart: 40, checkout: 45, order_history: 15},
+}
+
+
+def pick(mix, rng):
+    """Случайный сценарий смеси с учётом весов."""
+    scenarios = MIXES[mix]
+    return rng.choices(list(scenarios), weights=list(scenarios.values()))[0]
@@ -0,0 +1,68 @@
+"""Детерминированный набор данных для бенчмарков: одинаковые параметры дают одинаковую БД."""
+import random
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from orders.models import Contact, Order, OrderItem
+from products.attributes import sync_attributes
+from products.models import Category, Product
+from products.search import get_search_backend
+
+User = get_user_model()
+
+PASSWORD = 'bench-password'
+WORDS = ['смартфон', 'ноутбук', 'планшет', 'наушники', 'телевизор', 'часы', 'колонка', 'камера']
+COLORS = ['черный', 'белый', 'синий', 'красный', 'серый']
+SUPPLIERS = ['Связной', 'DNS', 'Ситилинк', 'М.Видео']
+
+
+def seed(products=2000, users=50, orders_per_user=20, items_per_order=4, categories=20, random_seed=42):
+    """Заполняет пустую БД и возвращает id покупателей, их контактов и товаров."""
+    rng = random.Random(random_seed)
+
+    category_ids = [
+        category.id for category in
+        Category.objects.bulk_create([Category(name=f'Категория {number}') for number in range(categories)])
+    ]
+    created = Product.objects.bulk_create([
+        Product(
+            name=f'{WORDS[number % len(WORDS)].capitalize()} модель {number}',
+            description=f'{WORDS[number % len(WORDS)]} {rng.choice(COLORS)}, гарантия {rng.randint(1, 3)} года',
+            category_id=category_ids[number % categories],
+            supplier=SUPPLIERS[number % len(SUPPLIERS)],
+            price=rng.randint(500, 150000),
+            # Склада хватает на весь прогон: бенчмарк меряет скорость, а не отказы
+            quantity=10 ** 6,
+            parameters={'Цвет': rng.choice(COLORS), 'Память': f'{rng.choice([64, 128, 256, 512])} ГБ'},
+        )
+        for number in range(products)
+    ], batch_size=1000)
+    for start in range(0, len(created), 1000):
+        sync_attributes(created[start:start + 1000])
+    get_search_backend().rebuild(Product.objects.all())
+    product_ids = [product.id for product in created]
+
+    # Хэш пароля считается один раз: create_user на каждого покупателя занял бы минуты
+    password = make_password(PASSWORD)
+    buyers = User.objects.bulk_create([
+        User(username=f'bench{number}', email=f'bench{number}@example.com', password=password)
+        for number in range(users)
+    ])
+    contacts = Contact.objects.bulk_create([
+        Contact(user=buyer, first_name='Иван', last_name='Петров', email=buyer.email, phone='+79990000000',
+                address='Москва, улица Ленина, 10')
+        for buyer in buyers
+    ])
+    orders = Order.objects.bulk_create([
+        Order(user=buyer, contact=contact, status=rng.choice(['new', 'confirmed', 'delivered']), total_amount=0)
+        for buyer, contact in zip(buyers, contacts) for _ in range(orders_per_user)
+    ], batch_size=1000)
+    OrderItem.objects.bulk_create([
+        OrderItem(order=order, product_id=rng.choice(product_ids), quantity=rng.randint(1, 3), price=1000)
+        for order in orders for _ in range(items_per_order)
+    ], batch_size=1000)
+
+    return {
+        'users': [buyer.id for buyer in buyers],
+        'contacts': {contact.user_id: contact.id for contact in contacts},
+        'products': product_ids,
+    }
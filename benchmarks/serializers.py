@@ -0,0 +1,103 @@
+"""
+Микробенчмарк сериализации страниц списков: ModelSerializer против плоских сериализаторов.
+
+    python -m benchmarks.serializers --rows 1000 --repeat 20
+
+Строки читаются из БД один раз, замеряется только превращение страницы в список словарей:
+экземпляры моделей через serializer_class против строк .values() через FlatSerializer.
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+
+from .json_renderers import timings
+
+
+def cases(rows):
+    """(название, сериализатор DRF, queryset для него, queryset строк .values())."""
+    from orders.models import CartItem, Order
+    from orders.serializers import CartItemSerializer, OrderSerializer
+    from orders.views import order_items_prefetch
+    from products.models import Product
+    from products.serializers import ProductSerializer
+    from products.views import ProductViewSet
+    from retail_automation.flat_serializers import get_flat_serializer
+
+    list_fields = tuple(ProductViewSet.list_fields)
+    product_flat = get_flat_serializer(ProductSerializer, tuple(sorted(list_fields)))
+    order_flat = get_flat_serializer(OrderSerializer)
+    cart_flat = get_flat_serializer(CartItemSerializer)
+    return [
+        ('products-list', lambda objects: ProductSerializer(objects, many=True, fields=list_fields).data,
+         Product.objects.select_related('category').order_by('id')[:rows],
+         product_flat, Product.objects.order_by('id').values(*product_flat.lookups)[:rows]),
+        ('orders-list', lambda objects: OrderSerializer(objects, many=True).data,
+         Order.objects.prefetch_related(order_items_prefetch()).order_by('-id')[:rows],
+         order_flat, Order.objects.order_by('-id').values(*order_flat.lookups)[:rows]),
+        ('cart-items', lambda objects: CartItemSerializer(objects, many=True).data,
+         CartItem.objects.select_related('product').order_by('id')[:rows],
+         cart_flat, CartItem.objects.order_by('id').values_list(*cart_flat.lookups)[:rows]),
+    ]
+
+
+def run(rows=1000, repeat=20):
+    report = {'rows': rows, 'repeat': repeat, 'endpoints': {}}
+    for name, serialize, queryset, flat, values in cases(rows):
+        objects = list(queryset)
+        page = list(values)
+        if json.loads(json.dumps(serialize(objects), default=str)) != \
+                json.loads(json.dumps(flat.serialize(page), default=str)):
+            raise AssertionError(f'{name}: плоский сериализатор дал другой ответ')
+        result = {
+            'serializer': timings(lambda: serialize(objects), repeat),
+            # Для вложенных позиций заказов плоский путь делает свой запрос — он входит в замер
+            'flat': timings(lambda: flat.serialize(page), repeat),
+        }
+        result['speedup'] = round(result['serializer']['median_ms'] / result['flat']['median_ms'], 1)
+        report['endpoints'][name] = result
+    return report
+
+
+def seed_cart_items(data, rows):
+    """Корзины покупателей из засеянных данных: всего rows позиций."""
+    from orders.models import Cart, CartItem
+
+    carts = Cart.objects.bulk_create([Cart(user_id=user_id) for user_id in data['users']])
+    per_cart = -(-rows // len(carts))
+    CartItem.objects.bulk_create([
+        CartItem(cart=cart, product_id=product_id, quantity=1)
+        for index, cart in enumerate(carts)
+        for product_id in data['products'][index * per_cart:(index + 1) * per_cart]
+    ][:rows])
+
+
+def main(argv=None):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+    import django
+    django.setup()
+    from django.conf import settings
+    from django.core.management import call_command
+    from .seed import seed
+
+    parser = argparse.ArgumentParser(description='Микробенчмарк сериализации страниц списков')
+    parser.add_argument('--rows', type=int, default=1000, help='строк на странице')
+    parser.add_argument('--repeat', type=int, default=20, help='повторов каждого замера')
+    args = parser.parse_args(argv)
+
+    call_command('migrate', verbosity=0)
+    data = seed(products=max(args.rows, 1000), users=10, orders_per_user=-(-args.rows // 10))
+    seed_cart_items(data, args.rows)
+    report = run(args.rows, args.repeat)
+
+    if not os.environ.get('BENCH_DIR'):
+        from django.db import connections
+        connections.close_all()
+        shutil.rmtree(settings.BENCH_DIR, ignore_errors=True)
+    sys.stdout.write(json.dumps(report, ensure_ascii=False, indent=2) + '\n')
+    return report
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+Настройки для бенчмарков: приложение целиком, но без внешних сервисов.
+БД — файл SQLite во временном каталоге, кэш и почта — в памяти процесса,
+задачи Celery выполняются сразу, корзины и кэш запросов — в fakeredis (если он установлен).
+"""
+import os
+import tempfile
+from importlib.util import find_spec
+from retail_automation.settings import *  # noqa
+
+BENCH_DIR = os.environ.get('BENCH_DIR') or tempfile.mkdtemp(prefix='retail-bench-')
+
+DEBUG = False
+ALLOWED_HOSTS = ['*']
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BENCH_DIR, 'bench.sqlite3'),
+        'OPTIONS': {
+            # WAL и немедленная блокировка: читатели не ждут писателей, писатели не ловят deadlock
+            'init_command': 'PRAGMA journal_mode=WAL;',
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 30,
+        },
+    }
+}
+
+CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+
+CELERY_TASK_ALWAYS_EAGER = True
+CELERY_TASK_EAGER_PROPAGATES = True
+
+# Ограничение частоты запросов мерило бы throttling, а не приложение
+REST_FRAMEWORK = dict(REST_FRAMEWORK, DEFAULT_THROTTLE_CLASSES=[], DEFAULT_THROTTLE_RATES={})
+
+if find_spec('fakeredis'):
+    CART_STORE_BACKEND = 'benchmarks.stores.FakeRedisCartStore'
+else:
+    CART_STORE_BACKEND = 'orders.cart_store.DatabaseCartStore'
+
+# Инвалидация cacheops — Lua-скрипты: fakeredis исполняет их, только если установлен lupa
+if find_spec('fakeredis') and find_spec('lupa'):
+    CACHEOPS_CLIENT_CLASS = 'benchmarks.stores.FakeCacheopsRedis'
+    CACHEOPS_REDIS = {}
+else:
+    CACHEOPS_ENABLED = False
@@ -0,0 +1,23 @@
+import fakeredis
+from orders.cart_store import RedisCartStore
+
+
+class FakeRedisCartStore(RedisCartStore):
+    """RedisCartStore поверх fakeredis в памяти процесса."""
+
+    def __init__(self):
+        super().__init__(url='redis://fakeredis')
+        self._client = fakeredis.FakeRedis(server=fakeredis.FakeServer())
+
+
+class FakeCacheopsRedis(fakeredis.FakeRedis):
+    """Клиент cacheops поверх fakeredis: один сервер на процесс, INFO — заглушка с версией."""
+
+    server = fakeredis.FakeServer()
+
+    def __init__(self, **kwargs):
+        super().__init__(server=self.server, **kwargs)
+
+    def info(self, section=None, *args, **kwargs):
+        # cacheops выбирает вариант Lua-скриптов по версии сервера, а fakeredis не реализует INFO
+        return {'redis_version': '7.2.0'}
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class OrdersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'orders'
+
+    def ready(self):
+        # Регистрируем обработчики событий outbox (orders/tasks.py)
+        from . import tasks  # noqa: F401
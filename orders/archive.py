@@ -0,0 +1,69 @@
+"""
+Архив заказов: доставленные и отменённые заказы старше ORDER_ARCHIVE_AFTER_DAYS переносятся
+из Order/OrderItem в ArchivedOrder/ArchivedOrderItem с теми же id.
+
+Перенос идёт пачками по индексу (status, created_at), каждая пачка — короткая транзакция:
+вставка в архив и удаление из рабочих таблиц. Число пачек за запуск ограничено.
+Рабочие таблицы остаются маленькими, а архивные заказы по-прежнему отдаются API
+(детали заказа — по id, список — через ?archived=true).
+"""
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem
+
+logger = logging.getLogger(__name__)
+
+ARCHIVED_STATUSES = ('delivered', 'canceled')
+ORDER_FIELDS = ('id', 'user_id', 'created_at', 'updated_at', 'status', 'total_amount', 'contact_id')
+ITEM_FIELDS = ('id', 'order_id', 'product_id', 'quantity', 'price')
+
+
+def _archive_batch(orders):
+    """Переносит пачку заказов вместе с позициями; возвращает (заказов, позиций)."""
+    ids = [order['id'] for order in orders]
+    items = list(OrderItem.objects.nocache().filter(order_id__in=ids).values(*ITEM_FIELDS))
+    ArchivedOrder.objects.bulk_create([ArchivedOrder(**order) for order in orders])
+    ArchivedOrderItem.objects.bulk_create([ArchivedOrderItem(**item) for item in items])
+    # delete() через ORM: сигналы сбрасывают кэш запросов по каждому заказу и позиции
+    OrderItem.objects.filter(order_id__in=ids).delete()
+    Order.objects.filter(id__in=ids).delete()
+    return len(ids), len(items)
+
+
+def archive_orders(age_days=None, batch_size=None, max_batches=None):
+    """
+    Переносит в архив завершённые заказы старше age_days дней. Результат:
+    {'orders': ..., 'items': ..., 'batches': ..., 'complete': перенесены ли все подходящие}.
+    """
+    age_days = settings.ORDER_ARCHIVE_AFTER_DAYS if age_days is None else age_days
+    batch_size = batch_size or settings.ORDER_ARCHIVE_BATCH_SIZE
+    max_batches = max_batches or settings.ORDER_ARCHIVE_MAX_BATCHES
+    cutoff = timezone.now() - timedelta(days=age_days)
+
+    archived = archived_items = batches = 0
+    complete = False
+    while batches < max_batches:
+        with transaction.atomic():
+            # Перенесённые строки уходят из выборки, поэтому каждая пачка берёт самые старые из оставшихся
+            orders = list(
+                Order.objects.nocache().select_for_update(skip_locked=True)
+                .filter(status__in=ARCHIVED_STATUSES, created_at__lt=cutoff)
+                .order_by('created_at', 'id').values(*ORDER_FIELDS)[:batch_size]
+            )
+            if not orders:
+                complete = True
+                break
+            orders_count, items_count = _archive_batch(orders)
+        batches += 1
+        archived += orders_count
+        archived_items += items_count
+        if len(orders) < batch_size:
+            complete = True
+            break
+
+    if archived:
+        logger.info("%s orders (%s items) moved to archive.", archived, archived_items)
+    return {'orders': archived, 'items': archived_items, 'batches': batches, 'complete': complete}
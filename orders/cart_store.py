@@ -0,0 +1,324 @@
+from functools import lru_cache
+import redis
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils.module_loading import import_string
+from .models import Cart, CartItem
+
+
+class BaseCartStore:
+    """Хранилище корзин. Позиции корзины — словарь product_id → quantity."""
+
+    def add(self, user_id, product_id, quantity):
+        """Увеличивает количество товара в корзине."""
+        raise NotImplementedError
+
+    def set(self, user_id, product_id, quantity):
+        """Устанавливает количество товара в корзине."""
+        raise NotImplementedError
+
+    def remove(self, user_id, product_ids):
+        """Удаляет товары из корзины."""
+        raise NotImplementedError
+
+    def lines(self, user_id):
+        """Текущие позиции корзины."""
+        raise NotImplementedError
+
+    def apply(self, user_id, operations):
+        """Применяет по порядку операции (op, product_id, quantity), op — add, set или remove."""
+        for op, product_id, quantity in operations:
+            if op == 'remove':
+                self.remove(user_id, [product_id])
+            else:
+                getattr(self, op)(user_id, product_id, quantity)
+
+    def clear(self, user_id, quantities):
+        """
+        Убирает из корзины оформленные количества {product_id: quantity};
+        вызывается внутри транзакции заказа.
+        """
+        raise NotImplementedError
+
+    def flush(self, user_id):
+        """Переносит корзину в таблицы Cart/CartItem, если она хранится не в них."""
+        return False
+
+    def flush_all(self):
+        """Переносит в БД все изменённые корзины и возвращает их количество."""
+        return 0
+
+    def reset(self):
+        """Сбрасывает корзины из быстрого хранилища без записи в БД."""
+
+
+class DatabaseCartStore(BaseCartStore):
+    """
+    Корзины прямо в таблицах Cart/CartItem. Количество меняется одной инструкцией
+    INSERT ... ON CONFLICT по уникальной паре (cart, product), поэтому
+    одновременные добавления одного товара не теряют обновлений.
+    """
+
+    def get_cart(self, user_id):
+        return Cart.objects.get_or_create(user_id=user_id)[0]
+
+    def _upsert(self, user_id, product_id, quantity, increment):
+        """Создаёт строку или меняет её количество; False — у пользователя ещё нет корзины."""
+        item_table = connection.ops.quote_name(CartItem._meta.db_table)
+        cart_table = connection.ops.quote_name(Cart._meta.db_table)
+        value = f'{item_table}.quantity + excluded.quantity' if increment else 'excluded.quantity'
+        sql = (
+            f'INSERT INTO {item_table} (cart_id, product_id, quantity) '
+            f'SELECT id, %s, %s FROM {cart_table} WHERE user_id = %s '
+            f'ON CONFLICT (cart_id, product_id) DO UPDATE SET quantity = {value}'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [product_id, quantity, user_id])
+            return cursor.rowcount > 0
+
+    def _write(self, user_id, product_id, quantity, increment):
+        if not self._upsert(user_id, product_id, quantity, increment):
+            self.get_cart(user_id)
+            self._upsert(user_id, product_id, quantity, increment)
+
+    def add(self, user_id, product_id, quantity):
+        self._write(user_id, product_id, quantity, increment=True)
+
+    def set(self, user_id, product_id, quantity):
+        self._write(user_id, product_id, quantity, increment=False)
+
+    def remove(self, user_id, product_ids):
+        CartItem.objects.filter(cart__user_id=user_id, product_id__in=list(product_ids)).delete()
+
+    def apply(self, user_id, operations):
+        """
+        Операции сворачиваются по товарам: после set/remove количество известно
+        точно, после одних add — это приращение. Дальше по одной пакетной записи
+        на каждый вид изменения в одной транзакции.
+        """
+        changes = {}  # product_id → (точное значение?, количество)
+        for op, product_id, quantity in operations:
+            exact, current = changes.get(product_id, (False, 0))
+            if op == 'add':
+                changes[product_id] = (exact, current + quantity)
+            else:
+                changes[product_id] = (True, quantity if op == 'set' else 0)
+
+        removed, exact, increments = [], {}, {}
+        for product_id, (is_exact, quantity) in changes.items():
+            if not is_exact:
+                increments[product_id] = quantity
+            elif quantity:
+                exact[product_id] = quantity
+            else:
+                removed.append(product_id)
+        with transaction.atomic():
+            cart = self.get_cart(user_id)
+            if removed:
+                CartItem.objects.filter(cart=cart, product_id__in=removed).delete()
+            if exact:
+                CartItem.objects.bulk_create(
+                    [CartItem(cart=cart, product_id=product_id, quantity=quantity) for product_id, quantity in exact.items()],
+                    update_conflicts=True, unique_fields=['cart', 'product'], update_fields=['quantity'],
+                )
+            if increments:
+                self._increment(cart.id, increments)
+
+    def _increment(self, cart_id, quantities):
+        """Увеличивает количество нескольких товаров одной инструкцией INSERT ... ON CONFLICT."""
+        item_table = connection.ops.quote_name(CartItem._meta.db_table)
+        values = ', '.join(['(%s, %s, %s)'] * len(quantities))
+        sql = (
+            f'INSERT INTO {item_table} (cart_id, product_id, quantity) VALUES {values} '
+            f'ON CONFLICT (cart_id, product_id) DO UPDATE SET quantity = {item_table}.quantity + excluded.quantity'
+        )
+        params = [value for product_id, quantity in quantities.items() for value in (cart_id, product_id, quantity)]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+
+    def lines(self, user_id):
+        return dict(CartItem.objects.filter(cart__user_id=user_id).values_list('product_id', 'quantity'))
+
+    def clear(self, user_id, quantities):
+        self.remove(user_id, list(quantities))
+
+    def replace(self, user_id, lines):
+        """Приводит строки корзины в БД к состоянию lines."""
+        with transaction.atomic():
+            cart = self.get_cart(user_id)
+            existing = {item.product_id: item for item in CartItem.objects.filter(cart=cart)}
+            to_create, to_update = [], []
+            for product_id, quantity in lines.items():
+                item = existing.pop(product_id, None)
+                if item is None:
+                    to_create.append(CartItem(cart=cart, product_id=product_id, quantity=quantity))
+                elif item.quantity != quantity:
+                    item.quantity = quantity
+                    to_update.append(item)
+            CartItem.objects.bulk_create(
+                to_create, update_conflicts=True, unique_fields=['cart', 'product'], update_fields=['quantity']
+            )
+            CartItem.objects.bulk_update(to_update, ['quantity'])
+            if existing:
+                CartItem.objects.filter(id__in=[item.id for item in existing.values()]).delete()
+
+
+class RedisCartStore(BaseCartStore):
+    """
+    Активные корзины в хэшах Redis cart:<user_id> (product_id → quantity),
+    изменения — атомарными HINCRBY/HSET/HDEL. В таблицы Cart/CartItem корзины
+    попадают отложенно: id изменённых корзин копятся в множестве cart:dirty,
+    и задача flush_carts периодически переносит их в БД.
+
+    При первом обращении хэш заполняется из БД. Поле _loaded отмечает, что это
+    уже сделано: изменения, внесённые в БД в обход хранилища, после этого не видны.
+    """
+    prefix = 'cart:'
+    dirty_key = 'cart:dirty'
+    loaded_field = '_loaded'
+
+    def __init__(self, url=None, ttl=None):
+        self.url = url or settings.CART_REDIS_URL
+        self.ttl = ttl or getattr(settings, 'CART_REDIS_TTL', 60 * 60 * 24 * 7)
+        self.database = DatabaseCartStore()
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = redis.Redis.from_url(self.url)
+        return self._client
+
+    def key(self, user_id):
+        return f'{self.prefix}{user_id}'
+
+    def ensure_loaded(self, user_id):
+        """Заполняет хэш корзины из БД, если этого ещё не было."""
+        key = self.key(user_id)
+        if self.client.hexists(key, self.loaded_field):
+            return
+
+        def load(pipe):
+            if pipe.hexists(key, self.loaded_field):
+                return
+            lines = self.database.lines(user_id)
+            pipe.multi()
+            pipe.hset(key, mapping={self.loaded_field: 1, **lines})
+            pipe.expire(key, self.ttl)
+
+        # WATCH: из нескольких одновременных загрузок применится только одна
+        self.client.transaction(load, key)
+
+    def _change(self, user_id, command, *args):
+        self.ensure_loaded(user_id)
+        key = self.key(user_id)
+        pipe = self.client.pipeline()
+        getattr(pipe, command)(key, *args)
+        pipe.expire(key, self.ttl)
+        pipe.sadd(self.dirty_key, user_id)
+        return pipe.execute()[0]
+
+    def add(self, user_id, product_id, quantity):
+        self._change(user_id, 'hincrby', product_id, quantity)
+
+    def set(self, user_id, product_id, quantity):
+        self._change(user_id, 'hset', product_id, quantity)
+
+    def remove(self, user_id, product_ids):
+        product_ids = list(product_ids)
+        if product_ids:
+            self._change(user_id, 'hdel', *product_ids)
+
+    def apply(self, user_id, operations):
+        # Все команды уходят одной транзакцией MULTI/EXEC
+        self.ensure_loaded(user_id)
+        key = self.key(user_id)
+        pipe = self.client.pipeline()
+        for op, product_id, quantity in operations:
+            if op == 'add':
+                pipe.hincrby(key, product_id, quantity)
+            elif op == 'set':
+                pipe.hset(key, product_id, quantity)
+            else:
+                pipe.hdel(key, product_id)
+        pipe.expire(key, self.ttl)
+        pipe.sadd(self.dirty_key, user_id)
+        pipe.execute()
+
+    def _read(self, user_id):
+        """Содержимое хэша; None, если корзина в Redis не загружена."""
+        raw = self.client.hgetall(self.key(user_id))
+        if self.loaded_field.encode() not in raw:
+            return None
+        return {
+            int(field): int(value) for field, value in raw.items()
+            if field != self.loaded_field.encode() and int(value) > 0
+        }
+
+    def lines(self, user_id):
+        self.ensure_loaded(user_id)
+        return self._read(user_id) or {}
+
+    def clear(self, user_id, quantities):
+        # В транзакции заказа — только строки в БД: Redis не откатывается вместе с ней,
+        # поэтому хэш меняется после коммита, а при откате корзина остаётся как была
+        self.database.clear(user_id, quantities)
+        quantities = dict(quantities)
+        transaction.on_commit(lambda: self.subtract(user_id, quantities))
+
+    def subtract(self, user_id, quantities):
+        """
+        Вычитает оформленные количества из хэша (HINCRBY -q). Добавленное после чтения корзины
+        остаётся в ней; строки, дошедшие до нуля, удаляются.
+        """
+        key = self.key(user_id)
+        fields = [str(product_id).encode() for product_id in quantities]
+
+        def drop(pipe):
+            if not pipe.hexists(key, self.loaded_field):
+                return  # хэша нет (истёк TTL) — корзина целиком в БД
+            current = dict(zip(fields, pipe.hmget(key, fields)))
+            left = {field: int(current[field] or 0) - quantity for field, quantity in zip(fields, quantities.values())}
+            remaining = set(pipe.hkeys(key)) - {field for field, value in left.items() if value <= 0}
+            pipe.multi()
+            if remaining - {self.loaded_field.encode()}:
+                for field, quantity in zip(fields, quantities.values()):
+                    if left[field] > 0:
+                        pipe.hincrby(key, field, -quantity)
+                    else:
+                        pipe.hdel(key, field)
+                pipe.sadd(self.dirty_key, user_id)
+            else:
+                # Пустая корзина совпадает с БД, хэш можно не хранить
+                pipe.delete(key)
+
+        # WATCH: изменение корзины между чтением и записью повторяет вычитание с новыми значениями
+        self.client.transaction(drop, key)
+
+    def flush(self, user_id):
+        # Отметка снимается до чтения: изменение, пришедшее во время записи, вернёт её
+        if not self.client.srem(self.dirty_key, user_id):
+            return False
+        try:
+            lines = self._read(user_id)
+            if lines is not None:
+                self.database.replace(user_id, lines)
+        except Exception:
+            self.client.sadd(self.dirty_key, user_id)
+            raise
+        return True
+
+    def flush_all(self):
+        return sum(self.flush(int(user_id)) for user_id in self.client.sscan_iter(self.dirty_key))
+
+    def reset(self):
+        keys = list(self.client.scan_iter(match=f'{self.prefix}*'))
+        if keys:
+            self.client.delete(*keys)
+
+
+@lru_cache(maxsize=None)
+def get_cart_store():
+    """Хранилище корзин из настройки CART_STORE_BACKEND."""
+    backend_path = getattr(settings, 'CART_STORE_BACKEND', 'orders.cart_store.DatabaseCartStore')
+    return import_string(backend_path)()
@@ -0,0 +1,68 @@
+"""
+Отмена заказов, которые слишком долго висят в статусе 'pending'.
+
+Просроченные заказы выбираются пачками по индексу (status, created_at) с курсором
+по (created_at, id), каждая пачка отменяется одним UPDATE в своей короткой транзакции
+(orders/state_machine.py). Число пачек за запуск ограничено, поэтому запуск занимает
+ограниченное время при любом объёме истории; остаток разберёт следующий запуск.
+"""
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from .models import Order
+from .state_machine import apply_transition
+
+logger = logging.getLogger(__name__)
+
+EXPIRED_STATUS = 'pending'
+EXPIRY_REASON = 'expired'
+
+
+def _cancel_batch(orders):
+    """Отменяет пачку заказов; возвращает (отменённые, из них с возвратом товаров на склад)."""
+    reserved = {order.id for order in orders if order.stock_reserved}
+    canceled = apply_transition(orders, 'canceled', reason=EXPIRY_REASON)
+    return canceled, sum(1 for order in canceled if order.id in reserved)
+
+
+def expire_pending_orders(ttl=None, batch_size=None, max_batches=None):
+    """
+    Отменяет заказы в статусе 'pending' старше ttl секунд (ORDER_PENDING_TTL) и возвращает
+    на склад зарезервированные товары. Результат — точные счётчики:
+    {'expired': ..., 'released': ..., 'batches': ..., 'complete': разобраны ли все просроченные}.
+    """
+    ttl = settings.ORDER_PENDING_TTL if ttl is None else ttl
+    batch_size = batch_size or settings.ORDER_EXPIRY_BATCH_SIZE
+    max_batches = max_batches or settings.ORDER_EXPIRY_MAX_BATCHES
+    cutoff = timezone.now() - timedelta(seconds=ttl)
+
+    expired = released = batches = 0
+    complete = False
+    position = None
+    while batches < max_batches:
+        queryset = Order.objects.nocache().filter(status=EXPIRED_STATUS, created_at__lt=cutoff)
+        if position is not None:
+            created_at, pk = position
+            queryset = queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk))
+        with transaction.atomic():
+            orders = list(
+                queryset.select_for_update(skip_locked=True).order_by('created_at', 'id')[:batch_size]
+            )
+            if not orders:
+                complete = True
+                break
+            canceled, batch_released = _cancel_batch(orders)
+        batches += 1
+        expired += len(canceled)
+        released += batch_released
+        position = (orders[-1].created_at, orders[-1].id)
+        if len(orders) < batch_size:
+            complete = True
+            break
+
+    if expired:
+        logger.info("%s pending orders canceled due to timeout (%s with stock released).", expired, released)
+    return {'expired': expired, 'released': released, 'batches': batches, 'complete': complete}
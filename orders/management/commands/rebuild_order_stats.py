@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from orders.stats import rebuild
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает сводку заказов по пользователям (UserOrderStats) по таблице заказов"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='user_ids',
+                            help="id пользователя (можно несколько раз); по умолчанию — все")
+
+    def handle(self, *args, **options):
+        rows = rebuild(options['user_ids'])
+        self.stdout.write(self.style.SUCCESS(f"Сводка заказов пересобрана: {rows} строк"))
@@ -0,0 +1,47 @@
+# Generated by Django 5.1.3 on 2026-10-18 15:32
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def merge_duplicates(apps, schema_editor):
+    """Сливает лишние корзины пользователя в самую старую и схлопывает повторяющиеся строки."""
+    Cart = apps.get_model('orders', 'Cart')
+    CartItem = apps.get_model('orders', 'CartItem')
+
+    duplicated_users = Cart.objects.values('user_id').annotate(carts=Count('id'), first=Min('id')).filter(carts__gt=1)
+    for row in duplicated_users:
+        extra = Cart.objects.filter(user_id=row['user_id']).exclude(id=row['first'])
+        CartItem.objects.filter(cart__in=extra).update(cart_id=row['first'])
+        extra.delete()
+
+    duplicated_lines = (
+        CartItem.objects.values('cart_id', 'product_id')
+        .annotate(lines=Count('id'), first=Min('id'), total=Sum('quantity'))
+        .filter(lines__gt=1)
+    )
+    for row in duplicated_lines:
+        CartItem.objects.filter(id=row['first']).update(quantity=row['total'])
+        CartItem.objects.filter(cart_id=row['cart_id'], product_id=row['product_id']).exclude(id=row['first']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0006_order_stock_reserved'),
+        ('products', '0005_productattribute'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='cart',
+            constraint=models.UniqueConstraint(fields=('user',), name='unique_cart_per_user'),
+        ),
+        migrations.AddConstraint(
+            model_name='cartitem',
+            constraint=models.UniqueConstraint(fields=('cart', 'product'), name='unique_cart_product'),
+        ),
+    ]
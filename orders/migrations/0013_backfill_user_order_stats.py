@@ -0,0 +1,36 @@
+from collections import defaultdict
+from decimal import Decimal
+from django.db import migrations
+from django.db.models import Count, Sum
+
+
+def backfill(apps, schema_editor):
+    """
+    Заполняет сводку по уже существующим заказам, как orders.stats.rebuild: без этого смена статуса
+    старого заказа вычитала бы его из пустой строки и счётчики уходили бы в минус.
+    """
+    UserOrderStats = apps.get_model('orders', 'UserOrderStats')
+    totals = defaultdict(lambda: (0, Decimal(0)))
+    for model_name in ('Order', 'ArchivedOrder'):
+        rows = apps.get_model('orders', model_name).objects.values('user_id', 'status').annotate(
+            count=Count('id'), amount=Sum('total_amount')
+        )
+        for row in rows.order_by().iterator():
+            count, amount = totals[row['user_id'], row['status']]
+            totals[row['user_id'], row['status']] = (count + row['count'], amount + (row['amount'] or 0))
+    UserOrderStats.objects.all().delete()
+    UserOrderStats.objects.bulk_create([
+        UserOrderStats(user_id=user_id, status=status, order_count=count, total_amount=amount)
+        for (user_id, status), (count, amount) in totals.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0012_outbox_retry_backoff'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,6 @@
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
 from products.models import Product
 from django.contrib.auth import get_user_model
 
@@ -9,6 +10,10 @@ class Cart(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='cart')
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        # Одна корзина на пользователя
+        constraints = [models.UniqueConstraint(fields=['user'], name='unique_cart_per_user')]
+
     def __str__(self):
         return f"Cart {self.id} for {self.user.username}"
 
@@ -17,6 +22,10 @@ class CartItem(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField()
 
+    class Meta:
+        # Товар встречается в корзине одной строкой — на этом держится upsert количества
+        constraints = [models.UniqueConstraint(fields=['cart', 'product'], name='unique_cart_product')]
+
     def __str__(self):
         return f"{self.quantity} x {self.product.name}"
 
@@ -38,35 +47,86 @@ class Order(models.Model):
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
     total_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     contact = models.ForeignKey('Contact', on_delete=models.SET_NULL, null=True)
+    stock_reserved = models.BooleanField(default=False)                                     # Товары списаны со склада под заказ
+
+    class Meta:
+        indexes = [
+            # Поиск просроченных заказов в статусе 'pending' (orders/expiry.py)
+            models.Index(fields=['status', 'created_at'], name='order_status_created'),
+        ]
 
     def calculate_total_amount(self):
         self.total_amount = sum(item.price * item.quantity for item in self.items.all())
         self.save()
 
-    def change_status(self, new_status):
+    def change_status(self, new_status, reason=''):
         """
-        Меняет статус заказа, если переход допустим.
+        Меняет статус заказа, если переход допустим (orders/state_machine.py).
         """
-        allowed_transitions = {
-            'basket': ['new'],
-            'new': ['confirmed', 'canceled'],
-            'confirmed': ['assembled', 'canceled'],
-            'assembled': ['sent', 'canceled'],
-            'sent': ['delivered'],
-            'delivered': [],
-            'canceled': [],
-        }
-
-        if new_status not in allowed_transitions[self.status]:
-            raise ValueError(f"Переход из статуса {self.status} в {new_status} невозможен.")
-
-        self.status = new_status
-        self.save()
+        from .state_machine import transition
+        transition(self, new_status, reason)
 
     def __str__(self):
         return f"Order {self.id} - {self.user.username} - {self.status}"
 
 
+class OrderStatusLog(models.Model):
+    """Журнал смены статусов заказов."""
+    # Без ограничения в БД: журнал переживает перенос заказа в архив (orders/archive.py)
+    order = models.ForeignKey(Order, on_delete=models.DO_NOTHING, db_constraint=False, related_name='status_log')
+    old_status = models.CharField(max_length=10)
+    new_status = models.CharField(max_length=10)
+    reason = models.CharField(max_length=50, blank=True)                                # Кто или что сменило статус
+    changed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Order {self.order_id}: {self.old_status} -> {self.new_status}"
+
+
+class UserOrderStats(models.Model):
+    """
+    Сводка заказов пользователя по статусам: количество и сумма.
+    Обновляется вместе с заказами (orders/stats.py), пересобирается командой rebuild_order_stats.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='order_stats')
+    status = models.CharField(max_length=10)
+    order_count = models.IntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        # Одна строка на пару (пользователь, статус) — на этом держится upsert счётчиков
+        constraints = [models.UniqueConstraint(fields=['user', 'status'], name='unique_user_order_status')]
+
+    def __str__(self):
+        return f"{self.user_id} {self.status}: {self.order_count}"
+
+
+class OutboxEvent(models.Model):
+    """
+    Событие по заказу, записанное в той же транзакции, что и само изменение.
+    Побочные эффекты (письма и т.п.) выполняет задача relay_outbox (orders/outbox.py).
+    """
+    topic = models.CharField(max_length=50)
+    key = models.CharField(max_length=100, unique=True)                                 # Ключ дедупликации события
+    payload = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)                        # Раньше этого времени relay событие не берёт
+    failed_at = models.DateTimeField(null=True, blank=True)                             # Исчерпаны попытки, событие больше не доставляется
+
+    class Meta:
+        indexes = [
+            # Очередь необработанных событий в порядке записи
+            models.Index(fields=['id'], condition=models.Q(processed_at__isnull=True, failed_at__isnull=True),
+                         name='outbox_pending'),
+        ]
+
+    def __str__(self):
+        return f"{self.topic} {self.key}"
+
+
 class OrderItem(models.Model):
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='items')    # Cвязь с моделью Order
     product = models.ForeignKey(Product, on_delete=models.CASCADE)                      # Cвязь с моделью Product
@@ -77,6 +137,35 @@ class OrderItem(models.Model):
         return f"{self.quantity} x {self.product.name}"
 
 
+class ArchivedOrder(models.Model):
+    """Доставленный или отменённый заказ, перенесённый из Order в архив (orders/archive.py); id сохраняется."""
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='archived_orders')
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    status = models.CharField(max_length=10, choices=Order.STATUS_CHOICES)
+    total_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    contact = models.ForeignKey('Contact', on_delete=models.SET_NULL, null=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['user', 'id'], name='archived_order_user')]
+
+    def __str__(self):
+        return f"Archived order {self.id} - {self.status}"
+
+
+class ArchivedOrderItem(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    order = models.ForeignKey(ArchivedOrder, on_delete=models.CASCADE, related_name='items')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    quantity = models.PositiveIntegerField()
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+
+    def __str__(self):
+        return f"{self.quantity} x {self.product_id}"
+
+
 class Contact(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='contacts')
     first_name = models.CharField(max_length=50)
@@ -0,0 +1,137 @@
+"""
+Транзакционный outbox для событий по заказам.
+
+Событие пишется в таблицу OutboxEvent в той же транзакции, что и изменение заказа:
+если транзакция откатилась, события нет, если зафиксировалась — оно не потеряется.
+Задача relay_outbox разбирает очередь пачками и передаёт события обработчикам по темам.
+Доставка «хотя бы один раз»: пачка помечается обработанной после обработчиков, поэтому
+при сбое события придут повторно, и обработчики должны быть идемпотентны.
+Повтор записи с тем же ключом игнорируется. События темы без обработчика считаются
+доставленными: на них пока никто не подписан.
+
+Событие с ошибкой обработчика откладывается с экспоненциальной задержкой (next_attempt_at),
+после OUTBOX_MAX_ATTEMPTS попыток получает отметку failed_at и больше не доставляется.
+Чтобы повторить такое событие, достаточно сбросить failed_at и attempts.
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+# Тема → обработчик пачки событий: handler(events), events — список OutboxEvent
+HANDLERS = {}
+
+
+def handler(topic):
+    """Регистрирует обработчик темы (декоратор)."""
+    def register(func):
+        HANDLERS[topic] = func
+        return func
+    return register
+
+
+def publish(topic, key, payload):
+    """Записывает одно событие в текущей транзакции."""
+    publish_many([(topic, key, payload)])
+
+
+def publish_many(events):
+    """Записывает события [(тема, ключ, данные), ...] одним INSERT; ключи-дубликаты пропускаются."""
+    OutboxEvent.objects.bulk_create(
+        [OutboxEvent(topic=topic, key=key, payload=payload) for topic, key, payload in events],
+        ignore_conflicts=True,
+    )
+
+
+def _deliver(events):
+    """Передаёт пачку обработчикам; возвращает id доставленных событий и {id: ошибка} для остальных."""
+    by_topic = defaultdict(list)
+    for event in events:
+        by_topic[event.topic].append(event)
+    delivered, failed = [], {}
+    for topic, batch in by_topic.items():
+        func = HANDLERS.get(topic)
+        try:
+            if func is not None:
+                # Точка сохранения: ошибка обработчика в БД не ломает транзакцию всей пачки
+                with transaction.atomic():
+                    func(batch)
+        except Exception as e:
+            logger.exception("Outbox handler for %s failed", topic)
+            failed.update({event.id: repr(e) for event in batch})
+        else:
+            delivered += [event.id for event in batch]
+    return delivered, failed
+
+
+def retry_delay(attempts):
+    """Задержка перед следующей попыткой: удваивается с каждой неудачей, не больше OUTBOX_RETRY_MAX_DELAY."""
+    return min(settings.OUTBOX_RETRY_DELAY * 2 ** (attempts - 1), settings.OUTBOX_RETRY_MAX_DELAY)
+
+
+def _mark_failed(events, errors, max_attempts):
+    """Сохраняет ошибку и время следующей попытки; возвращает число событий, исчерпавших попытки."""
+    now = timezone.now()
+    failed = [event for event in events if event.id in errors]
+    dead = 0
+    for event in failed:
+        event.attempts += 1
+        event.last_error = errors[event.id]
+        if event.attempts >= max_attempts:
+            event.failed_at = now
+            dead += 1
+            logger.error("Outbox event %s gave up after %s attempts: %s", event.key, event.attempts, event.last_error)
+        else:
+            event.next_attempt_at = now + timedelta(seconds=retry_delay(event.attempts))
+    OutboxEvent.objects.bulk_update(failed, ['attempts', 'last_error', 'next_attempt_at', 'failed_at'])
+    return dead
+
+
+def relay(batch_size=None, max_batches=None, max_attempts=None):
+    """
+    Разбирает очередь событий: не больше max_batches пачек по batch_size.
+    Берутся события, время следующей попытки которых наступило; после max_attempts
+    неудач событие помечается failed_at.
+    Возвращает {'delivered': ..., 'failed': ..., 'dead': ..., 'batches': ...}.
+    """
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    max_batches = max_batches or settings.OUTBOX_MAX_BATCHES
+    max_attempts = max_attempts or settings.OUTBOX_MAX_ATTEMPTS
+    delivered = failed = dead = batches = 0
+    position = 0
+    while batches < max_batches:
+        with transaction.atomic():
+            # Параллельный relay пропускает заблокированные строки и берёт следующие
+            events = list(
+                OutboxEvent.objects.select_for_update(skip_locked=True)
+                .filter(processed_at__isnull=True, failed_at__isnull=True,
+                        next_attempt_at__lte=timezone.now(), id__gt=position)
+                .order_by('id')[:batch_size]
+            )
+            if not events:
+                break
+            done, errors = _deliver(events)
+            OutboxEvent.objects.filter(id__in=done).update(processed_at=timezone.now())
+            if errors:
+                dead += _mark_failed(events, errors, max_attempts)
+        batches += 1
+        delivered += len(done)
+        failed += len(errors)
+        # Неудавшиеся события ждут следующего запуска, а не повторяются в этом
+        position = events[-1].id
+        if len(events) < batch_size:
+            break
+    return {'delivered': delivered, 'failed': failed, 'dead': dead, 'batches': batches}
+
+
+def purge(retention=None):
+    """Удаляет обработанные события старше retention секунд (OUTBOX_RETENTION)."""
+    retention = settings.OUTBOX_RETENTION if retention is None else retention
+    cutoff = timezone.now() - timedelta(seconds=retention)
+    deleted, _ = OutboxEvent.objects.filter(processed_at__lt=cutoff).delete()
+    return deleted
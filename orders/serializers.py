@@ -1,9 +1,26 @@
+from django.db import transaction
 from rest_framework import serializers
-from .models import Order, OrderItem, Cart, CartItem, Address
+from .models import Order, OrderItem, Cart, CartItem, Address, ArchivedOrder, ArchivedOrderItem
+from .stock import reserve_stock, InsufficientStock
+from .state_machine import transition, InvalidTransition
+from . import stats
+from products.models import Product
+
+class OrderProductField(serializers.PrimaryKeyRelatedField):
+    """Товар позиции по id: берётся из товаров, прочитанных одним запросом для всего заказа."""
+
+    def to_internal_value(self, data):
+        product = self.context.get('order_products', {}).get(str(data))
+        if product is None:
+            # Неизвестный или некорректный id — обычная проверка с её сообщениями об ошибке
+            return super().to_internal_value(data)
+        return product
+
 
 class OrderItemSerializer(serializers.ModelSerializer):
     # Сериализатор для единицы товара в заказе
     product_name = serializers.ReadOnlyField(source='product.name')
+    product = OrderProductField(queryset=Product.objects.all())
 
     class Meta:
         model = OrderItem
@@ -18,14 +35,63 @@ class OrderSerializer(serializers.ModelSerializer):
         fields = ['id', 'user', 'status', 'created_at', 'updated_at', 'items']
         read_only_fields = ['id', 'created_at', 'updated_at']
 
+    def to_internal_value(self, data):
+        # Товары всех позиций — одним запросом, а не по запросу на позицию
+        items = data.get('items') if hasattr(data, 'get') else None
+        if isinstance(items, list):
+            ids = {str(item.get('product')) for item in items if isinstance(item, dict)}
+            ids = [int(pk) for pk in ids if pk.isdigit()]
+            self.context['order_products'] = {
+                str(pk): product for pk, product in Product.objects.in_bulk(ids).items()
+            }
+        return super().to_internal_value(data)
+
     def create(self, validated_data):
-        # Создание заказа вместе с вложенными OrderItem
+        # Создание заказа вместе с вложенными OrderItem и резервированием товаров
         items_data = validated_data.pop('items')
-        order = Order.objects.create(**validated_data)
-        for item_data in items_data:
-            OrderItem.objects.create(order=order, **item_data)
+        with transaction.atomic():
+            try:
+                reserve_stock((item_data['product'].id, item_data['quantity']) for item_data in items_data)
+            except InsufficientStock as e:
+                raise serializers.ValidationError({'items': str(e)})
+            order = Order.objects.create(stock_reserved=True, **validated_data)
+            OrderItem.objects.bulk_create([OrderItem(order=order, **item_data) for item_data in items_data])
+            stats.record_created([order])
         return order
 
+    def update(self, instance, validated_data):
+        # Статус меняется только допустимым переходом (orders/state_machine.py), остальные поля — как обычно
+        new_status = validated_data.pop('status', instance.status)
+        with transaction.atomic():
+            if new_status != instance.status:
+                try:
+                    transition(instance, new_status, reason='api')
+                except InvalidTransition as e:
+                    raise serializers.ValidationError({'status': str(e)})
+            if validated_data:
+                instance = super().update(instance, validated_data)
+        return instance
+
+class ArchivedOrderItemSerializer(serializers.ModelSerializer):
+    product_name = serializers.ReadOnlyField(source='product.name')
+
+    class Meta:
+        model = ArchivedOrderItem
+        fields = ['id', 'product', 'product_name', 'quantity', 'price']
+
+class ArchivedOrderSerializer(serializers.ModelSerializer):
+    # Архивный заказ в той же форме, что и OrderSerializer
+    items = ArchivedOrderItemSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = ArchivedOrder
+        fields = ['id', 'user', 'status', 'created_at', 'updated_at', 'items']
+
+class BulkStatusChangeSerializer(serializers.Serializer):
+    # Массовая смена статуса: до 1000 заказов за запрос
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=1000)
+    status = serializers.ChoiceField(choices=Order.STATUS_CHOICES)
+
 class CartItemSerializer(serializers.ModelSerializer):
     product_name = serializers.ReadOnlyField(source='product.name')
 
@@ -33,6 +99,29 @@ class CartItemSerializer(serializers.ModelSerializer):
         model = CartItem
         fields = ['id', 'product', 'product_name', 'quantity']
 
+class CartOperationSerializer(serializers.Serializer):
+    # Одна операция пакетного изменения корзины
+    op = serializers.ChoiceField(choices=['add', 'set', 'remove'])
+    product_id = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1, required=False)
+
+    def validate(self, attrs):
+        if attrs['op'] != 'remove' and 'quantity' not in attrs:
+            raise serializers.ValidationError({'quantity': 'Обязательное поле для операций add и set.'})
+        return attrs
+
+class CartBatchSerializer(serializers.Serializer):
+    operations = CartOperationSerializer(many=True, allow_empty=False, max_length=200)
+
+    def validate_operations(self, operations):
+        # Все товары проверяются одним запросом
+        product_ids = {operation['product_id'] for operation in operations}
+        found = set(Product.objects.filter(id__in=product_ids).values_list('id', flat=True))
+        missing = sorted(product_ids - found)
+        if missing:
+            raise serializers.ValidationError(f"Товары не найдены: {', '.join(map(str, missing))}")
+        return operations
+
 class CartSerializer(serializers.ModelSerializer):
     items = CartItemSerializer(many=True, read_only=True)
 
@@ -0,0 +1,138 @@
+"""
+Переходы между статусами заказов.
+
+Таблица допустимых переходов собирается один раз при импорте. Смена статуса — это
+UPDATE ... WHERE status = <прежний> (compare-and-swap). Если заказ успели перевести
+параллельно, UPDATE не затронет строку, и конфликт виден без блокировок. Массовый переход
+меняет сотни заказов одним UPDATE на каждый исходный статус.
+"""
+import copy
+from collections import defaultdict
+from django.db import transaction
+from django.utils import timezone
+from cacheops import invalidate_obj
+from . import outbox, stats
+from .models import Order, OrderItem, OrderStatusLog
+from .stock import release_stock
+
+TRANSITIONS = {
+    'pending': ('canceled',),
+    'basket': ('new',),
+    'new': ('confirmed', 'canceled'),
+    'confirmed': ('assembled', 'canceled'),
+    'assembled': ('sent', 'canceled'),
+    'sent': ('delivered',),
+    'delivered': (),
+    'canceled': (),
+}
+# (из, в) → допустим ли переход; в → из каких статусов в него можно перейти
+ALLOWED = frozenset((old, new) for old, targets in TRANSITIONS.items() for new in targets)
+SOURCES = {
+    new: frozenset(old for old, targets in TRANSITIONS.items() if new in targets)
+    for new in {new for targets in TRANSITIONS.values() for new in targets}
+}
+
+
+class InvalidTransition(ValueError):
+    """Переход из текущего статуса в запрошенный не предусмотрен."""
+
+    def __init__(self, old_status, new_status):
+        self.old_status, self.new_status = old_status, new_status
+        super().__init__(f"Переход из статуса {old_status} в {new_status} невозможен.")
+
+
+class TransitionConflict(Exception):
+    """Статус заказа изменился параллельно: UPDATE не нашёл строку с прежним статусом."""
+
+    def __init__(self, order_id):
+        self.order_id = order_id
+        super().__init__(f"Статус заказа {order_id} изменился, повторите запрос.")
+
+
+def apply_transition(orders, new_status, reason=''):
+    """
+    Переводит загруженные заказы (их status — ожидаемый прежний) в new_status.
+    Один UPDATE на каждый прежний статус, возврат товаров отменённых заказов одним запросом,
+    журнал, события order.status_changed (orders/outbox.py) и сводка по пользователям
+    (orders/stats.py) — по одной инструкции.
+    Возвращает заказы, которые действительно перешли.
+    """
+    stamp = timezone.now()
+    by_status = defaultdict(list)
+    for order in orders:
+        by_status[order.status].append(order)
+    changes = {'status': new_status, 'updated_at': stamp}
+    if new_status == 'canceled':
+        changes['stock_reserved'] = False
+
+    applied = []
+    with transaction.atomic():
+        for old_status, group in by_status.items():
+            ids = [order.id for order in group]
+            updated = Order.objects.filter(id__in=ids, status=old_status).update(**changes)
+            if updated != len(ids):
+                # Часть заказов сменила статус после выборки: перешли только строки с нашей отметкой
+                changed_ids = set(Order.objects.nocache().filter(
+                    id__in=ids, status=new_status, updated_at=stamp
+                ).values_list('id', flat=True))
+                group = [order for order in group if order.id in changed_ids]
+            applied += group
+
+        stats.record_transition(applied, new_status)
+        if new_status == 'canceled':
+            reserved = [order.id for order in applied if order.stock_reserved]
+            if reserved:
+                release_stock(OrderItem.objects.filter(order_id__in=reserved).values_list('product_id', 'quantity'))
+        OrderStatusLog.objects.bulk_create([
+            OrderStatusLog(order_id=order.id, old_status=order.status, new_status=new_status,
+                           reason=reason, changed_at=stamp)
+            for order in applied
+        ])
+        outbox.publish_many([
+            ('order.status_changed', f'order.status_changed:{order.id}:{new_status}:{stamp.timestamp()}',
+             {'order_id': order.id, 'user_id': order.user_id, 'old_status': order.status, 'new_status': new_status})
+            for order in applied
+        ])
+        # UPDATE не сбрасывает кэш запросов: сбрасываем по старому и новому состоянию строки
+        for order in applied:
+            invalidate_obj(copy.copy(order))
+            for field, value in changes.items():
+                setattr(order, field, value)
+            invalidate_obj(order)
+    return applied
+
+
+def transition(order, new_status, reason=''):
+    """Переводит один заказ; order обновляется на месте. InvalidTransition / TransitionConflict."""
+    if (order.status, new_status) not in ALLOWED:
+        raise InvalidTransition(order.status, new_status)
+    if not apply_transition([order], new_status, reason):
+        raise TransitionConflict(order.id)
+    return order
+
+
+def bulk_transition(order_ids, new_status, reason=''):
+    """
+    Переводит пачку заказов в new_status. Результат по каждому id:
+    'changed', 'not_found', 'invalid' (переход из текущего статуса не предусмотрен)
+    или 'conflict' (статус изменился параллельно).
+    """
+    sources = SOURCES.get(new_status, frozenset())
+    order_ids = list(dict.fromkeys(order_ids))
+    orders = list(Order.objects.nocache().filter(id__in=order_ids))
+    found = {order.id: order for order in orders}
+    eligible = [order for order in orders if order.status in sources]
+
+    changed = {order.id for order in apply_transition(eligible, new_status, reason)} if eligible else set()
+    results = {}
+    for order_id in order_ids:
+        order = found.get(order_id)
+        if order is None:
+            results[order_id] = 'not_found'
+        elif order_id in changed:
+            results[order_id] = 'changed'
+        elif order.status not in sources:
+            results[order_id] = 'invalid'
+        else:
+            results[order_id] = 'conflict'
+    return results
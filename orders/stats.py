@@ -0,0 +1,104 @@
+"""
+Сводка заказов по пользователям (UserOrderStats): количество и сумма по каждому статусу.
+
+Счётчики меняются в той же транзакции, что и заказы: создание добавляет заказ к его статусу,
+смена статуса переносит его из старого в новый. Все изменения пачки заказов — одна инструкция
+INSERT ... ON CONFLICT по паре (user, status), поэтому параллельные обновления не теряются.
+Чтение сводки — несколько строк пользователя, сколько бы у него ни было заказов.
+"""
+from collections import defaultdict
+from decimal import Decimal
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+from .models import ArchivedOrder, Order, UserOrderStats
+
+# Статусы, которые не входят в потраченную сумму
+NOT_SPENT_STATUSES = ('basket', 'canceled')
+
+
+def apply_deltas(deltas):
+    """Прибавляет к счётчикам {(user_id, status): (заказов, сумма)} одной инструкцией."""
+    deltas = {key: value for key, value in deltas.items() if value != (0, 0)}
+    if not deltas:
+        return
+    table = connection.ops.quote_name(UserOrderStats._meta.db_table)
+    values = ', '.join(['(%s, %s, %s, %s)'] * len(deltas))
+    sql = (
+        f'INSERT INTO {table} (user_id, status, order_count, total_amount) VALUES {values} '
+        f'ON CONFLICT (user_id, status) DO UPDATE SET '
+        f'order_count = {table}.order_count + excluded.order_count, '
+        f'total_amount = {table}.total_amount + excluded.total_amount'
+    )
+    params = [
+        value for (user_id, status), (count, amount) in deltas.items()
+        for value in (user_id, status, count, amount)
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def _collect(orders, sign, status=None):
+    deltas = defaultdict(lambda: (0, Decimal(0)))
+    for order in orders:
+        key = (order.user_id, status or order.status)
+        count, amount = deltas[key]
+        deltas[key] = (count + sign, amount + sign * Decimal(order.total_amount))
+    return deltas
+
+
+def record_created(orders):
+    """Новые заказы попадают в счётчики своего статуса."""
+    apply_deltas(_collect(orders, 1))
+
+
+def record_deleted(orders):
+    apply_deltas(_collect(orders, -1))
+
+
+def record_transition(orders, new_status):
+    """Заказы (со старым статусом в order.status) переходят в new_status."""
+    deltas = _collect(orders, -1)
+    for key, (count, amount) in _collect(orders, 1, status=new_status).items():
+        old_count, old_amount = deltas.get(key, (0, Decimal(0)))
+        deltas[key] = (old_count + count, old_amount + amount)
+    apply_deltas(deltas)
+
+
+def rebuild(user_ids=None):
+    """
+    Пересчитывает сводку по заказам, включая архивные (всем или указанным пользователям);
+    возвращает число строк.
+    """
+    stats = UserOrderStats.objects.all()
+    totals = defaultdict(lambda: (0, Decimal(0)))
+    with transaction.atomic():
+        for orders in (Order.objects.nocache(), ArchivedOrder.objects.all()):
+            if user_ids is not None:
+                orders = orders.filter(user_id__in=user_ids)
+            rows = orders.values('user_id', 'status').annotate(count=Count('id'), amount=Sum('total_amount'))
+            for row in rows.order_by().iterator():
+                count, amount = totals[row['user_id'], row['status']]
+                totals[row['user_id'], row['status']] = (count + row['count'], amount + (row['amount'] or 0))
+        if user_ids is not None:
+            stats = stats.filter(user_id__in=user_ids)
+        stats.delete()
+        created = UserOrderStats.objects.bulk_create([
+            UserOrderStats(user_id=user_id, status=status, order_count=count, total_amount=amount)
+            for (user_id, status), (count, amount) in totals.items()
+        ], batch_size=1000)
+    return len(created)
+
+
+def get_summary(user):
+    """Сводка для /api/orders/orders/summary/."""
+    by_status = {
+        row['status']: {'count': row['order_count'], 'total_amount': row['total_amount'].quantize(Decimal('0.01'))}
+        for row in UserOrderStats.objects.filter(user=user, order_count__gt=0)
+        .values('status', 'order_count', 'total_amount').order_by('status')
+    }
+    spent = sum((row['total_amount'] for status, row in by_status.items() if status not in NOT_SPENT_STATUSES),
+                Decimal('0.00'))
+    # Суммы строками, как DecimalField в остальных ответах API
+    for row in by_status.values():
+        row['total_amount'] = str(row['total_amount'])
+    return {'orders': sum(row['count'] for row in by_status.values()), 'spent': str(spent), 'by_status': by_status}
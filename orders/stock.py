@@ -0,0 +1,82 @@
+import copy
+from collections import defaultdict
+from django.db import transaction
+from django.db.models import Case, When, Value, F, IntegerField
+from products.cache import bump_stock_version_on_commit, invalidate_products
+from products.models import Product
+
+
+class InsufficientStock(Exception):
+    """Товара на складе меньше, чем запрошено."""
+
+    def __init__(self, product_ids):
+        self.product_ids = sorted(product_ids)
+        super().__init__(f"Недостаточно товара на складе: {', '.join(map(str, self.product_ids))}")
+
+
+def _merge(lines):
+    """Складывает количества по товарам: [(product_id, quantity), ...] → {product_id: quantity}."""
+    quantities = defaultdict(int)
+    for product_id, quantity in lines:
+        quantities[product_id] += int(quantity)
+    return {product_id: quantity for product_id, quantity in quantities.items() if quantity > 0}
+
+
+def _per_product(quantities):
+    return Case(*[When(id=pk, then=Value(quantity)) for pk, quantity in quantities.items()],
+                output_field=IntegerField())
+
+
+def _invalidate(products, quantities, sign):
+    """
+    Сбрасывает кэш запросов по старому и новому остатку: запрос мог фильтровать по любому из них.
+    Меняет версию остатков (ETag списка и карточки товара); версия каталога и кэш фасетов
+    от остатков не зависят и не сбрасываются при каждом заказе.
+    """
+    changed = []
+    for product in products:
+        updated = copy.copy(product)
+        updated.quantity += sign * quantities[product.id]
+        changed += [product, updated]
+    invalidate_products(changed)
+    bump_stock_version_on_commit()
+
+
+def reserve_stock(lines):
+    """
+    Списывает товары со склада: либо все позиции, либо ни одной.
+    Строки блокируются в порядке id (одинаковом для всех транзакций — без взаимоблокировок),
+    а само списание — один UPDATE с условием quantity >= запрошенного.
+    """
+    quantities = _merge(lines)
+    if not quantities:
+        return
+    ids = sorted(quantities)
+    with transaction.atomic():
+        # Строки целиком: по ним же сбрасывается кэш запросов, UPDATE его сам не трогает
+        products = list(Product.objects.nocache().select_for_update().filter(id__in=ids).order_by('id'))
+        available = {product.id: product.quantity for product in products}
+        short = [pk for pk in ids if available.get(pk, 0) < quantities[pk]]
+        if short:
+            raise InsufficientStock(short)
+
+        requested = _per_product(quantities)
+        updated = Product.objects.filter(id__in=ids, quantity__gte=requested).update(
+            quantity=F('quantity') - requested
+        )
+        if updated != len(ids):
+            # Без блокировок строк (SQLite) остаток мог измениться между чтением и списанием
+            raise InsufficientStock(ids)
+        _invalidate(products, quantities, -1)
+
+
+def release_stock(lines):
+    """Возвращает товары на склад одним UPDATE."""
+    quantities = _merge(lines)
+    if not quantities:
+        return
+    with transaction.atomic():
+        products = list(Product.objects.nocache().filter(id__in=list(quantities)))
+        Product.objects.filter(id__in=list(quantities)).update(quantity=F('quantity') + _per_product(quantities))
+        _invalidate(products, quantities, 1)
+
@@ -1,17 +1,75 @@
+from smtplib import SMTPException
 from celery import shared_task
-from .models import Order
-from django.utils.timezone import now
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Prefetch
+from django.template.loader import render_to_string
+from .cart_store import get_cart_store
+from .models import Order, OrderItem
+from .archive import archive_orders
+from .expiry import expire_pending_orders
+from . import outbox
 import logging
 
 logger = logging.getLogger(__name__)
 
 @shared_task
 def check_pending_orders():
-    """Проверяет заказы со статусом 'ожидание' и обновляет их."""
-    orders = Order.objects.filter(status='pending', created_at__lt=now())
-    for order in orders:
-        # Обновляем статус (пример)
-        order.status = 'canceled'
-        order.save()
-        logger.info(f"Order {order.id} canceled due to timeout.")
-    return f"{orders.count()} orders processed."
+    """Отменяет просроченные заказы в статусе 'pending' (orders/expiry.py) и возвращает счётчики."""
+    return expire_pending_orders()
+
+
+def build_order_confirmation(order):
+    """Письмо с подтверждением заказа (шаблоны orders/emails/order_confirmation_*.txt)."""
+    context = {'order': order, 'product_names': [item.product.name for item in order.items.all()]}
+    subject = render_to_string('orders/emails/order_confirmation_subject.txt', context).strip()
+    body = render_to_string('orders/emails/order_confirmation_body.txt', context).strip()
+    return EmailMessage(subject, body, 'no-reply@example.com', [order.contact.email])
+
+
+@shared_task(
+    autoretry_for=(SMTPException, OSError),
+    retry_backoff=True,
+    retry_backoff_max=600,
+    retry_jitter=True,
+    max_retries=5,
+)
+def send_order_confirmations(order_ids):
+    """Рассылает подтверждения по пачке заказов через одно SMTP-соединение."""
+    orders = (
+        Order.objects.filter(id__in=order_ids, contact__isnull=False)
+        .select_related('contact')
+        .prefetch_related(Prefetch('items', queryset=OrderItem.objects.select_related('product')))
+        .order_by('id')
+    )
+    messages = [build_order_confirmation(order) for order in orders]
+    if not messages:
+        return 0
+    with get_connection() as connection:
+        return connection.send_messages(messages)
+
+
+@shared_task
+def flush_carts():
+    """Переносит изменённые корзины из быстрого хранилища в таблицы Cart/CartItem."""
+    flushed = get_cart_store().flush_all()
+    return f"{flushed} carts flushed."
+
+
+@shared_task
+def archive_old_orders():
+    """Переносит завершённые заказы старше ORDER_ARCHIVE_AFTER_DAYS в архив (orders/archive.py)."""
+    return archive_orders()
+
+
+@shared_task
+def relay_outbox():
+    """Передаёт накопившиеся события заказов обработчикам (orders/outbox.py) и чистит старые."""
+    result = outbox.relay()
+    result['purged'] = outbox.purge()
+    return result
+
+
+@outbox.handler('order.created')
+def confirm_created_orders(events):
+    """Подтверждения по всем новым заказам пачки — одной задачей, через одно SMTP-соединение."""
+    send_order_confirmations.delay([event.payload['order_id'] for event in events])
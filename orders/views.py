@@ -1,21 +1,102 @@
 from rest_framework import viewsets, status
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import APIException
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.views import APIView
 from rest_framework.decorators import action
+from django.http import Http404
 from django.shortcuts import get_object_or_404
-from .models import Order, OrderItem, Cart, CartItem, Contact, Address
-from .serializers import OrderSerializer, CartItemSerializer, AddressSerializer
+from django.db import transaction
+from django.db.models import Prefetch, Max, Count
+from django.utils.functional import cached_property
+from .models import Order, OrderItem, Cart, CartItem, Contact, Address, ArchivedOrder, ArchivedOrderItem
+from .serializers import (
+    OrderSerializer, CartItemSerializer, CartBatchSerializer, AddressSerializer, BulkStatusChangeSerializer,
+    ArchivedOrderSerializer,
+)
+from .cart_store import get_cart_store
+from .pagination import OrderCursorPagination
+from .stock import reserve_stock, InsufficientStock
+from .state_machine import bulk_transition, TransitionConflict
+from . import outbox, stats
 from products.models import Product
-from django.core.mail import send_mail
-from drf_spectacular.utils import extend_schema
+from retail_automation.conditional import ConditionalGetMixin
+from retail_automation.flat_serializers import FlatListMixin, get_flat_serializer
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+
+
+def order_items_prefetch(item_model=OrderItem):
+    """Позиции заказов вместе с названиями товаров — один запрос на все заказы страницы."""
+    return Prefetch(
+        'items',
+        queryset=item_model.objects.select_related('product').only(
+            'id', 'order', 'quantity', 'price', 'product__id', 'product__name'
+        ),
+    )
+
+
+def get_archived_order_or_404(pk, **filters):
+    """Архивный заказ с позициями (orders/archive.py)."""
+    queryset = ArchivedOrder.objects.prefetch_related(order_items_prefetch(ArchivedOrderItem))
+    try:
+        return get_object_or_404(queryset, pk=pk, **filters)
+    except (TypeError, ValueError):
+        raise Http404
+
+
+def serialize_cart_items(user):
+    """Позиции корзины пользователя с названиями товаров: один запрос, плоский сериализатор."""
+    flat = get_flat_serializer(CartItemSerializer)
+    return flat.serialize(CartItem.objects.filter(cart__user=user).values_list(*flat.lookups))
+
 
+class StatusConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'Статус заказа изменился, повторите запрос.'
+    default_code = 'conflict'
 
-class OrderViewSet(viewsets.ModelViewSet):
+
+class OrderViewSet(ConditionalGetMixin, FlatListMixin, viewsets.ModelViewSet):
     # Определяем доступные методы для заказов
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated]  # Только авторизованные пользователи
+    pagination_class = OrderCursorPagination
+
+    def get_queryset(self):
+        return super().get_queryset().prefetch_related(order_items_prefetch())
+
+    @cached_property
+    def orders_version(self):
+        """
+        Отметка изменения заказов, которые отдаст действие: (updated_at, строка для ETag).
+        None — заказа нет или он чужой: ответ 404/403 формируется как обычно.
+        """
+        user_id = self.request.user.id
+        if self.action == 'list':
+            # Количество в теге ловит удаление заказов и перенос в архив, максимум updated_at — любое изменение
+            model, prefix = (ArchivedOrder, 'archived-orders') if self.archived else (Order, 'orders')
+            state = model.objects.filter(user_id=user_id).aggregate(updated_at=Max('updated_at'), count=Count('id'))
+            stamp = state['updated_at'].timestamp() if state['updated_at'] else 0
+            return state['updated_at'], f"{prefix}-{user_id}-{state['count']}-{stamp}"
+        try:
+            for model in (Order, ArchivedOrder):
+                updated_at = model.objects.filter(user_id=user_id, pk=self.kwargs['pk']).values_list(
+                    'updated_at', flat=True
+                ).first()
+                if updated_at is not None:
+                    break
+        except (TypeError, ValueError):
+            return None
+        if updated_at is None:
+            return None
+        return updated_at, f"order-{user_id}-{self.kwargs['pk']}-{updated_at.timestamp()}"
+
+    def get_etag(self, request):
+        return self.orders_version and self.orders_version[1]
+
+    def get_last_modified(self, request):
+        return self.orders_version and self.orders_version[0]
 
     @extend_schema(
         responses={201: OrderSerializer}
@@ -25,18 +106,29 @@ class OrderViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         self.perform_create(serializer)
-        headers = self.get_success_headers(serializer.data)
-        return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
+        # Ответ — с позициями и названиями товаров двумя запросами, а не по запросу на позицию
+        order = Order.objects.prefetch_related(order_items_prefetch()).get(pk=serializer.instance.pk)
+        data = self.get_serializer(order).data
+        headers = self.get_success_headers(data)
+        return Response(data, status=status.HTTP_201_CREATED, headers=headers)
+
+    @cached_property
+    def archived(self):
+        """Список архивных заказов: ?archived=true."""
+        return self.request.query_params.get('archived', '').lower() in ('1', 'true')
+
+    def get_flat_serializer(self):
+        return get_flat_serializer(ArchivedOrderSerializer if self.archived else self.get_serializer_class())
 
     @extend_schema(
+        parameters=[OpenApiParameter('archived', bool, description='Архивные (старые завершённые) заказы')],
         responses={200: OrderSerializer(many=True)}
     )
     def list(self, request, *args, **kwargs):
         """Получение списка заказов текущего пользователя"""
         # Фильтруем заказы по текущему пользователю
-        queryset = self.filter_queryset(self.get_queryset().filter(user=request.user))
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        queryset = ArchivedOrder.objects.all() if self.archived else self.get_queryset()
+        return self.flat_list(self.filter_queryset(queryset.filter(user=request.user)))
 
     @extend_schema(
         responses={200: OrderSerializer}
@@ -44,11 +136,17 @@ class OrderViewSet(viewsets.ModelViewSet):
     def retrieve(self, request, *args, **kwargs):
         """Получение деталей заказа по ID"""
         # Получаем заказ по pk, проверяя принадлежность к текущему пользователю
-        order = self.get_object()
-        if order.user != request.user:
+        try:
+            order = self.get_object()
+            serializer_class = self.get_serializer_class()
+        except Http404:
+            # Заказа нет в рабочей таблице — возможно, он уже перенесён в архив
+            order = get_archived_order_or_404(kwargs[self.lookup_field])
+            serializer_class = ArchivedOrderSerializer
+        if order.user_id != request.user.id:
             return Response({'error': 'Вы не можете просматривать этот заказ.'}, status=status.HTTP_403_FORBIDDEN)
 
-        serializer = self.get_serializer(order)
+        serializer = serializer_class(order, context=self.get_serializer_context())
         return Response(serializer.data)
 
     @extend_schema(
@@ -69,60 +167,100 @@ class OrderViewSet(viewsets.ModelViewSet):
             return Response({'error': 'Некорректный статус.'}, status=400)
 
         try:
-            order.change_status(new_status)
+            order.change_status(new_status, reason='api')
+        except TransitionConflict as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
         except ValueError as e:
             return Response({'error': str(e)}, status=400)
 
         return Response({'message': 'Статус успешно обновлен.', 'status': order.status})
 
-    def send_order_confirmation_email(self, order):
-        subject = f"Подтверждение заказа №{order.id}"
-        details = f"Товары в заказе: {', '.join([item.product.name for item in order.items.all()])}, Общая сумма: {order.total_amount}"
-        message = f"Ваш заказ №{order.id} успешно подтвержден. Данные заказа: {details}"
-        recipient = order.contact.email
-        send_mail(subject, message, 'no-reply@example.com', [recipient])
+    @extend_schema(
+        request=BulkStatusChangeSerializer,
+    )
+    @action(detail=False, methods=['post'], url_path='bulk-change-status', permission_classes=[IsAdminUser])
+    def bulk_change_status(self, request):
+        """Массовая смена статуса, например все собранные заказы машины → отправлены"""
+        serializer = BulkStatusChangeSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = bulk_transition(serializer.validated_data['ids'], serializer.validated_data['status'], reason='api')
+        return Response({
+            'changed': sum(1 for result in results.values() if result == 'changed'),
+            'results': [{'id': order_id, 'result': result} for order_id, result in results.items()],
+        })
+
+    @action(detail=False, methods=['get'])
+    def summary(self, request):
+        """Количество заказов и суммы по статусам для текущего пользователя"""
+        return Response(stats.get_summary(request.user))
+
+    def perform_update(self, serializer):
+        try:
+            serializer.save()
+        except TransitionConflict as e:
+            raise StatusConflict(str(e))
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            stats.record_deleted([instance])
+            instance.delete()
 
     @extend_schema(
         responses={201: OrderSerializer}
     )
     def create_from_cart(self, request):
         """Создание заказа на основе корзины"""
-        cart = Cart.objects.filter(user=request.user).first()
-        if not cart or not cart.items.exists():
-            return Response({'error': 'Корзина пуста'}, status=status.HTTP_400_BAD_REQUEST)
-
-        contact_id = request.data.get('contact_id')
-        try:
-            contact = Contact.objects.get(id=contact_id, user=request.user)
-        except Contact.DoesNotExist:
-            return Response({'error': 'Контакт не найден'}, status=status.HTTP_404_NOT_FOUND)
-
-        # Создаем заказ
-        order = Order.objects.create(user=request.user, contact=contact, status='new')
-
-        # Переносим элементы корзины в заказ
-        total_amount = 0
-        for cart_item in cart.items.all():
-            order_item = OrderItem.objects.create(
-                order=order,
-                product=cart_item.product,
-                quantity=cart_item.quantity,
-                price=cart_item.product.price
+        store = get_cart_store()
+        with transaction.atomic():
+            # Позиции берутся из хранилища корзин, товары — одним запросом
+            lines = store.lines(request.user.id)
+            products = Product.objects.filter(id__in=list(lines)).only('id', 'name', 'price').order_by('id')
+            cart_lines = [(product, lines[product.id]) for product in products]
+            if not cart_lines:
+                return Response({'error': 'Корзина пуста'}, status=status.HTTP_400_BAD_REQUEST)
+
+            contact_id = request.data.get('contact_id')
+            try:
+                contact = Contact.objects.get(id=contact_id, user=request.user)
+            except Contact.DoesNotExist:
+                return Response({'error': 'Контакт не найден'}, status=status.HTTP_404_NOT_FOUND)
+
+            try:
+                reserve_stock((product.id, quantity) for product, quantity in cart_lines)
+            except InsufficientStock as e:
+                return Response({'error': str(e), 'products': e.product_ids}, status=status.HTTP_409_CONFLICT)
+
+            # Цены фиксируются на момент заказа, сумма считается за один проход
+            total_amount = sum(product.price * quantity for product, quantity in cart_lines)
+            order = Order.objects.create(
+                user=request.user, contact=contact, status='new', total_amount=total_amount, stock_reserved=True
             )
-            total_amount += order_item.quantity * order_item.price
+            stats.record_created([order])
+
+            # Переносим элементы корзины в заказ
+            OrderItem.objects.bulk_create([
+                OrderItem(order=order, product=product, quantity=quantity, price=product.price)
+                for product, quantity in cart_lines
+            ])
 
-        order.total_amount = total_amount
-        order.save()
+            # Очищаем корзину
+            store.clear(request.user.id, {product.id: quantity for product, quantity in cart_lines})
 
-        # Очищаем корзину
-        cart.items.all().delete()
+            # Письмо с подтверждением отправит relay_outbox: событие фиксируется вместе с заказом
+            outbox.publish('order.created', f'order.created:{order.id}', {'order_id': order.id})
 
+        order = Order.objects.prefetch_related(order_items_prefetch()).get(pk=order.pk)
         serializer = OrderSerializer(order)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-        # Отправляем письмо с подтверждением заказа
-        self.send_order_confirmation_email(order)
 
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+def parse_quantity(value):
+    """Количество товара из запроса: целое положительное число или None."""
+    try:
+        quantity = int(value)
+    except (TypeError, ValueError):
+        return None
+    return quantity if quantity > 0 else None
 
 
 class CartView(APIView):
@@ -133,10 +271,16 @@ class CartView(APIView):
     )
     def get(self, request):
         """Получение текущей корзины пользователя"""
-        cart = get_object_or_404(Cart, user=request.user)
-        cart_items = CartItem.objects.filter(cart=cart)
-        serializer = CartItemSerializer(cart_items, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        # Позиции отдаются с id строк БД, поэтому сначала переносим туда отложенные изменения
+        get_cart_store().flush(request.user.id)
+        get_object_or_404(Cart, user=request.user)
+        return Response(serialize_cart_items(request.user), status=status.HTTP_200_OK)
+
+
+def get_cart_item(user, pk):
+    """Позиция корзины пользователя по id строки в БД."""
+    get_cart_store().flush(user.id)
+    return get_object_or_404(CartItem.objects.only('id', 'product_id'), pk=pk, cart__user=user)
 
 
 class AddToCartView(APIView):
@@ -147,23 +291,40 @@ class AddToCartView(APIView):
     )
     def post(self, request):
         """Добавление товара в корзину"""
-        user = request.user
         product_id = request.data.get('product_id')
-        quantity = request.data.get('quantity', 1)
-
-        product = get_object_or_404(Product, id=product_id)
+        quantity = parse_quantity(request.data.get('quantity', 1))
+        if quantity is None:
+            return Response({'error': 'Invalid quantity'}, status=status.HTTP_400_BAD_REQUEST)
 
-        cart, _ = Cart.objects.get_or_create(user=user)
-        cart_item, created = CartItem.objects.get_or_create(cart=cart, product=product)
-        if not created:
-            cart_item.quantity += int(quantity)
-        else:
-            cart_item.quantity = int(quantity)
-        cart_item.save()
+        product = get_object_or_404(Product.objects.only('id'), id=product_id)
+        get_cart_store().add(request.user.id, product.id, quantity)
 
         return Response({"message": "Продукт успешно добавлен в корзину."}, status=status.HTTP_201_CREATED)
 
 
+class CartBatchView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        request=CartBatchSerializer,
+        responses={200: CartItemSerializer(many=True)}
+    )
+    def post(self, request):
+        """Пакетное изменение корзины: список операций add/set/remove за один запрос"""
+        serializer = CartBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        store = get_cart_store()
+        store.apply(request.user.id, [
+            (operation['op'], operation['product_id'], operation.get('quantity'))
+            for operation in serializer.validated_data['operations']
+        ])
+
+        # Ответ — итоговая корзина в том же виде, что и GET /cart/
+        store.flush(request.user.id)
+        return Response(serialize_cart_items(request.user), status=status.HTTP_200_OK)
+
+
 class CartItemUpdateDeleteView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -172,13 +333,12 @@ class CartItemUpdateDeleteView(APIView):
     )
     def patch(self, request, pk):
         """Обновление количества товара в корзине"""
-        cart_item = get_object_or_404(CartItem, pk=pk, cart__user=request.user)
-        quantity = request.data.get('quantity')
-        if quantity is None or int(quantity) <= 0:
+        cart_item = get_cart_item(request.user, pk)
+        quantity = parse_quantity(request.data.get('quantity'))
+        if quantity is None:
             return Response({'error': 'Invalid quantity'}, status=status.HTTP_400_BAD_REQUEST)
 
-        cart_item.quantity = quantity
-        cart_item.save()
+        get_cart_store().set(request.user.id, cart_item.product_id, quantity)
 
         return Response({'message': 'Item quantity updated'}, status=status.HTTP_200_OK)
 
@@ -187,8 +347,8 @@ class CartItemUpdateDeleteView(APIView):
     )
     def delete(self, request, pk):
         """Удаление товара из корзины"""
-        cart_item = get_object_or_404(CartItem, pk=pk, cart__user=request.user)
-        cart_item.delete()
+        cart_item = get_cart_item(request.user, pk)
+        get_cart_store().remove(request.user.id, [cart_item.product_id])
         return Response({'message': 'Item removed from cart'}, status=status.HTTP_204_NO_CONTENT)
 
 
@@ -199,9 +359,8 @@ class RemoveFromCartView(APIView):
         responses={200: None}
     )
     def delete(self, request, item_id):
-        user = request.user
-        cart_item = get_object_or_404(CartItem, id=item_id, cart__user=user)
-        cart_item.delete()
+        cart_item = get_cart_item(request.user, item_id)
+        get_cart_store().remove(request.user.id, [cart_item.product_id])
         return Response({"message": "Продукт успешно удален из корзины."}, status=status.HTTP_200_OK)
 
 
@@ -213,7 +372,10 @@ class OrderDetailView(APIView):
     )
     def get(self, request, pk):
         """Получение информации о заказе"""
-        order = get_object_or_404(Order, pk=pk, user=request.user)
+        order = Order.objects.prefetch_related(order_items_prefetch()).filter(pk=pk, user=request.user).first()
+        if order is None:
+            order = get_archived_order_or_404(pk, user=request.user)
+            return Response(ArchivedOrderSerializer(order).data, status=status.HTTP_200_OK)
         serializer = OrderSerializer(order)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -243,6 +405,7 @@ class AddressViewSet(viewsets.ModelViewSet):
     def destroy(self, request, *args, **kwargs):
         # Проверяем, что адрес принадлежит текущему пользователю
         address = self.get_object()
-        if address.user != request.user:
+        if address.user_id != request.user.id:
             return Response({"error": "You cannot delete this address."}, status=status.HTTP_403_FORBIDDEN)
-        return super().destroy(request, *args, **kwargs)
+        self.perform_destroy(address)
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ProductsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'products'
+
+    def ready(self):
+        # Подключаем обработчики сигналов (синхронизация поискового индекса)
+        from . import signals  # noqa: F401
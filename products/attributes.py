@@ -0,0 +1,51 @@
+import json
+from django.db import transaction
+from .models import ProductAttribute
+
+PARAM_PREFIX = 'param.'
+
+
+def attribute_value(value):
+    """Строковое представление значения параметра, как его ожидают в запросе."""
+    return value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+
+
+def iter_attributes(parameters, prefix=''):
+    """Разворачивает parameters в пары (ключ, значение); вложенные словари — через точку, списки — по элементу."""
+    for key, value in (parameters or {}).items():
+        key = f'{prefix}{key}'
+        if isinstance(value, dict):
+            yield from iter_attributes(value, prefix=f'{key}.')
+        elif isinstance(value, (list, tuple)):
+            for item in value:
+                yield key, attribute_value(item)
+        else:
+            yield key, attribute_value(value)
+
+
+def sync_attributes(products, model=ProductAttribute):
+    """Перезаписывает строки параметров для переданных товаров (нужны id и parameters)."""
+    products = list(products)
+    if not products:
+        return
+    rows = [
+        model(product_id=product.id, key=key[:100], value=value[:255])
+        for product in products
+        for key, value in set(iter_attributes(product.parameters))
+    ]
+    with transaction.atomic(using=model.objects.db):
+        model.objects.filter(product_id__in=[product.id for product in products]).delete()
+        model.objects.bulk_create(rows, batch_size=1000)
+
+
+def filter_by_attributes(queryset, query_params):
+    """
+    Применяет фильтры вида ?param.color=red&param.memory=128GB.
+    Несколько значений одного ключа объединяются через ИЛИ, разные ключи — через И.
+    """
+    for name, values in query_params.lists():
+        if not name.startswith(PARAM_PREFIX) or not name[len(PARAM_PREFIX):]:
+            continue
+        matching = ProductAttribute.objects.filter(key=name[len(PARAM_PREFIX):], value__in=values)
+        queryset = queryset.filter(id__in=matching.values('product_id'))
+    return queryset
@@ -0,0 +1,118 @@
+import threading
+import time
+from collections import Counter
+from cacheops import invalidate_model, invalidate_obj
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from .models import Product
+
+CATALOG_VERSION_KEY = 'products:catalog_version'
+# Остатки меняются при каждом заказе, поэтому у них своя версия: она входит в ETag списка
+# и карточки товара (там есть quantity), но не в ключи кэша фасетов
+STOCK_VERSION_KEY = 'products:stock_version'
+
+
+def _get_version(key):
+    version = cache.get(key)
+    if version is None:
+        # Начальное значение от времени, чтобы после сброса кэша не совпасть со старыми ключами
+        cache.add(key, int(time.time() * 1000), None)
+        version = cache.get(key)
+    return version
+
+
+def _bump_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        _get_version(key)
+
+
+def get_catalog_version():
+    """Текущая версия каталога: меняется при любой записи в товары и категории."""
+    return _get_version(CATALOG_VERSION_KEY)
+
+
+def bump_catalog_version():
+    """Инвалидирует всё, что закэшировано под текущей версией каталога."""
+    _bump_version(CATALOG_VERSION_KEY)
+
+
+def bump_catalog_version_on_commit():
+    """Меняет версию после фиксации транзакции, чтобы кэш не заполнился незакоммиченными данными."""
+    transaction.on_commit(bump_catalog_version)
+
+
+def get_stock_version():
+    """Версия остатков: меняется при списании и возврате товаров (orders/stock.py)."""
+    return _get_version(STOCK_VERSION_KEY)
+
+
+def bump_stock_version_on_commit():
+    transaction.on_commit(lambda: _bump_version(STOCK_VERSION_KEY))
+
+
+def invalidate_products(products=None):
+    """
+    Сбрасывает кэш запросов (cacheops) по товарам после записей в обход сигналов:
+    UPDATE по queryset и bulk_update. Без аргумента — по всей таблице товаров.
+    """
+    if products is None:
+        invalidate_model(Product)
+    else:
+        for product in products:
+            invalidate_obj(product)
+
+
+QUERY_CACHE_STATS_KEY = 'querycache:{label}:{outcome}'
+QUERY_CACHE_FLUSH_EVERY = 100
+
+_query_cache_reads = Counter()
+_query_cache_lock = threading.Lock()
+
+
+def count_query_cache_read(sender, func=None, hit=False, **kwargs):
+    """
+    Считает попадания и промахи кэша запросов по моделям. Счётчики копятся в памяти процесса
+    и уходят в общий кэш пачками, чтобы не добавлять запрос в Redis к каждому чтению.
+    """
+    label = sender._meta.label_lower if sender is not None else 'cached_as'
+    with _query_cache_lock:
+        _query_cache_reads[label, 'hits' if hit else 'misses'] += 1
+        if sum(_query_cache_reads.values()) < QUERY_CACHE_FLUSH_EVERY:
+            return
+    flush_query_cache_stats()
+
+
+def flush_query_cache_stats():
+    """Переносит накопленные в процессе счётчики в общий кэш."""
+    with _query_cache_lock:
+        pending = dict(_query_cache_reads)
+        _query_cache_reads.clear()
+    for (label, outcome), count in pending.items():
+        key = QUERY_CACHE_STATS_KEY.format(label=label, outcome=outcome)
+        cache.add(key, 0, None)
+        try:
+            cache.incr(key, count)
+        except ValueError:
+            # Ключ вытеснили между add и incr
+            cache.set(key, count, None)
+
+
+def get_query_cache_stats():
+    """Попадания, промахи и доля попаданий по кэшируемым моделям (settings.CACHEOPS)."""
+    flush_query_cache_stats()
+    labels = [label for label in settings.CACHEOPS if not label.endswith('*')] + ['cached_as']
+    keys = {
+        (label, outcome): QUERY_CACHE_STATS_KEY.format(label=label, outcome=outcome)
+        for label in labels for outcome in ('hits', 'misses')
+    }
+    values = cache.get_many(list(keys.values()))
+    stats = {}
+    for label in labels:
+        hits = values.get(keys[label, 'hits'], 0)
+        misses = values.get(keys[label, 'misses'], 0)
+        if hits or misses:
+            stats[label] = {'hits': hits, 'misses': misses, 'hit_rate': round(hits / (hits + misses), 3)}
+    return stats
@@ -0,0 +1,68 @@
+from collections import defaultdict
+from django.conf import settings
+from django.db.models import Case, When, Value, IntegerField, Count
+from .models import ProductAttribute
+
+
+def price_bucket_bounds():
+    """Границы ценовых диапазонов: [(min, max), ...], крайние открыты (None)."""
+    edges = list(getattr(settings, 'PRODUCT_FACET_PRICE_BUCKETS', [1000, 5000, 10000, 50000]))
+    return list(zip([None] + edges, edges + [None]))
+
+
+def compute_facets(queryset):
+    """
+    Счётчики для боковой панели каталога по отфильтрованному queryset.
+    Категории, поставщики и ценовые диапазоны считаются одним GROUP BY,
+    самые частые значения параметров — вторым.
+    """
+    bounds = price_bucket_bounds()
+    bucket = Case(
+        *[When(price__lt=upper, then=Value(index)) for index, (_, upper) in enumerate(bounds[:-1])],
+        default=Value(len(bounds) - 1),
+        output_field=IntegerField(),
+    )
+    groups = (
+        queryset.order_by()
+        .values('category_id', 'category__name', 'supplier', price_bucket=bucket)
+        .annotate(count=Count('id'))
+    )
+
+    total = 0
+    categories, suppliers, prices = defaultdict(int), defaultdict(int), [0] * len(bounds)
+    category_names = {}
+    for group in groups:
+        total += group['count']
+        categories[group['category_id']] += group['count']
+        category_names[group['category_id']] = group['category__name']
+        suppliers[group['supplier']] += group['count']
+        prices[group['price_bucket']] += group['count']
+
+    top_values = getattr(settings, 'PRODUCT_FACET_TOP_VALUES', 10)
+    parameters = defaultdict(list)
+    attribute_counts = (
+        ProductAttribute.objects.filter(product_id__in=queryset.order_by().values('id'))
+        .values('key', 'value')
+        .annotate(count=Count('product_id', distinct=True))
+        .order_by('key', '-count', 'value')
+    )
+    for row in attribute_counts:
+        if len(parameters[row['key']]) < top_values:
+            parameters[row['key']].append({'value': row['value'], 'count': row['count']})
+
+    return {
+        'total': total,
+        'categories': sorted(
+            ({'id': pk, 'name': category_names[pk], 'count': count} for pk, count in categories.items()),
+            key=lambda item: (-item['count'], item['name']),
+        ),
+        'suppliers': sorted(
+            ({'name': name, 'count': count} for name, count in suppliers.items()),
+            key=lambda item: (-item['count'], item['name']),
+        ),
+        'price': [
+            {'min': lower, 'max': upper, 'count': count}
+            for (lower, upper), count in zip(bounds, prices)
+        ],
+        'parameters': dict(parameters),
+    }
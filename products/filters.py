@@ -1,13 +1,52 @@
+from django.conf import settings
+from django.db.models import Case, When, Value, IntegerField
 from django_filters import rest_framework as filters
-from .models import Product
+from rest_framework.filters import SearchFilter
+from .models import Category, Product
+from .attributes import filter_by_attributes
+from .search import get_search_backend
+
 
 class ProductFilter(filters.FilterSet):
-    """Фильтры для модели Product"""
-    name = filters.CharFilter(lookup_expr='icontains')
-    category = filters.CharFilter(field_name='category__name', lookup_expr='icontains')
+    """Фильтры для модели Product (параметры товара — через ?param.<ключ>=<значение>)"""
+    name = filters.CharFilter(method='filter_name')
+    category = filters.CharFilter(method='filter_category')
     price_min = filters.NumberFilter(field_name='price', lookup_expr='gte')
     price_max = filters.NumberFilter(field_name='price', lookup_expr='lte')
 
     class Meta:
         model = Product
         fields = ['name', 'category', 'price_min', 'price_max']
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        return filter_by_attributes(queryset, self.data)
+
+    def filter_name(self, queryset, name, value):
+        # Поиск по названию идёт через индекс, а не через LIKE по всей таблице;
+        # как и в ?search=, в IN попадают не больше PRODUCT_SEARCH_LIMIT лучших совпадений
+        limit = getattr(settings, 'PRODUCT_SEARCH_LIMIT', 1000)
+        ids = get_search_backend().search(value, fields=('name',), limit=limit)
+        return queryset.filter(id__in=ids)
+
+    def filter_category(self, queryset, name, value):
+        # Категорий немного: подбираем их id, а товары фильтруем по индексу внешнего ключа
+        return queryset.filter(category_id__in=Category.objects.filter(name__icontains=value).values('id'))
+
+
+class ProductSearchFilter(SearchFilter):
+    """
+    Полнотекстовый поиск по ?search= через поисковый бэкенд.
+    Результаты упорядочиваются по релевантности (аннотация search_rank).
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return queryset
+        ids = get_search_backend().search(query, limit=getattr(settings, 'PRODUCT_SEARCH_LIMIT', 1000))
+        if not ids:
+            return queryset.none()
+        rank = Case(*[When(id=pk, then=Value(position)) for position, pk in enumerate(ids)],
+                    output_field=IntegerField())
+        return queryset.filter(id__in=ids).annotate(search_rank=rank)
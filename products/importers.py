@@ -0,0 +1,345 @@
+import json
+import os
+import tempfile
+import time
+import zlib
+import yaml
+from cacheops import no_invalidation
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from products.models import Category, Product
+from products.attributes import sync_attributes
+from products.cache import bump_catalog_version_on_commit, invalidate_products
+from products.search import get_search_backend
+
+# libyaml заметно быстрее чистого Python, но может отсутствовать в сборке PyYAML
+YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+def _compose(loader, anchors):
+    """Собирает узел YAML из потока событий (одно значение со всеми вложенными)."""
+    event = loader.get_event()
+    if isinstance(event, yaml.AliasEvent):
+        if event.anchor not in anchors:
+            raise yaml.composer.ComposerError(
+                None, None, f"found undefined alias {event.anchor!r}", event.start_mark
+            )
+        return anchors[event.anchor]
+
+    if isinstance(event, yaml.ScalarEvent):
+        tag = event.tag
+        if tag is None or tag == '!':
+            tag = loader.resolve(yaml.ScalarNode, event.value, event.implicit)
+        node = yaml.ScalarNode(tag, event.value, event.start_mark, event.end_mark, style=event.style)
+    elif isinstance(event, yaml.SequenceStartEvent):
+        tag = event.tag
+        if tag is None or tag == '!':
+            tag = loader.resolve(yaml.SequenceNode, None, event.implicit)
+        node = yaml.SequenceNode(tag, [], event.start_mark, None, flow_style=event.flow_style)
+    else:
+        tag = event.tag
+        if tag is None or tag == '!':
+            tag = loader.resolve(yaml.MappingNode, None, event.implicit)
+        node = yaml.MappingNode(tag, [], event.start_mark, None, flow_style=event.flow_style)
+
+    if event.anchor is not None:
+        anchors[event.anchor] = node
+
+    if isinstance(node, yaml.SequenceNode):
+        while not loader.check_event(yaml.SequenceEndEvent):
+            node.value.append(_compose(loader, anchors))
+        node.end_mark = loader.get_event().end_mark
+    elif isinstance(node, yaml.MappingNode):
+        while not loader.check_event(yaml.MappingEndEvent):
+            key = _compose(loader, anchors)
+            node.value.append((key, _compose(loader, anchors)))
+        node.end_mark = loader.get_event().end_mark
+    return node
+
+
+def _load_value(loader, anchors):
+    """Читает из потока одно значение и превращает его в объект Python."""
+    return loader.construct_document(_compose(loader, anchors))
+
+
+def _skip(loader):
+    """Пропускает значение целиком, не строя объектов."""
+    depth = 0
+    while True:
+        event = loader.get_event()
+        if isinstance(event, (yaml.SequenceStartEvent, yaml.MappingStartEvent)):
+            depth += 1
+        elif isinstance(event, (yaml.SequenceEndEvent, yaml.MappingEndEvent)):
+            depth -= 1
+        if depth == 0:
+            return
+
+
+def _iter_category(loader, anchors):
+    """Отдаёт пары (категория, товар) для одного элемента списка categories."""
+    loader.get_event()  # MappingStartEvent
+    name = None
+    pending = []  # товары, встреченные раньше ключа name
+    while not loader.check_event(yaml.MappingEndEvent):
+        key = _load_value(loader, anchors)
+        if key == 'name':
+            name = str(_load_value(loader, anchors))
+            for product_data in pending:
+                yield name, product_data
+            pending = []
+        elif key == 'products' and loader.check_event(yaml.SequenceStartEvent):
+            loader.get_event()
+            while not loader.check_event(yaml.SequenceEndEvent):
+                product_data = _load_value(loader, anchors)
+                if name is None:
+                    pending.append(product_data)
+                else:
+                    yield name, product_data
+            loader.get_event()
+        else:
+            _skip(loader)
+    loader.get_event()
+    if pending:
+        raise ValueError("Категория без названия содержит товары")
+
+
+def _normalize(product_data):
+    """
+    Приводит данные товара к типам JSON: YAML сам превращает значения вида 2023-01-01 в даты,
+    а параметры хранятся в JSONField. Обычный и параллельный импорт получают одно и то же.
+    """
+    return json.loads(json.dumps(product_data, cls=DjangoJSONEncoder))
+
+
+def iter_catalog(stream):
+    """
+    Потоково разбирает YAML-прайс и отдаёт пары (название категории, данные товара).
+    В памяти одновременно находится только один товар.
+    """
+    loader = YamlLoader(stream)
+    try:
+        anchors = {}
+        loader.get_event()  # StreamStartEvent
+        if loader.check_event(yaml.StreamEndEvent):
+            return
+        loader.get_event()  # DocumentStartEvent
+        if not loader.check_event(yaml.MappingStartEvent):
+            return
+        loader.get_event()
+        while not loader.check_event(yaml.MappingEndEvent):
+            key = _load_value(loader, anchors)
+            if key == 'categories' and loader.check_event(yaml.SequenceStartEvent):
+                loader.get_event()
+                while not loader.check_event(yaml.SequenceEndEvent):
+                    for category_name, product_data in _iter_category(loader, anchors):
+                        yield category_name, _normalize(product_data)
+                loader.get_event()
+            else:
+                _skip(loader)
+    finally:
+        loader.dispose()
+
+
+class CatalogImporter:
+    """
+    Импорт каталога пачками: товары копятся в чанк и записываются
+    через bulk_create/bulk_update, категории берутся из словаря name → id.
+
+    В дифференциальном режиме (delta=True) строки сравниваются с сохранённым
+    отпечатком content_hash: неизменённые товары не трогаются, а товары,
+    пропавшие из прайса, снимаются с продажи (quantity=0). Удалять их нельзя —
+    на них ссылаются позиции заказов.
+    """
+    update_fields = ['description', 'price', 'quantity', 'category', 'parameters', 'content_hash']
+
+    def __init__(self, chunk_size=None, progress=None, delta=False):
+        self.chunk_size = chunk_size or getattr(settings, 'PRODUCT_IMPORT_CHUNK_SIZE', 1000)
+        self.progress = progress
+        self.delta = delta
+        self.categories = {}
+        self.seen_names = set()
+        self.stats = {'categories': 0, 'rows': 0, 'created': 0, 'updated': 0, 'unchanged': 0, 'removed': 0}
+
+    def load_categories(self):
+        self.categories = dict(Category.objects.values_list('name', 'id'))
+
+    def category_id(self, name):
+        """Возвращает id категории, создавая её при первом упоминании."""
+        category_id = self.categories.get(name)
+        if category_id is None:
+            category, _ = Category.objects.get_or_create(name=name)
+            category_id = self.categories[name] = category.id
+        return category_id
+
+    def run(self, yaml_path):
+        """Импорт целого прайса в одном процессе."""
+        last_id = Product.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        with open(yaml_path, 'rb') as file:
+            self.run_rows(iter_catalog(file))
+        if self.delta:
+            self.remove_missing(last_id, self.seen_names)
+        return dict(self.stats)
+
+    def run_rows(self, rows):
+        """Импорт последовательности пар (категория, товар), например одного шарда."""
+        started = time.monotonic()
+        self.load_categories()
+        seen_categories = set()
+        chunk = {}
+        for category_name, product_data in rows:
+            seen_categories.add(category_name)
+            # Дубликаты внутри чанка схлопываются: побеждает последняя строка
+            chunk[product_data['name']] = (self.category_id(category_name), product_data)
+            self.stats['rows'] += 1
+            if len(chunk) >= self.chunk_size:
+                self.write_chunk(chunk)
+                chunk = {}
+                self.report(started)
+        if chunk:
+            self.write_chunk(chunk)
+
+        self.stats['categories'] = len(seen_categories)
+        self.report(started)
+        return dict(self.stats)
+
+    def report(self, started):
+        elapsed = time.monotonic() - started
+        self.stats['elapsed'] = round(elapsed, 3)
+        self.stats['rows_per_second'] = round(self.stats['rows'] / elapsed, 1) if elapsed else 0.0
+        if self.progress:
+            self.progress(dict(self.stats))
+
+    def build_product(self, name, category_id, product_data, parameters):
+        product = Product(
+            name=name,
+            description=product_data.get('description', ''),
+            price=product_data['price'],
+            quantity=product_data['quantity'],
+            category_id=category_id,
+            parameters=product_data.get('parameters', parameters) or {},
+        )
+        product.content_hash = product.compute_content_hash()
+        return product
+
+    def write_chunk(self, chunk):
+        """Записывает чанк: один SELECT по именам, затем пакетные INSERT и UPDATE."""
+        # Строки целиком: по прежнему состоянию обновлённых товаров сбрасывается кэш запросов
+        existing = {product.name: product for product in Product.objects.nocache().filter(name__in=list(chunk))}
+        to_create, to_update, replaced = [], [], []
+        if self.delta:
+            self.seen_names.update(chunk)
+        for name, (category_id, product_data) in chunk.items():
+            if name not in existing:
+                to_create.append(self.build_product(name, category_id, product_data, {}))
+                continue
+            old = existing[name]
+            # Параметры, которых нет в прайсе, сохраняются как есть
+            product = self.build_product(name, category_id, product_data, old.parameters)
+            if self.delta and product.content_hash == old.content_hash:
+                self.stats['unchanged'] += 1
+                continue
+            product.id = old.id
+            to_update.append(product)
+            replaced.append(old)
+
+        with transaction.atomic():
+            # Кэш запросов сбрасывается ниже, разом по всем записанным товарам
+            with no_invalidation:
+                if to_create:
+                    Product.objects.bulk_create(to_create, batch_size=self.chunk_size)
+                if to_update:
+                    Product.objects.bulk_update(to_update, self.update_fields, batch_size=500)
+            products = to_create + to_update
+            if products:
+                # id новых строк возвращает bulk_create (SQLite 3.35+, PostgreSQL); иначе — один SELECT по индексу
+                unsaved = {product.name: product for product in to_create if product.pk is None}
+                if unsaved:
+                    for name, product_id in Product.objects.nocache().filter(
+                        name__in=list(unsaved)
+                    ).values_list('name', 'id'):
+                        unsaved[name].pk = product_id
+                # bulk-операции не посылают сигналы, поэтому индекс, параметры и кэш обновляем явно
+                get_search_backend().index(products)
+                sync_attributes(products)
+                # Только по записанным товарам, старому и новому состоянию: кэш неизменённых остаётся
+                invalidate_products(replaced + products)
+                bump_catalog_version_on_commit()
+
+        self.stats['created'] += len(to_create)
+        self.stats['updated'] += len(to_update)
+
+    def remove_missing(self, last_id, names):
+        """
+        Снимает с продажи товары, которых нет среди names.
+        Рассматриваются только товары, существовавшие до начала импорта (id <= last_id).
+        """
+        candidates = Product.objects.nocache().filter(id__lte=last_id, quantity__gt=0).values_list('id', 'name')
+        missing = [product_id for product_id, name in candidates.iterator(chunk_size=self.chunk_size)
+                   if name not in names]
+        for start in range(0, len(missing), self.chunk_size):
+            batch = missing[start:start + self.chunk_size]
+            # Сбрасываем отпечаток: при возвращении в прайс товар будет обновлён
+            self.stats['removed'] += Product.objects.filter(id__in=batch, quantity__gt=0).update(
+                quantity=0, content_hash=''
+            )
+        if missing:
+            invalidate_products()
+            bump_catalog_version_on_commit()
+        return self.stats['removed']
+
+
+def ensure_categories(names):
+    """
+    Идемпотентно создаёт категории и возвращает словарь name → id.
+    Уникальность name в БД гарантирует, что параллельные вызовы не создадут дублей.
+    """
+    Category.objects.bulk_create([Category(name=name) for name in names], ignore_conflicts=True)
+    bump_catalog_version_on_commit()
+    return dict(Category.objects.nocache().filter(name__in=list(names)).values_list('name', 'id'))
+
+
+def shard_of(name, shards):
+    """Номер шарда для товара: стабильный хэш ключа сопоставления (названия) в любом процессе."""
+    return zlib.crc32(name.encode('utf-8')) % shards
+
+
+def split_catalog(yaml_path, shards):
+    """
+    Разбивает прайс на shards шардов по хэшу названия товара (JSON Lines рядом с исходным файлом).
+    Все строки одного товара попадают в один шард в порядке прайса, поэтому параллельные шарды
+    не создадут один и тот же новый товар дважды, а из повторов, как и при обычном импорте,
+    побеждает последняя строка.
+
+    Шарды читаются воркерами по пути, поэтому каталог прайса должен быть общим для
+    координатора и всех воркеров Celery (один хост или общая файловая система).
+    Возвращает пути к непустым шардам, множество названий категорий и множество названий товаров.
+    """
+    directory = tempfile.mkdtemp(prefix='import-', dir=os.path.dirname(os.path.abspath(yaml_path)))
+    files, categories, names = {}, set(), set()
+    try:
+        with open(yaml_path, 'rb') as file:
+            for category_name, product_data in iter_catalog(file):
+                number = shard_of(str(product_data['name']), shards)
+                shard = files.get(number)
+                if shard is None:
+                    path = os.path.join(directory, f'shard-{number:05d}.jsonl')
+                    shard = files[number] = open(path, 'w', encoding='utf-8')
+                categories.add(category_name)
+                names.add(product_data['name'])
+                shard.write(json.dumps([category_name, product_data], ensure_ascii=False))
+                shard.write('\n')
+    finally:
+        for shard in files.values():
+            shard.close()
+    if not files:
+        os.rmdir(directory)
+    return sorted(shard.name for shard in files.values()), categories, names
+
+
+def iter_shard(shard_path):
+    """Читает строки шарда, записанного split_catalog."""
+    with open(shard_path, encoding='utf-8') as file:
+        for line in file:
+            category_name, product_data = json.loads(line)
+            yield category_name, product_data
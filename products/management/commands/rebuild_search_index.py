@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from products.models import Product
+from products.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Полностью пересобирает поисковый индекс товаров"
+
+    def handle(self, *args, **options):
+        get_search_backend().rebuild(Product.objects.all())
+        self.stdout.write(self.style.SUCCESS("Поисковый индекс пересобран"))
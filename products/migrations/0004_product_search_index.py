@@ -0,0 +1,30 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    from products.search import SQLiteFTSBackend
+
+    backend = SQLiteFTSBackend(using=schema_editor.connection.alias)
+    backend.create_table()
+    backend.rebuild(apps.get_model('products', 'Product').objects.using(schema_editor.connection.alias))
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    from products.search import SQLiteFTSBackend
+
+    SQLiteFTSBackend(using=schema_editor.connection.alias).drop_table()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_product_content_hash'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
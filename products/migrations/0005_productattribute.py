@@ -0,0 +1,41 @@
+# Generated by Django 5.1.3 on 2026-10-18 15:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_attributes(apps, schema_editor):
+    from products.attributes import sync_attributes
+
+    Product = apps.get_model('products', 'Product')
+    ProductAttribute = apps.get_model('products', 'ProductAttribute')
+    chunk = []
+    for product in Product.objects.only('id', 'parameters').iterator(chunk_size=1000):
+        chunk.append(product)
+        if len(chunk) >= 1000:
+            sync_attributes(chunk, model=ProductAttribute)
+            chunk = []
+    sync_attributes(chunk, model=ProductAttribute)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_product_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductAttribute',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=100)),
+                ('value', models.CharField(max_length=255)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attributes', to='products.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['key', 'value', 'product'], name='product_attribute_lookup')],
+            },
+        ),
+        migrations.RunPython(fill_attributes, migrations.RunPython.noop),
+    ]
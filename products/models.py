@@ -1,5 +1,24 @@
+import hashlib
+import json
+from decimal import Decimal
 from django.db import models
 
+
+def product_fingerprint(price, quantity, description, category_id, parameters):
+    """Отпечаток содержимого товара: меняется только при изменении данных из прайса."""
+    payload = json.dumps(
+        [
+            str(Decimal(str(price)).quantize(Decimal('0.01'))),
+            int(quantity),
+            description or '',
+            category_id,
+            parameters or {},
+        ],
+        sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=str,
+    )
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+
 class Category(models.Model):
     name = models.CharField(max_length=100, unique=True)
 
@@ -8,7 +27,7 @@ class Category(models.Model):
         return self.name
 
 class Product(models.Model):
-    name = models.CharField(max_length=255)
+    name = models.CharField(max_length=255, db_index=True)  # Импорт прайса сопоставляет строки с товарами по названию
     description = models.TextField(blank=True)
     category = models.ForeignKey(Category, related_name='products', on_delete=models.CASCADE)
     supplier = models.CharField(max_length=100)
@@ -16,6 +35,33 @@ class Product(models.Model):
     quantity = models.PositiveIntegerField()
     parameters = models.JSONField(default=dict)
     image = models.ImageField(upload_to='product_images/', blank=True, null=True)  # Новое поле для изображения
+    content_hash = models.CharField(max_length=32, blank=True, editable=False)  # Отпечаток для дифференциального импорта
+
+    content_fields = ('price', 'quantity', 'description', 'category', 'parameters')
+
+    def compute_content_hash(self):
+        return product_fingerprint(self.price, self.quantity, self.description, self.category_id, self.parameters)
+
+    def save(self, *args, **kwargs):
+        self.content_hash = self.compute_content_hash()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and set(update_fields) & set(self.content_fields):
+            kwargs['update_fields'] = {*update_fields, 'content_hash'}
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return self.name
+
+class ProductAttribute(models.Model):
+    """Параметры товара в виде строк ключ—значение: по ним фильтрация идёт через индекс, а не разбор JSON."""
+    product = models.ForeignKey(Product, related_name='attributes', on_delete=models.CASCADE)
+    key = models.CharField(max_length=100)
+    value = models.CharField(max_length=255)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['key', 'value', 'product'], name='product_attribute_lookup'),
+        ]
 
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return f"{self.key}={self.value}"
@@ -0,0 +1,15 @@
+from rest_framework.pagination import CursorPagination
+
+
+class ProductCursorPagination(CursorPagination):
+    """Keyset-пагинация каталога по id: стоимость страницы не зависит от размера таблицы."""
+    ordering = 'id'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+    def get_ordering(self, request, queryset, view):
+        # Результаты поиска листаются в порядке релевантности (ранг уникален)
+        if 'search_rank' in queryset.query.annotations:
+            return ('search_rank',)
+        return super().get_ordering(request, queryset, view)
@@ -0,0 +1,123 @@
+from functools import lru_cache
+from django.conf import settings
+from django.db import connections
+from django.db.models import Q
+from django.utils.module_loading import import_string
+from .stemming import stem, tokenize, stem_text
+
+
+class BaseSearchBackend:
+    """Интерфейс поискового индекса товаров."""
+    fields = ('name', 'description')
+
+    def __init__(self, using='default'):
+        self.using = using
+
+    def index(self, products):
+        """Добавляет или обновляет товары в индексе."""
+
+    def remove(self, product_ids):
+        """Удаляет товары из индекса."""
+
+    def rebuild(self, queryset):
+        """Полностью пересобирает индекс по queryset."""
+
+    def search(self, query, fields=None, limit=None):
+        """Возвращает id подходящих товаров, самые релевантные — первыми."""
+        raise NotImplementedError
+
+
+class DatabaseSearchBackend(BaseSearchBackend):
+    """Запасной вариант без индекса: поиск через icontains."""
+
+    def search(self, query, fields=None, limit=None):
+        from .models import Product
+
+        condition = Q()
+        for term in tokenize(query):
+            term_condition = Q()
+            for field in fields or self.fields:
+                term_condition |= Q(**{f'{field}__icontains': term})
+            condition &= term_condition
+        ids = Product.objects.using(self.using).filter(condition).order_by('id').values_list('id', flat=True)
+        return list(ids[:limit] if limit else ids)
+
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    """
+    Инвертированный индекс на SQLite FTS5. В индекс пишется текст, приведённый
+    к основам слов, поэтому «смартфоны» находятся по запросу «смартфон».
+    """
+    table = 'products_product_fts'
+    # Вес совпадения в названии выше, чем в описании
+    weights = (10.0, 1.0)
+
+    @property
+    def connection(self):
+        return connections[self.using]
+
+    def create_table(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} "
+                f"USING fts5(name, description, tokenize = 'unicode61 remove_diacritics 2')"
+            )
+
+    def drop_table(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {self.table}")
+
+    def index(self, products):
+        rows = [(product.id, stem_text(product.name), stem_text(product.description)) for product in products]
+        if not rows:
+            return
+        with self.connection.cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {self.table} WHERE rowid = %s", [(row[0],) for row in rows])
+            cursor.executemany(f"INSERT INTO {self.table} (rowid, name, description) VALUES (%s, %s, %s)", rows)
+
+    def remove(self, product_ids):
+        with self.connection.cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {self.table} WHERE rowid = %s", [(pk,) for pk in product_ids])
+
+    def rebuild(self, queryset, chunk_size=1000):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+        chunk = []
+        for product in queryset.only('id', 'name', 'description').iterator(chunk_size=chunk_size):
+            chunk.append(product)
+            if len(chunk) >= chunk_size:
+                self.index(chunk)
+                chunk = []
+        self.index(chunk)
+
+    def build_match(self, query, fields=None):
+        """Запрос FTS5: каждый терм — по префиксу основы, термы объединяются через AND."""
+        terms = ' AND '.join(f'"{stem(token)}"*' for token in tokenize(query))
+        if not terms:
+            return None
+        if fields:
+            return f"{{{' '.join(fields)}}} : ({terms})"
+        return terms
+
+    def search(self, query, fields=None, limit=None):
+        match = self.build_match(query, fields)
+        if match is None:
+            return []
+        sql = (
+            f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s "
+            f"ORDER BY bm25({self.table}, {', '.join(str(weight) for weight in self.weights)})"
+        )
+        params = [match]
+        if limit:
+            sql += " LIMIT %s"
+            params.append(limit)
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [row[0] for row in cursor.fetchall()]
+
+
+@lru_cache(maxsize=None)
+def get_search_backend():
+    """Поисковый бэкенд из настройки PRODUCT_SEARCH_BACKEND."""
+    backend_path = getattr(settings, 'PRODUCT_SEARCH_BACKEND', 'products.search.DatabaseSearchBackend')
+    return import_string(backend_path)()
@@ -13,3 +13,10 @@ class ProductSerializer(serializers.ModelSerializer):
     class Meta:
         model = Product
         fields = ['id', 'name', 'description', 'category', 'category_name', 'supplier', 'price', 'quantity', 'parameters', 'image']
+
+    def __init__(self, *args, fields=None, **kwargs):
+        # fields — необязательная проекция: оставляем только перечисленные поля
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
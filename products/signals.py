@@ -0,0 +1,32 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from cacheops.signals import cache_read
+from .models import Category, Product
+from .attributes import sync_attributes
+from .cache import bump_catalog_version_on_commit, count_query_cache_read
+from .search import get_search_backend
+
+
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, update_fields=None, **kwargs):
+    """Обновляет товар в поисковом индексе и таблице параметров после сохранения."""
+    get_search_backend().index([instance])
+    if update_fields is None or 'parameters' in update_fields:
+        sync_attributes([instance])
+    bump_catalog_version_on_commit()
+
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, instance, **kwargs):
+    """Удаляет товар из поискового индекса."""
+    get_search_backend().remove([instance.pk])
+    bump_catalog_version_on_commit()
+
+
+@receiver([post_save, post_delete], sender=Category)
+def category_changed(sender, **kwargs):
+    bump_catalog_version_on_commit()
+
+
+# Счётчики попаданий кэша запросов: GET /api/products/cache-stats/
+cache_read.connect(count_query_cache_read, dispatch_uid='products.count_query_cache_read')
@@ -0,0 +1,125 @@
+"""Русский стеммер (алгоритм Snowball) и разбиение текста на термы для поиска."""
+import re
+
+VOWELS = 'аеиоуыэюя'
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+CYRILLIC_RE = re.compile(r'[а-я]')
+
+
+def _by_length(*groups):
+    return tuple(sorted({suffix for group in groups for suffix in group}, key=len, reverse=True))
+
+
+# Окончания из группы 1 допустимы только после «а» или «я»
+PERFECTIVE_GERUND_1 = ('в', 'вши', 'вшись')
+PERFECTIVE_GERUND_2 = ('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись')
+ADJECTIVE = _by_length((
+    'ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем', 'им', 'ым', 'ом',
+    'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую', 'юю', 'ая', 'яя', 'ою', 'ею',
+))
+PARTICIPLE_1 = ('ем', 'нн', 'вш', 'ющ', 'щ')
+PARTICIPLE_2 = ('ивш', 'ывш', 'ующ')
+REFLEXIVE = _by_length(('ся', 'сь'))
+VERB_1 = ('ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но', 'ет', 'ют', 'ны', 'ть', 'ешь', 'нно')
+VERB_2 = (
+    'ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей', 'уй', 'ил', 'ыл', 'им', 'ым', 'ен',
+    'ило', 'ыло', 'ено', 'ят', 'ует', 'уют', 'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю',
+)
+NOUN = _by_length((
+    'а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии', 'и', 'ией', 'ей', 'ой', 'ий', 'й',
+    'иям', 'ям', 'ием', 'ем', 'ам', 'ом', 'о', 'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю', 'ия', 'ья', 'я',
+))
+SUPERLATIVE = _by_length(('ейше', 'ейш'))
+DERIVATIONAL = _by_length(('ость', 'ост'))
+
+
+def _regions(word):
+    """Возвращает начала областей RV и R2 по правилам Snowball."""
+    rv = len(word)
+    for index, letter in enumerate(word):
+        if letter in VOWELS:
+            rv = index + 1
+            break
+
+    def after_syllable(start):
+        for index in range(start + 1, len(word)):
+            if word[index] not in VOWELS and word[index - 1] in VOWELS:
+                return index + 1
+        return len(word)
+
+    r1 = after_syllable(0)
+    return rv, after_syllable(r1)
+
+
+def _strip(word, start, suffixes):
+    """Отрезает самое длинное окончание из suffixes, целиком лежащее в области start."""
+    for suffix in suffixes:
+        if word.endswith(suffix) and len(word) - len(suffix) >= start:
+            return word[:-len(suffix)]
+    return None
+
+
+def _strip_grouped(word, start, group1, group2):
+    """Как _strip, но окончания group1 засчитываются только после «а»/«я» внутри области."""
+    for suffix in _by_length(group1, group2):
+        if not word.endswith(suffix) or len(word) - len(suffix) < start:
+            continue
+        if suffix in group2:
+            return word[:-len(suffix)]
+        stem = word[:-len(suffix)]
+        if len(stem) - 1 >= start and stem[-1] in 'ая':
+            return stem
+    return None
+
+
+def stem(word):
+    """Основа русского слова; слова не на кириллице возвращаются без изменений."""
+    word = word.lower().replace('ё', 'е')
+    if not CYRILLIC_RE.search(word):
+        return word
+    rv, r2 = _regions(word)
+
+    # Шаг 1
+    stripped = _strip_grouped(word, rv, PERFECTIVE_GERUND_1, PERFECTIVE_GERUND_2)
+    if stripped is not None:
+        word = stripped
+    else:
+        word = _strip(word, rv, REFLEXIVE) or word
+        stripped = _strip(word, rv, ADJECTIVE)
+        if stripped is not None:
+            word = _strip_grouped(stripped, rv, PARTICIPLE_1, PARTICIPLE_2) or stripped
+        else:
+            stripped = _strip_grouped(word, rv, VERB_1, VERB_2)
+            if stripped is None:
+                stripped = _strip(word, rv, NOUN)
+            if stripped is not None:
+                word = stripped
+
+    # Шаг 2
+    if word.endswith('и') and len(word) - 1 >= rv:
+        word = word[:-1]
+
+    # Шаг 3
+    word = _strip(word, r2, DERIVATIONAL) or word
+
+    # Шаг 4
+    if word.endswith('нн') and len(word) - 2 >= rv:
+        return word[:-1]
+    stripped = _strip(word, rv, SUPERLATIVE)
+    if stripped is not None:
+        word = stripped
+        if word.endswith('нн') and len(word) - 2 >= rv:
+            word = word[:-1]
+    elif word.endswith('ь') and len(word) - 1 >= rv:
+        word = word[:-1]
+    return word
+
+
+def tokenize(text):
+    """Разбивает текст на термы в нижнем регистре."""
+    return TOKEN_RE.findall((text or '').lower())
+
+
+def stem_text(text):
+    """Текст, приведённый к основам слов, — в таком виде он хранится в индексе."""
+    return ' '.join(stem(token) for token in tokenize(text))
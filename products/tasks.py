@@ -1,34 +1,80 @@
-import yaml
-from celery import shared_task
-from products.models import Category, Product
+from celery import shared_task, chord
+from django.conf import settings
+from products.importers import CatalogImporter, ensure_categories, split_catalog, iter_shard
+from products.models import Product
 from PIL import Image
 from io import BytesIO
 from django.core.files.uploadedfile import InMemoryUploadedFile
 import os
+import time
+
+
+@shared_task(bind=True)
+def import_products_from_yaml(self, yaml_path, chunk_size=None, delta=False):
+    """
+    Асинхронная задача для импорта товаров из YAML (потоково, пачками).
+    При delta=True записываются только новые, изменённые и пропавшие из прайса товары.
+    """
+    def progress(stats):
+        # Прогресс виден в результате задачи, пока импорт идёт
+        if self.request.id:
+            self.update_state(state='PROGRESS', meta=stats)
+
+    stats = CatalogImporter(chunk_size=chunk_size, progress=progress, delta=delta).run(yaml_path)
+    return {"status": "success", "message": "Товары успешно импортированы", **stats}
+
+
+@shared_task
+def import_products_sharded(yaml_path, shards=None, delta=False):
+    """
+    Координатор параллельного импорта: делит прайс на шарды по хэшу названия товара и раздаёт
+    их воркерам через chord, статистика шардов сводится в merge_import_stats.
+    Шарды пишутся рядом с прайсом: воркерам нужен доступ к этому каталогу (см. split_catalog).
+    """
+    started = time.time()
+    shards = shards or getattr(settings, 'PRODUCT_IMPORT_SHARDS', 8)
+    last_id = Product.objects.order_by('-id').values_list('id', flat=True).first() or 0
+    shards, categories, names = split_catalog(yaml_path, shards)
+    # Категории создаются заранее, чтобы шарды не соревновались за их вставку
+    ensure_categories(categories)
+
+    removed = 0
+    if delta:
+        removed = CatalogImporter(delta=True).remove_missing(last_id, names)
+
+    shard_dir = os.path.dirname(shards[0]) if shards else None
+    callback = merge_import_stats.s(removed=removed, started=started, shard_dir=shard_dir)
+    if not shards:
+        return callback.apply(args=([],)).get()
+    result = chord(import_catalog_shard.s(path, delta=delta) for path in shards)(callback)
+    return {"status": "started", "shards": len(shards), "result_id": result.id}
+
+
+@shared_task
+def import_catalog_shard(shard_path, delta=False):
+    """Импорт одного шарда, подготовленного import_products_sharded."""
+    stats = CatalogImporter(delta=delta).run_rows(iter_shard(shard_path))
+    os.remove(shard_path)
+    return stats
 
 
 @shared_task
-def import_products_from_yaml(yaml_path):
-    """Асинхронная задача для импорта товаров из YAML."""
-    with open(yaml_path, 'r', encoding='utf-8') as file:
-        data = yaml.safe_load(file)
-
-    for category_data in data.get('categories', []):
-        # Создаём или получаем категорию
-        category, _ = Category.objects.get_or_create(name=category_data['name'])
-
-        # Добавляем товары в категорию
-        for product_data in category_data.get('products', []):
-            Product.objects.update_or_create(
-                name=product_data['name'],
-                defaults={
-                    'description': product_data.get('description', ''),
-                    'price': product_data['price'],
-                    'quantity': product_data['quantity'],
-                    'category': category
-                }
-            )
-    return {"status": "success", "message": "Товары успешно импортированы"}
+def merge_import_stats(results, removed=0, started=None, shard_dir=None):
+    """Сводит статистику шардов в итог импорта."""
+    totals = {'shards': len(results), 'rows': 0, 'created': 0, 'updated': 0, 'unchanged': 0, 'removed': removed}
+    for stats in results:
+        for key in ('rows', 'created', 'updated', 'unchanged'):
+            totals[key] += stats.get(key, 0)
+    if started is not None:
+        elapsed = time.time() - started
+        totals['elapsed'] = round(elapsed, 3)
+        totals['rows_per_second'] = round(totals['rows'] / elapsed, 1) if elapsed else 0.0
+    if shard_dir:
+        try:
+            os.rmdir(shard_dir)
+        except OSError:
+            pass
+    return {"status": "success", "message": "Товары успешно импортированы", **totals}
 
 
 @shared_task
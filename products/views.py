@@ -1,6 +1,10 @@
+import hashlib
+from urllib.parse import urlencode
+from django.conf import settings
+from django.core.cache import cache
 from rest_framework import viewsets, status
+from rest_framework.decorators import action
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import SearchFilter
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAdminUser, AllowAny
@@ -8,28 +12,131 @@ from rest_framework.exceptions import APIException
 from drf_spectacular.utils import extend_schema
 from .models import Category, Product
 from .serializers import CategorySerializer, ProductSerializer
-from .filters import ProductFilter
+from .filters import ProductFilter, ProductSearchFilter
+from .pagination import ProductCursorPagination
+from .cache import get_catalog_version, get_query_cache_stats, get_stock_version
+from .facets import compute_facets
+from retail_automation.conditional import ConditionalGetMixin
+from retail_automation.flat_serializers import FlatListMixin, get_flat_serializer
 from rest_framework.permissions import IsAuthenticated
-from products.tasks import import_products_from_yaml
+from products.tasks import import_products_from_yaml, import_products_sharded
 from .tasks import create_product_thumbnail
 import time
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class CatalogConditionalMixin(ConditionalGetMixin):
+    """ETag по версии каталога: она меняется при любой записи в товары и категории, включая импорт."""
+
+    def get_etag(self, request):
+        return f'catalog-{get_catalog_version()}'
+
+
+class ProductConditionalMixin(CatalogConditionalMixin):
+    """Список и карточка товара содержат quantity, поэтому их ETag учитывает и версию остатков."""
+    stock_actions = ('list', 'retrieve')
+
+    def get_etag(self, request):
+        etag = super().get_etag(request)
+        if self.action in self.stock_actions:
+            etag = f'{etag}-stock-{get_stock_version()}'
+        return etag
+
+
+class CategoryViewSet(CatalogConditionalMixin, viewsets.ModelViewSet):
     """CRUD для категорий"""
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [IsAuthenticated]
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(ProductConditionalMixin, FlatListMixin, viewsets.ModelViewSet):
     """CRUD для продуктов"""
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, SearchFilter]
+    conditional_actions = ('list', 'retrieve', 'facets')
+    filter_backends = [DjangoFilterBackend, ProductSearchFilter]
     filterset_class = ProductFilter
     search_fields = ['name', 'description']
+    pagination_class = ProductCursorPagination
     http_method_names = ['get', 'post', 'put', 'delete']
 
+    # Облегчённое представление для списка; остальные поля — через ?fields=.
+    # Список читается через .values() только по нужным колонкам (FlatListMixin)
+    list_fields = ['id', 'name', 'category', 'category_name', 'supplier', 'price', 'quantity', 'image']
+
+    def get_list_fields(self):
+        requested = self.request.query_params.get('fields')
+        if not requested:
+            return self.list_fields
+        allowed = ProductSerializer.Meta.fields
+        fields = [name for name in requested.split(',') if name in allowed]
+        return fields or self.list_fields
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action != 'list':
+            return queryset.select_related('category')
+        return queryset
+
+    def get_flat_serializer(self):
+        return get_flat_serializer(ProductSerializer, tuple(sorted(self.get_list_fields())))
+
+    def get_serializer(self, *args, **kwargs):
+        if self.action == 'list':
+            kwargs.setdefault('fields', self.get_list_fields())
+        return super().get_serializer(*args, **kwargs)
+
+    @extend_schema(
+        responses={
+            200: {
+                "type": "object",
+                "properties": {
+                    "total": {"type": "integer"},
+                    "categories": {"type": "array", "items": {"type": "object"}},
+                    "suppliers": {"type": "array", "items": {"type": "object"}},
+                    "price": {"type": "array", "items": {"type": "object"}},
+                    "parameters": {"type": "object"},
+                }
+            }
+        }
+    )
+    @action(detail=False, methods=['get'], pagination_class=None)
+    def facets(self, request):
+        """Счётчики по категориям, поставщикам, ценам и параметрам для текущих фильтров"""
+        # Параметры страницы и проекции на счётчики не влияют
+        params = sorted(
+            (name, values) for name, values in request.query_params.lists()
+            if name not in ('cursor', 'page_size', 'fields')
+        )
+        signature = hashlib.sha1(urlencode(params, doseq=True).encode('utf-8')).hexdigest()
+        cache_key = f'products:facets:{get_catalog_version()}:{signature}'
+
+        data = cache.get(cache_key)
+        if data is None:
+            data = compute_facets(self.filter_queryset(Product.objects.all()))
+            cache.set(cache_key, data, getattr(settings, 'PRODUCT_FACETS_CACHE_TIMEOUT', 60 * 10))
+        return Response(data)
+
+    @extend_schema(
+        responses={
+            200: {
+                "type": "object",
+                "additionalProperties": {
+                    "type": "object",
+                    "properties": {
+                        "hits": {"type": "integer"},
+                        "misses": {"type": "integer"},
+                        "hit_rate": {"type": "number"},
+                    }
+                }
+            }
+        }
+    )
+    @action(detail=False, methods=['get'], url_path='cache-stats', pagination_class=None,
+            permission_classes=[IsAdminUser])
+    def cache_stats(self, request):
+        """Попадания и промахи кэша запросов ORM по моделям"""
+        return Response(get_query_cache_stats())
+
     @extend_schema(
         request=ProductSerializer,
         responses={201: ProductSerializer}
@@ -81,6 +188,14 @@ class ImportProductsView(APIView):
                 "yaml_path": {
                     "type": "string",
                     "description": "Путь к YAML-файлу с данными для импорта"
+                },
+                "delta": {
+                    "type": "boolean",
+                    "description": "Дифференциальный импорт: записывать только изменившиеся товары"
+                },
+                "parallel": {
+                    "type": "boolean",
+                    "description": "Разбить прайс на шарды и импортировать на нескольких воркерах"
                 }
             },
             "required": ["yaml_path"]
@@ -111,7 +226,12 @@ class ImportProductsView(APIView):
         if not yaml_path:
             return Response({"error": "Не указан путь к YAML-файлу"}, status=400)
 
-        import_products_from_yaml.delay(yaml_path)
+        delta = str(request.data.get('delta', '')).lower() in ('1', 'true', 'yes')
+        parallel = str(request.data.get('parallel', '')).lower() in ('1', 'true', 'yes')
+        if parallel:
+            import_products_sharded.delay(yaml_path, delta=delta)
+        else:
+            import_products_from_yaml.delay(yaml_path, delta=delta)
         return Response({"message": "Импорт начат. Проверьте Celery задачи для статуса выполнения."}, status=202)
 
 
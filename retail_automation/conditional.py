@@ -0,0 +1,65 @@
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+
+
+class NotModified(APIException):
+    """Представление у клиента актуально: ответ 304 без тела."""
+    status_code = status.HTTP_304_NOT_MODIFIED
+
+    def __init__(self, headers):
+        super().__init__()
+        self.headers = headers
+
+
+class ConditionalGetMixin:
+    """
+    Условные GET-запросы (If-None-Match / If-Modified-Since) для вьюсетов.
+    Валидаторы считаются в initial() — после аутентификации и проверки прав, но до выборки
+    и сериализации, — поэтому неизменившийся ресурс стоит одного дешёвого запроса или ни одного.
+    Вьюсет переопределяет get_etag и/или get_last_modified; None — валидатора нет.
+    """
+    conditional_actions = ('list', 'retrieve')
+
+    def get_etag(self, request):
+        """Строка, меняющаяся вместе с представлением ресурса."""
+        return None
+
+    def get_last_modified(self, request):
+        """Время последнего изменения ресурса (datetime)."""
+        return None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.validator_headers = {}
+        if request.method not in ('GET', 'HEAD') or self.action not in self.conditional_actions:
+            return
+
+        etag = self.get_etag(request)
+        if etag is not None:
+            # Слабый тег: ответ эквивалентен, но не обязательно побайтно совпадает (формат, отступы)
+            etag = 'W/' + quote_etag(f'{etag}:{request.accepted_renderer.format}')
+            self.validator_headers['ETag'] = etag
+        last_modified = self.get_last_modified(request)
+        if last_modified is not None:
+            last_modified = int(last_modified.timestamp())
+            self.validator_headers['Last-Modified'] = http_date(last_modified)
+
+        if self.validator_headers:
+            conditional = get_conditional_response(request._request, etag=etag, last_modified=last_modified)
+            if conditional is not None and conditional.status_code == status.HTTP_304_NOT_MODIFIED:
+                raise NotModified(self.validator_headers)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=exc.headers)
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            for header, value in getattr(self, 'validator_headers', {}).items():
+                response[header] = value
+        return response
@@ -0,0 +1,224 @@
+"""
+Быстрый путь чтения для списков: «плоские» сериализаторы, скомпилированные из ModelSerializer.
+
+Обычный ModelSerializer на каждую строку и каждое поле проходит get_attribute → to_representation
+через экземпляры полей. Плоский сериализатор один раз разбирает поля сериализатора, генерирует
+функцию, которая собирает словарь прямо из строки .values() (или кортежа .values_list())
+и отдаёт ту же форму ответа. Вложенные списки (many=True) догружаются одним запросом на страницу.
+"""
+import decimal
+from functools import lru_cache
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from rest_framework import fields as drf_fields, relations, serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+# Поля, чьё to_representation для значения из .values() ничего не меняет
+PASSTHROUGH_FIELDS = (
+    drf_fields.BooleanField, drf_fields.CharField, drf_fields.ChoiceField, drf_fields.FloatField,
+    drf_fields.IntegerField, drf_fields.ReadOnlyField, relations.PrimaryKeyRelatedField,
+)
+
+
+def decimal_converter(field):
+    """DecimalField.to_representation с контекстом и шагом округления, посчитанными заранее."""
+    coerce_to_string = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+    if field.localize or field.decimal_places is None:
+        return field.to_representation
+    context = decimal.getcontext().copy()
+    if field.max_digits is not None:
+        context.prec = field.max_digits
+    exponent = decimal.Decimal('.1') ** field.decimal_places
+    rounding = field.rounding
+
+    def convert(value):
+        if not isinstance(value, decimal.Decimal):
+            value = decimal.Decimal(str(value).strip())
+        quantized = value.quantize(exponent, rounding=rounding, context=context)
+        return '{:f}'.format(quantized) if coerce_to_string else quantized
+    return convert
+
+
+def datetime_converter(field):
+    """
+    DateTimeField.to_representation для формата ISO 8601. Часовой пояс DRF определяет на каждое
+    значение; здесь он вычисляется один раз на страницу и передаётся аргументом tz.
+    """
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    if output_format is None or hasattr(field, 'timezone') or output_format.lower() != drf_fields.ISO_8601:
+        return field.to_representation, None
+
+    def convert(original, tz):
+        if isinstance(original, str):
+            return original
+        try:
+            value = original.astimezone(tz) if tz is not None and original.utcoffset() is not None else None
+        except OverflowError:
+            value = None
+        if value is None:
+            # Наивные значения и ошибки переполнения — штатной логикой поля
+            value = field.enforce_timezone(original)
+        representation = value.isoformat()
+        if representation.endswith('+00:00'):
+            representation = representation[:-6] + 'Z'
+        return representation
+    return convert, 'tz'
+
+
+def file_converter(field, model_field):
+    """FileField.to_representation по имени файла из .values(): URL через хранилище поля модели."""
+    use_url = getattr(field, 'use_url', api_settings.UPLOADED_FILES_USE_URL)
+    storage = model_field.storage
+
+    def convert(name, request):
+        if not name:
+            return None
+        if not use_url:
+            return name
+        url = storage.url(name)
+        return request.build_absolute_uri(url) if request is not None else url
+    return convert
+
+
+class FlatSerializer:
+    """
+    Сериализатор только для чтения, собранный из serializer_class и списка полей.
+
+        flat = get_flat_serializer(ProductSerializer, ('id', 'name', 'price'))
+        data = flat.serialize(Product.objects.values(*flat.lookups), request=request)
+    """
+
+    def __init__(self, serializer_class, fields=None):
+        serializer = serializer_class()
+        self.model = serializer.Meta.model
+        self.names = [name for name in serializer.fields if fields is None or name in fields]
+        self.columns = []   # (имя в ответе, ключ .values(), конвертер, доп. аргумент: request/tz/None)
+        self.nested = []    # (имя в ответе, FlatSerializer, поле внешнего ключа у вложенной модели)
+        for name in self.names:
+            self.compile_field(name, serializer.fields[name])
+
+        pk_name = self.model._meta.pk.name
+        self.lookups = tuple(dict.fromkeys(
+            [lookup for _, lookup, _, _ in self.columns] + ([pk_name] if self.nested else [])
+        ))
+        self.pk_lookup = pk_name
+        self.to_dict = self.build(tuple_rows=False)
+        self.from_tuple = self.build(tuple_rows=True)
+        # Строка вложенного запроса: внешний ключ первым, затем lookups
+        self.from_nested_tuple = self.build(tuple_rows=True, offset=1)
+
+    def compile_field(self, name, field):
+        if isinstance(field, serializers.ListSerializer):
+            relation = self.model._meta.get_field(field.source)
+            if not relation.one_to_many:
+                raise ImproperlyConfigured(f'{name}: поддерживаются только обратные внешние ключи')
+            child = FlatSerializer(type(field.child))
+            if child.nested:
+                raise ImproperlyConfigured(f'{name}: вложенность глубже одного уровня не поддерживается')
+            self.nested.append((name, child, relation.field.attname))
+            return
+        if field.source == '*' or isinstance(field, (serializers.BaseSerializer, drf_fields.SerializerMethodField)):
+            raise ImproperlyConfigured(f'{name}: поле {type(field).__name__} нельзя сериализовать из .values()')
+
+        lookup = field.source.replace('.', '__')
+        if isinstance(field, drf_fields.FileField):
+            model_field = self.model._meta.get_field(field.source)
+            self.columns.append((name, lookup, file_converter(field, model_field), 'request'))
+        elif isinstance(field, drf_fields.DecimalField):
+            self.columns.append((name, lookup, decimal_converter(field), None))
+        elif isinstance(field, drf_fields.DateTimeField):
+            self.columns.append((name, lookup, *datetime_converter(field)))
+        elif (isinstance(field, drf_fields.JSONField) and not field.binary) or isinstance(field, PASSTHROUGH_FIELDS):
+            self.columns.append((name, lookup, None, None))
+        else:
+            # Даты, UUID и прочее — штатным to_representation, но без обхода get_attribute
+            self.columns.append((name, lookup, field.to_representation, None))
+
+    def build(self, tuple_rows, offset=0):
+        """Генерирует функцию row, request, nested, tz → dict с полями в порядке сериализатора."""
+        positions = {lookup: index + offset for index, lookup in enumerate(self.lookups)}
+        namespace = {}
+        items = []
+
+        def access(lookup):
+            return f'row[{positions[lookup]}]' if tuple_rows else f'row[{lookup!r}]'
+
+        nested_names = {name for name, _, _ in self.nested}
+        columns = {name: (lookup, convert, extra) for name, lookup, convert, extra in self.columns}
+        for index, name in enumerate(self.names):
+            if name in nested_names:
+                items.append(f'{name!r}: nested[{name!r}].get({access(self.pk_lookup)}) or []')
+                continue
+            lookup, convert, extra = columns[name]
+            if convert is None:
+                items.append(f'{name!r}: {access(lookup)}')
+            else:
+                namespace[f'convert_{index}'] = convert
+                arguments = f'value, {extra}' if extra else 'value'
+                items.append(
+                    f'{name!r}: None if (value := {access(lookup)}) is None else convert_{index}({arguments})'
+                )
+        source = 'def to_representation(row, request, nested, tz):\n    return {' + ', '.join(items) + '}\n'
+        exec(compile(source, f'<flat {self.model.__name__}>', 'exec'), namespace)
+        return namespace['to_representation']
+
+    def fetch_nested(self, parent_ids, request, tz):
+        """Вложенные списки для страницы родителей: {имя поля: {id родителя: [строки]}}."""
+        nested = {}
+        for name, child, foreign_key in self.nested:
+            groups = {}
+            convert = child.from_nested_tuple
+            rows = child.model.objects.filter(**{f'{foreign_key}__in': parent_ids}).values_list(
+                foreign_key, *child.lookups
+            )
+            for row in rows:
+                groups.setdefault(row[0], []).append(convert(row, request, None, tz))
+            nested[name] = groups
+        return nested
+
+    def serialize(self, rows, request=None):
+        """Строки .values() (словари) или .values_list(*lookups) (кортежи) → список словарей."""
+        rows = list(rows)
+        if not rows:
+            return []
+        convert = self.from_tuple if isinstance(rows[0], tuple) else self.to_dict
+        tz = timezone.get_current_timezone() if settings.USE_TZ else None
+        nested = {}
+        if self.nested:
+            pk = self.lookups.index(self.pk_lookup) if isinstance(rows[0], tuple) else self.pk_lookup
+            nested = self.fetch_nested([row[pk] for row in rows], request, tz)
+        return [convert(row, request, nested, tz) for row in rows]
+
+
+@lru_cache(maxsize=256)
+def get_flat_serializer(serializer_class, fields=None):
+    """
+    Скомпилированный плоский сериализатор; fields — отсортированный кортеж имён полей (проекция)
+    или None. Порядок полей в ответе всегда берётся из сериализатора.
+    """
+    return FlatSerializer(serializer_class, fields)
+
+
+class FlatListMixin:
+    """
+    GET list вьюсета через плоский сериализатор: страница читается как строки .values(),
+    а не экземпляры моделей. Остальные действия работают через обычный serializer_class.
+    """
+
+    def get_flat_serializer(self):
+        return get_flat_serializer(self.get_serializer_class())
+
+    def flat_list(self, queryset):
+        flat = self.get_flat_serializer()
+        # Ключ и аннотации (например, ранг поиска) нужны курсорной пагинации для позиции страницы
+        keys = dict.fromkeys((*flat.lookups, queryset.model._meta.pk.name, *queryset.query.annotations))
+        rows = queryset.prefetch_related(None).values(*keys)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(flat.serialize(page, self.request))
+        return Response(flat.serialize(rows, self.request))
+
+    def list(self, request, *args, **kwargs):
+        return self.flat_list(self.filter_queryset(self.get_queryset()))
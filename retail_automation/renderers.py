@@ -0,0 +1,58 @@
+"""
+JSON-рендерер и парсер DRF на ujson. Результат по смыслу совпадает со стандартными
+JSONRenderer/JSONParser: типы, которые ujson не знает (datetime, UUID, ленивые строки и т.п.),
+преобразуются тем же rest_framework.encoders.JSONEncoder, Decimal — в число, как у DRF.
+Подключаются в REST_FRAMEWORK (DEFAULT_RENDERER_CLASSES / DEFAULT_PARSER_CLASSES).
+"""
+import ujson
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import json
+
+
+class UJSONRenderer(JSONRenderer):
+    """Быстрая замена JSONRenderer."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        indent = self.get_indent(accepted_media_type, renderer_context)
+        try:
+            ret = ujson.dumps(
+                data,
+                default=self.encoder_class().default,
+                ensure_ascii=self.ensure_ascii,
+                escape_forward_slashes=False,
+                reject_bytes=False,
+                allow_nan=not self.strict,
+                indent=indent or 0,
+            )
+        except OverflowError as exc:
+            # json.dumps сообщает о NaN и бесконечности через ValueError
+            raise ValueError(str(exc)) from exc
+
+        # Как и в JSONRenderer: \u2028 и \u2029 экранируются, чтобы ответ оставался валидным JavaScript
+        ret = ret.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029')
+        return ret.encode()
+
+
+class UJSONParser(JSONParser):
+    """Быстрая замена JSONParser."""
+    renderer_class = UJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+
+        try:
+            data = stream.read().decode(encoding)
+            # ujson принимает NaN и Infinity; в строгом режиме такие тела разбирает json с проверкой констант
+            if self.strict and ('NaN' in data or 'Infinity' in data):
+                return json.loads(data, parse_constant=json.strict_constant)
+            return ujson.loads(data)
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
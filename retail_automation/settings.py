@@ -58,6 +58,9 @@ INSTALLED_APPS = [
 
     # DRF
     'rest_framework',
+
+    # Кэш запросов ORM с инвалидацией по событиям
+    'cacheops',
 ]
 
 # Настройки для Django REST Framework
@@ -69,6 +72,16 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ),
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # JSON через ujson (retail_automation/renderers.py); вернуть стандартный — rest_framework.renderers.JSONRenderer
+    'DEFAULT_RENDERER_CLASSES': (
+        'retail_automation.renderers.UJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'retail_automation.renderers.UJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
     'DEFAULT_THROTTLE_CLASSES': [
         'rest_framework.throttling.UserRateThrottle',  # Ограничение для авторизованных пользователей
         'rest_framework.throttling.AnonRateThrottle',  # Ограничение для анонимных пользователей
@@ -253,6 +266,69 @@ INSTALLED_APPS += [
     'django_celery_results',
 ]
 
+# Размер пачки товаров при импорте каталога из YAML
+PRODUCT_IMPORT_CHUNK_SIZE = 1000
+# На сколько шардов делится прайс при параллельном импорте (шард — задача одного воркера)
+PRODUCT_IMPORT_SHARDS = 8
+
+# Поиск по каталогу: полнотекстовый индекс SQLite FTS5 (для других СУБД — DatabaseSearchBackend)
+PRODUCT_SEARCH_BACKEND = 'products.search.SQLiteFTSBackend'
+# Сколько лучших результатов поиска (?search= и ?name=) участвует в выдаче
+PRODUCT_SEARCH_LIMIT = 1000
+
+# Фасеты каталога: границы ценовых диапазонов, число значений на параметр и время кэширования
+PRODUCT_FACET_PRICE_BUCKETS = [1000, 5000, 10000, 50000]
+PRODUCT_FACET_TOP_VALUES = 10
+PRODUCT_FACETS_CACHE_TIMEOUT = 60 * 10
+
+# Корзины хранятся в Redis и переносятся в БД отложенно (DatabaseCartStore — сразу в БД)
+CART_STORE_BACKEND = 'orders.cart_store.RedisCartStore'
+CART_REDIS_URL = 'redis://127.0.0.1:6380/3'
+# Сколько хранится корзина в Redis с момента последнего изменения
+CART_REDIS_TTL = 60 * 60 * 24 * 7
+
+# Заказ в статусе 'pending' старше этого срока (в секундах) отменяется, товары возвращаются на склад
+ORDER_PENDING_TTL = 60 * 60 * 24
+# Отмена идёт пачками: заказов в пачке и пачек за один запуск check_pending_orders
+ORDER_EXPIRY_BATCH_SIZE = 500
+ORDER_EXPIRY_MAX_BATCHES = 20
+
+# Доставленные и отменённые заказы старше этого срока (в днях) переносятся в архив;
+# перенос идёт пачками: заказов в пачке и пачек за один запуск archive_old_orders
+ORDER_ARCHIVE_AFTER_DAYS = 180
+ORDER_ARCHIVE_BATCH_SIZE = 500
+ORDER_ARCHIVE_MAX_BATCHES = 20
+
+# Outbox событий по заказам: событий в пачке, пачек за запуск relay_outbox и сколько хранить обработанные
+OUTBOX_BATCH_SIZE = 500
+OUTBOX_MAX_BATCHES = 20
+OUTBOX_RETENTION = 60 * 60 * 24 * 7
+# Повторы при ошибке обработчика: задержка удваивается от OUTBOX_RETRY_DELAY до OUTBOX_RETRY_MAX_DELAY секунд,
+# после OUTBOX_MAX_ATTEMPTS попыток событие помечается failed_at
+OUTBOX_MAX_ATTEMPTS = 10
+OUTBOX_RETRY_DELAY = 5
+OUTBOX_RETRY_MAX_DELAY = 60 * 60
+
+# Периодические задачи
+CELERY_BEAT_SCHEDULE = {
+    'flush-carts': {
+        'task': 'orders.tasks.flush_carts',
+        'schedule': 60.0,  # изменённые корзины попадают в БД не позже чем через минуту
+    },
+    'check-pending-orders': {
+        'task': 'orders.tasks.check_pending_orders',
+        'schedule': 60.0 * 5,
+    },
+    'archive-old-orders': {
+        'task': 'orders.tasks.archive_old_orders',
+        'schedule': 60.0 * 60,
+    },
+    'relay-outbox': {
+        'task': 'orders.tasks.relay_outbox',
+        'schedule': 5.0,  # письма и прочие побочные эффекты уходят через несколько секунд после коммита
+    },
+}
+
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend' # Real
 # EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend' # Test
 EMAIL_HOST = 'smtp.gmail.com'
@@ -295,9 +371,24 @@ CACHES = {
     }
 }
 
+# Кэш запросов ORM (django-cacheops): отдельная база Redis, инвалидация по сохранению и удалению
+CACHEOPS_REDIS = {
+    'host': '127.0.0.1',
+    'port': 6380,
+    'db': 2,
+    # Недоступный Redis не должен подвешивать запросы: короткие таймауты и чтение из БД
+    'socket_timeout': 0.5,
+    'socket_connect_timeout': 0.5,
+}
+CACHEOPS_DEGRADE_ON_FAILURE = True
+
+CACHEOPS_DEFAULTS = {
+    'timeout': 60 * 15,  # Кэшируем запросы на 15 минут
+}
 CACHEOPS = {
-    'default': {
-        'timeout': 60 * 15,  # Кэшируем запросы на 15 минут
-    },
     'products.product': {'ops': 'all', 'timeout': 60*5},  # Кэширование всех операций с продуктами на 5 минут
+    'products.category': {'ops': 'all'},
+    # История заказов: читается часто, меняется сохранением заказа
+    'orders.order': {'ops': 'all', 'timeout': 60*5},
+    'orders.orderitem': {'ops': 'all', 'timeout': 60*5},
 }
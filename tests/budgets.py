@@ -0,0 +1,50 @@
+"""
+Бюджеты производительности эндпоинтов: число SQL-запросов и время ответа.
+Замеры копятся в results и выводятся в конце прогона (см. pytest_terminal_summary в conftest.py).
+"""
+import os
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+# Множитель бюджетов времени для медленных машин, например PERF_BUDGET_TIME_SCALE=3
+TIME_SCALE = float(os.environ.get('PERF_BUDGET_TIME_SCALE', '1'))
+
+Measurement = namedtuple('Measurement', 'name queries max_queries elapsed_ms max_ms')
+
+results = []
+
+
+def usage(measurement):
+    """Доля израсходованного бюджета — по худшему из двух показателей."""
+    return max(measurement.queries / measurement.max_queries, measurement.elapsed_ms / measurement.max_ms)
+
+
+@contextmanager
+def within_budget(name, max_queries, max_ms):
+    """Падает, если код внутри блока сделал больше max_queries запросов или работал дольше max_ms."""
+    max_ms *= TIME_SCALE
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        yield
+        elapsed_ms = (time.perf_counter() - started) * 1000
+    measurement = Measurement(name, len(queries), max_queries, round(elapsed_ms, 1), max_ms)
+    results.append(measurement)
+
+    sql = '\n'.join(f"  {query['sql']}" for query in queries.captured_queries)
+    assert measurement.queries <= max_queries, (
+        f"{name}: {measurement.queries} SQL-запросов при бюджете {max_queries}\n{sql}"
+    )
+    assert elapsed_ms <= max_ms, f"{name}: {elapsed_ms:.1f} мс при бюджете {max_ms:.0f} мс"
+
+
+def report(limit=10):
+    """Строки отчёта: эндпоинты, ближе всего подошедшие к бюджету или превысившие его."""
+    worst = sorted(results, key=usage, reverse=True)[:limit]
+    return [
+        f"{m.name:<28} запросов {m.queries:>3}/{m.max_queries:<3} "
+        f"время {m.elapsed_ms:>7.1f}/{m.max_ms:.0f} мс  ({usage(m):.0%} бюджета)"
+        for m in worst
+    ]
@@ -1,7 +1,38 @@
 import pytest
 from rest_framework.test import APIClient
+from django.core.cache import cache
 from factories import UserFactory, AddressFactory
 
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Кэш (версия каталога, фасеты, счётчики throttling) не переживает тест."""
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_query_cache():
+    """
+    Кэш запросов ORM не переживает тест. Откат тестовой транзакции отменяет и отложенную
+    до коммита инвалидацию, поэтому без очистки следующий тест увидел бы чужие данные.
+    """
+    from cacheops import invalidate_all
+    invalidate_all()
+    yield
+    invalidate_all()
+
+
+@pytest.fixture(autouse=True)
+def reset_cart_store():
+    """Корзины из Redis не переживают тест: id пользователей в тестовой БД повторяются."""
+    from orders.cart_store import get_cart_store
+    get_cart_store().reset()
+    yield
+    get_cart_store().reset()
+
+
 @pytest.fixture
 def auth_client():
     """Авторизованный клиент API."""
@@ -19,3 +50,21 @@ def address_factory():
 def address(address_factory, auth_client):
     """Один тестовый адрес."""
     return address_factory(user=auth_client.handler._force_user)
+
+@pytest.fixture
+def celery_eager(monkeypatch):
+    """Задачи Celery выполняются синхронно, без брокера."""
+    from retail_automation.celery import app
+    monkeypatch.setattr(app.conf, 'task_always_eager', True)
+    monkeypatch.setattr(app.conf, 'task_eager_propagates', True)
+    return app
+
+
+def pytest_terminal_summary(terminalreporter):
+    """Отчёт о самых «тяжёлых» эндпоинтах по данным tests/budgets.py."""
+    from budgets import report
+    lines = report()
+    if lines:
+        terminalreporter.section("Бюджеты эндпоинтов: худшие результаты")
+        for line in lines:
+            terminalreporter.write_line(line)
@@ -1,5 +1,6 @@
 import factory
-from orders.models import Address
+from orders.models import Address, Cart, CartItem, Contact, Order, OrderItem
+from products.models import Category, Product
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -22,3 +23,66 @@ class AddressFactory(factory.django.DjangoModelFactory):
     city = "Москва"
     postal_code = "101000"
     country = "Россия"
+
+class ContactFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Contact
+
+    user = factory.SubFactory(UserFactory)
+    first_name = "Иван"
+    last_name = "Петров"
+    email = factory.LazyAttribute(lambda obj: f"{obj.user.username}@example.com")
+    phone = "+79990000000"
+    address = "Москва, улица Ленина, 10"
+
+class CategoryFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Category
+        django_get_or_create = ("name",)
+
+    name = factory.Sequence(lambda n: f"Категория {n}")
+
+class ProductFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Product
+
+    name = factory.Sequence(lambda n: f"Смартфон модель {n}")
+    description = factory.LazyAttribute(lambda obj: f"{obj.name}: экран 6 дюймов, две сим-карты")
+    category = factory.SubFactory(CategoryFactory)
+    supplier = factory.Iterator(["Связной", "DNS", "Ситилинк"])
+    price = factory.Sequence(lambda n: 1000 + n * 10)
+    quantity = 100
+    parameters = factory.Sequence(lambda n: {"Цвет": ["черный", "белый", "синий"][n % 3], "Память": f"{64 * (n % 4 + 1)} ГБ"})
+
+class CartFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Cart
+        django_get_or_create = ("user",)
+
+    user = factory.SubFactory(UserFactory)
+
+class CartItemFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = CartItem
+
+    cart = factory.SubFactory(CartFactory)
+    product = factory.SubFactory(ProductFactory)
+    quantity = 1
+
+class OrderFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Order
+
+    user = factory.SubFactory(UserFactory)
+    contact = factory.SubFactory(ContactFactory, user=factory.SelfAttribute("..user"))
+    status = "new"
+    total_amount = 0
+
+class OrderItemFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = OrderItem
+
+    order = factory.SubFactory(OrderFactory)
+    product = factory.SubFactory(ProductFactory)
+    quantity = 1
+    price = factory.SelfAttribute("product.price")
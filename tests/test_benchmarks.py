@@ -0,0 +1,51 @@
+import pytest
+from rest_framework.throttling import SimpleRateThrottle
+from benchmarks.compare import compare
+from benchmarks.run import percentile, summarize, make_sessions, run_load, build_report
+from benchmarks.seed import seed
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 0.50) == 50
+    assert percentile(values, 0.95) == 95
+    assert percentile(values, 0.99) == 99
+    assert percentile([7], 0.99) == 7
+    assert percentile([], 0.5) is None
+
+
+def test_summarize_counts_errors_and_throughput():
+    summary = summarize([(10.0, True), (20.0, True), (30.0, False), (40.0, True)], elapsed=2)
+    assert summary['requests'] == 4
+    assert summary['errors'] == 1
+    assert summary['throughput_rps'] == 2.0
+    assert summary['p50_ms'] == 20.0
+    assert summary['max_ms'] == 40.0
+
+
+@pytest.fixture
+def no_throttling(settings, monkeypatch):
+    """
+    Как в benchmarks/settings.py: без ограничения частоты запросов, иначе прогон упрётся в 429.
+    Частоты читаются в SimpleRateThrottle.THROTTLE_RATES при импорте, поэтому сбрасываются и там.
+    """
+    settings.REST_FRAMEWORK = dict(settings.REST_FRAMEWORK, DEFAULT_THROTTLE_RATES={'user': None, 'anon': None})
+    monkeypatch.setattr(SimpleRateThrottle, 'THROTTLE_RATES', {'user': None, 'anon': None})
+
+
+@pytest.mark.django_db(transaction=True)
+def test_short_benchmark_run_produces_report(no_throttling):
+    """Короткий прогон смеси только из чтения: отчёт по эндпоинтам без ошибок."""
+    data = seed(products=60, users=2, orders_per_user=3, categories=3)
+    sessions, recorder = make_sessions(data, concurrency=2, random_seed=1)
+    elapsed = run_load(sessions, recorder, 'browse', max_requests=20)
+    report = build_report(recorder, elapsed, {'mix': 'browse'})
+
+    assert report['summary']['requests'] >= 20
+    assert report['summary']['errors'] == 0
+    assert set(report['endpoints']) <= {'products-list', 'products-list-next', 'products-search',
+                                        'products-facets', 'products-detail'}
+    assert all(endpoint['p95_ms'] >= endpoint['p50_ms'] for endpoint in report['endpoints'].values())
+
+    rows = compare(report, report)
+    assert rows and all(delta in ('', '+0%') for *_, delta in rows)
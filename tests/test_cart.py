@@ -0,0 +1,260 @@
+import threading
+import time
+import pytest
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction, OperationalError
+from orders.cart_store import get_cart_store, DatabaseCartStore, RedisCartStore
+from orders.models import Cart, CartItem, Contact
+from orders.tasks import flush_carts
+from products.models import Category, Product
+
+User = get_user_model()
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user(username="shopper", password="password123")
+
+
+@pytest.fixture
+def auth_client(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+@pytest.fixture
+def products(db):
+    category = Category.objects.create(name="Electronics")
+    return Product.objects.bulk_create([
+        Product(name=f"Product {number}", category=category, price=10, quantity=100) for number in range(3)
+    ])
+
+
+def db_lines(user):
+    return dict(CartItem.objects.filter(cart__user=user).values_list('product_id', 'quantity'))
+
+
+@pytest.mark.django_db
+def test_add_to_cart_accumulates_quantity(auth_client, user, products):
+    """Повторное добавление товара увеличивает количество, GET отдаёт актуальную корзину."""
+    for quantity in (2, 3):
+        response = auth_client.post("/api/orders/cart/add/", {"product_id": products[0].id, "quantity": quantity})
+        assert response.status_code == 201
+    auth_client.post("/api/orders/cart/add/", {"product_id": products[1].id})
+
+    response = auth_client.get("/api/orders/cart/")
+    assert response.status_code == 200
+    assert {item['product']: item['quantity'] for item in response.data} == {products[0].id: 5, products[1].id: 1}
+
+
+@pytest.mark.django_db
+def test_add_to_cart_validates_input(auth_client, products):
+    """Неверное количество — 400, несуществующий товар — 404."""
+    assert auth_client.post("/api/orders/cart/add/", {"product_id": products[0].id, "quantity": 0}).status_code == 400
+    assert auth_client.post("/api/orders/cart/add/", {"product_id": products[0].id, "quantity": "x"}).status_code == 400
+    assert auth_client.post("/api/orders/cart/add/", {"product_id": 999999}).status_code == 404
+
+
+@pytest.mark.django_db
+def test_update_and_remove_cart_items(auth_client, user, products):
+    """PATCH и DELETE по id строки корзины из ответа GET."""
+    for product in products[:2]:
+        auth_client.post("/api/orders/cart/add/", {"product_id": product.id, "quantity": 1})
+    items = {item['product']: item['id'] for item in auth_client.get("/api/orders/cart/").data}
+
+    response = auth_client.patch(f"/api/orders/cart/update/{items[products[0].id]}/", {"quantity": 7})
+    assert response.status_code == 200
+    response = auth_client.delete(f"/api/orders/cart/remove/{items[products[1].id]}/")
+    assert response.status_code == 200
+
+    assert get_cart_store().lines(user.id) == {products[0].id: 7}
+    flush_carts()
+    assert db_lines(user) == {products[0].id: 7}
+
+
+@pytest.mark.django_db
+def test_redis_cart_is_written_behind(user, products):
+    """Изменения копятся в Redis и попадают в БД при сбросе."""
+    store = get_cart_store()
+    if not isinstance(store, RedisCartStore):
+        pytest.skip("Корзины хранятся в БД")
+
+    store.add(user.id, products[0].id, 2)
+    store.add(user.id, products[0].id, 1)
+    store.set(user.id, products[1].id, 4)
+    assert store.lines(user.id) == {products[0].id: 3, products[1].id: 4}
+    assert db_lines(user) == {}
+
+    assert flush_carts() == "1 carts flushed."
+    assert db_lines(user) == {products[0].id: 3, products[1].id: 4}
+    assert flush_carts() == "0 carts flushed."
+
+    store.remove(user.id, [products[1].id])
+    flush_carts()
+    assert db_lines(user) == {products[0].id: 3}
+    assert Cart.objects.filter(user=user).count() == 1
+
+
+@pytest.mark.django_db
+def test_redis_cart_loads_existing_lines_from_db(user, products):
+    """Корзина, сохранённая в БД, подхватывается при первом обращении."""
+    store = get_cart_store()
+    if not isinstance(store, RedisCartStore):
+        pytest.skip("Корзины хранятся в БД")
+
+    cart = Cart.objects.create(user=user)
+    CartItem.objects.create(cart=cart, product=products[0], quantity=2)
+
+    store.add(user.id, products[0].id, 1)
+    assert store.lines(user.id) == {products[0].id: 3}
+
+
+@pytest.mark.django_db
+def test_checkout_reads_cart_from_store(auth_client, user, products, django_capture_on_commit_callbacks):
+    """Заказ оформляется из корзины, которая ещё не сброшена в БД; после заказа корзина пуста."""
+    contact = Contact.objects.create(user=user, first_name="John", last_name="Doe", email="john@example.com",
+                                     phone="1234567890", address="123 Test Street")
+    auth_client.post("/api/orders/cart/add/", {"product_id": products[0].id, "quantity": 2})
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = auth_client.post("/api/orders/create-from-cart/", {"contact_id": contact.id})
+    assert response.status_code == 201, response.data
+    assert [(item['product'], item['quantity']) for item in response.data['items']] == [(products[0].id, 2)]
+    assert get_cart_store().lines(user.id) == {}
+    flush_carts()
+    assert db_lines(user) == {}
+
+
+@pytest.mark.django_db
+def test_redis_cart_is_cleared_only_after_commit(user, products, django_capture_on_commit_callbacks):
+    """Откат заказа оставляет корзину в Redis; после коммита вычитаются только оформленные количества."""
+    store = get_cart_store()
+    if not isinstance(store, RedisCartStore):
+        pytest.skip("Корзины хранятся в БД")
+
+    store.add(user.id, products[0].id, 2)
+    store.add(user.id, products[1].id, 1)
+    try:
+        with transaction.atomic():
+            store.clear(user.id, {products[0].id: 2, products[1].id: 1})
+            raise RuntimeError
+    except RuntimeError:
+        pass
+    assert store.lines(user.id) == {products[0].id: 2, products[1].id: 1}
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        store.clear(user.id, {products[0].id: 2, products[1].id: 1})
+    assert store.lines(user.id) == {products[0].id: 2, products[1].id: 1}
+    # Пока заказ оформлялся, в корзину добавили ещё товаров — они остаются
+    store.add(user.id, products[0].id, 3)
+    store.add(user.id, products[2].id, 1)
+    for callback in callbacks:
+        callback()
+
+    assert store.lines(user.id) == {products[0].id: 3, products[2].id: 1}
+    flush_carts()
+    assert db_lines(user) == {products[0].id: 3, products[2].id: 1}
+
+
+def test_database_store_is_default(settings):
+    """Без настройки используется хранилище в БД."""
+    del settings.CART_STORE_BACKEND
+    get_cart_store.cache_clear()
+    try:
+        assert isinstance(get_cart_store(), DatabaseCartStore)
+    finally:
+        get_cart_store.cache_clear()
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize('store_class', [DatabaseCartStore, RedisCartStore])
+def test_concurrent_adds_lose_no_increments(store_class):
+    """Параллельные добавления одного товара: одна корзина, одна строка, ни одного потерянного увеличения."""
+    if store_class is RedisCartStore and not isinstance(get_cart_store(), RedisCartStore):
+        pytest.skip("Redis для корзин не настроен")
+    store = store_class()
+    user = User.objects.create_user(username="racer", password="password123")
+    product = Product.objects.create(name="Phone", category=Category.objects.create(name="Phones"), price=10, quantity=1)
+    threads_count, adds_per_thread = 8, 25
+    errors = []
+    start = threading.Barrier(threads_count)
+
+    def clicker():
+        try:
+            start.wait()
+            for _ in range(adds_per_thread):
+                while True:
+                    try:
+                        store.add(user.id, product.id, 1)
+                    except OperationalError:
+                        # Тестовая БД SQLite в памяти отвечает «table is locked» при конкурентной записи — повторяем
+                        time.sleep(0.002)
+                        continue
+                    break
+        except Exception as e:  # pragma: no cover - ошибка будет видна в assert ниже
+            errors.append(e)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=clicker) for _ in range(threads_count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    store.flush_all()
+    assert Cart.objects.filter(user=user).count() == 1
+    assert db_lines(user) == {product.id: threads_count * adds_per_thread}
+
+
+@pytest.mark.django_db
+def test_batch_applies_operations_in_order(auth_client, user, products):
+    """Пакет операций применяется по порядку, ответ — итоговая корзина."""
+    auth_client.post("/api/orders/cart/add/", {"product_id": products[2].id, "quantity": 1})
+    operations = [
+        {"op": "add", "product_id": products[0].id, "quantity": 2},
+        {"op": "add", "product_id": products[0].id, "quantity": 3},
+        {"op": "set", "product_id": products[1].id, "quantity": 4},
+        {"op": "add", "product_id": products[1].id, "quantity": 1},
+        {"op": "remove", "product_id": products[2].id},
+    ]
+    response = auth_client.post("/api/orders/cart/batch/", {"operations": operations}, format="json")
+
+    assert response.status_code == 200, response.data
+    expected = {products[0].id: 5, products[1].id: 5}
+    assert {item['product']: item['quantity'] for item in response.data} == expected
+    assert db_lines(user) == expected
+
+
+@pytest.mark.django_db
+def test_batch_with_database_store(user, products):
+    """Свёртка операций в БД: приращения складываются с сохранённым количеством."""
+    store = DatabaseCartStore()
+    store.add(user.id, products[0].id, 1)
+    store.add(user.id, products[1].id, 1)
+    store.apply(user.id, [
+        ('add', products[0].id, 2), ('remove', products[1].id, None),
+        ('set', products[2].id, 3), ('add', products[2].id, 2),
+    ])
+    assert db_lines(user) == {products[0].id: 3, products[2].id: 5}
+
+
+@pytest.mark.django_db
+def test_batch_is_validated_as_a_whole(auth_client, user, products):
+    """Неизвестный товар или неполная операция отклоняют весь пакет."""
+    operations = [
+        {"op": "add", "product_id": products[0].id, "quantity": 1},
+        {"op": "add", "product_id": 999999, "quantity": 1},
+    ]
+    response = auth_client.post("/api/orders/cart/batch/", {"operations": operations}, format="json")
+    assert response.status_code == 400
+    assert "999999" in str(response.data)
+
+    response = auth_client.post(
+        "/api/orders/cart/batch/", {"operations": [{"op": "set", "product_id": products[0].id}]}, format="json"
+    )
+    assert response.status_code == 400
+    assert get_cart_store().lines(user.id) == {}
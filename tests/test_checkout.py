@@ -0,0 +1,75 @@
+import pytest
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from orders.models import Cart, CartItem, Contact, Order
+from products.models import Category, Product
+
+User = get_user_model()
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user(username="buyer", password="password123")
+
+
+@pytest.fixture
+def auth_client(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+@pytest.fixture
+def contact(user):
+    return Contact.objects.create(user=user, first_name="John", last_name="Doe", email="john.doe@example.com",
+                                  phone="1234567890", address="123 Test Street")
+
+
+@pytest.fixture
+def products(db):
+    category = Category.objects.create(name="Electronics")
+    return Product.objects.bulk_create([
+        Product(name=f"Product {number}", category=category, price=number + 1, quantity=100)
+        for number in range(50)
+    ])
+
+
+def fill_cart(user, products, lines):
+    cart, _ = Cart.objects.get_or_create(user=user)
+    CartItem.objects.bulk_create([CartItem(cart=cart, product=product, quantity=2) for product in products[:lines]])
+
+
+def checkout(auth_client, contact):
+    # Корзина в Redis очищается после коммита заказа — выполняем эти колбэки, но не считаем их запросы
+    with TestCase.captureOnCommitCallbacks(execute=True), CaptureQueriesContext(connection) as queries:
+        response = auth_client.post("/api/orders/create-from-cart/", {"contact_id": contact.id})
+    assert response.status_code == 201, response.data
+    return response, len(queries)
+
+
+@pytest.mark.django_db
+def test_checkout_creates_order_from_cart(auth_client, user, contact, products):
+    """Заказ содержит все позиции корзины по текущим ценам, корзина очищается."""
+    fill_cart(user, products, 3)
+    response, _ = checkout(auth_client, contact)
+
+    order = Order.objects.get(pk=response.data["id"])
+    assert order.status == "new"
+    assert float(order.total_amount) == (1 + 2 + 3) * 2
+    assert [item["product_name"] for item in response.data["items"]] == ["Product 0", "Product 1", "Product 2"]
+    assert not CartItem.objects.filter(cart__user=user).exists()
+
+
+@pytest.mark.django_db
+def test_checkout_query_count_does_not_grow_with_cart(auth_client, user, contact, products):
+    """Число запросов при оформлении одинаково для корзины из 1 и из 50 позиций."""
+    fill_cart(user, products, 1)
+    _, small_queries = checkout(auth_client, contact)
+
+    fill_cart(user, products, 50)
+    _, large_queries = checkout(auth_client, contact)
+
+    assert large_queries == small_queries
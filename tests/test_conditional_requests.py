@@ -0,0 +1,99 @@
+"""Условные GET-запросы: 304 по ETag / Last-Modified до выборки и сериализации."""
+import pytest
+from rest_framework.test import APIClient
+from factories import UserFactory, CategoryFactory, ProductFactory, OrderFactory, OrderItemFactory
+
+
+@pytest.fixture
+def user(db):
+    return UserFactory()
+
+
+@pytest.fixture
+def client(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+@pytest.mark.parametrize('url', ['/api/products/', '/api/products/categories/', '/api/products/facets/'])
+def test_catalog_not_modified(client, url, django_assert_num_queries):
+    ProductFactory.create_batch(3)
+    response = client.get(url)
+    assert response.status_code == 200
+    etag = response['ETag']
+
+    with django_assert_num_queries(0):
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert response.content == b''
+    assert response['ETag'] == etag
+
+
+def test_catalog_etag_changes_on_write(client, django_capture_on_commit_callbacks):
+    product = ProductFactory()
+    etag = client.get(f'/api/products/{product.id}/')['ETag']
+
+    with django_capture_on_commit_callbacks(execute=True):
+        product.price = 1
+        product.save()
+
+    response = client.get(f'/api/products/{product.id}/', HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response['ETag'] != etag
+
+
+def test_category_write_changes_catalog_etag(client, django_capture_on_commit_callbacks):
+    etag = client.get('/api/products/categories/')['ETag']
+    with django_capture_on_commit_callbacks(execute=True):
+        CategoryFactory(name='Новая категория')
+
+    assert client.get('/api/products/categories/', HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+def test_order_detail_not_modified(client, user, django_assert_num_queries):
+    order = OrderFactory(user=user)
+    OrderItemFactory(order=order)
+    response = client.get(f'/api/orders/orders/{order.id}/')
+    assert response.status_code == 200
+
+    # Одна выборка updated_at — без заказа, позиций и сериализации
+    with django_assert_num_queries(1):
+        response = client.get(f'/api/orders/orders/{order.id}/', HTTP_IF_NONE_MATCH=response['ETag'])
+    assert response.status_code == 304
+
+    last_modified = client.get(f'/api/orders/orders/{order.id}/')['Last-Modified']
+    assert client.get(f'/api/orders/orders/{order.id}/', HTTP_IF_MODIFIED_SINCE=last_modified).status_code == 304
+
+
+def test_order_etag_changes_with_status(client, user):
+    order = OrderFactory(user=user, status='new')
+    etag = client.get(f'/api/orders/orders/{order.id}/')['ETag']
+
+    assert client.patch(f'/api/orders/orders/{order.id}/change-status/', {'status': 'confirmed'}).status_code == 200
+
+    response = client.get(f'/api/orders/orders/{order.id}/', HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response.data['status'] == 'confirmed'
+
+
+def test_order_list_etag_changes_with_new_order(client, user):
+    OrderFactory.create_batch(2, user=user)
+    etag = client.get('/api/orders/orders/')['ETag']
+    assert client.get('/api/orders/orders/', HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    OrderFactory(user=user)
+    response = client.get('/api/orders/orders/', HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert len(response.data['results']) == 3
+
+
+def test_foreign_order_is_not_revealed_by_etag(client):
+    stranger = UserFactory()
+    order = OrderFactory(user=stranger)
+    owner_client = APIClient()
+    owner_client.force_authenticate(user=stranger)
+    etag = owner_client.get(f'/api/orders/orders/{order.id}/')['ETag']
+
+    response = client.get(f'/api/orders/orders/{order.id}/', HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 403
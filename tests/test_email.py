@@ -4,6 +4,7 @@ from orders.models import Order, Cart, Contact
 from products.models import Product, Category
 from django.contrib.auth import get_user_model
 from django.core.mail import send_mail
+from orders import tasks as order_tasks
 
 
 User = get_user_model()
@@ -55,19 +56,23 @@ def cart(db, test_user, product):
 
 
 @pytest.mark.django_db
-def test_send_email_confirmation(api_client, test_user, contact, cart):
+def test_send_email_confirmation(api_client, test_user, contact, cart, celery_eager):
     """Тестирование отправки email с подтверждением заказа."""
     # Аутентификация
     api_client.force_authenticate(user=test_user)
 
-    # Создаем заказ из корзины
+    # Создаем заказ из корзины; вместе с заказом в outbox записывается событие order.created
     response = api_client.post("/api/orders/create-from-cart/", {"contact_id": contact.id})
 
     # Проверяем, что заказ был успешно создан
     assert response.status_code == 201, "Не удалось создать заказ."
 
-    # Проверяем, что в outbox был отправлен один email
+    # Письмо отправляет relay_outbox, а не обработчик запроса
     from django.core.mail import outbox
+    assert len(outbox) == 0
+    assert order_tasks.relay_outbox()['delivered'] == 1
+
+    # Проверяем, что в outbox был отправлен один email
     assert len(outbox) == 1, "Email не был отправлен."
 
     # Проверяем, что тело письма содержит правильный текст
@@ -75,3 +80,16 @@ def test_send_email_confirmation(api_client, test_user, contact, cart):
     assert "Ваш заказ №1 успешно подтвержден" in email.body
     assert "Товары в заказе: Smartphone" in email.body
     assert "Общая сумма: 1599.98" in email.body
+
+
+@pytest.mark.django_db
+def test_send_order_confirmations_in_one_connection(test_user, contact, cart, mocker):
+    """Пачка писем уходит через одно SMTP-соединение."""
+    orders = [Order.objects.create(user=test_user, contact=contact, status='new', total_amount=10) for _ in range(3)]
+    get_connection = mocker.spy(order_tasks, 'get_connection')
+
+    assert order_tasks.send_order_confirmations([order.id for order in orders]) == 3
+
+    from django.core.mail import outbox
+    assert get_connection.call_count == 1
+    assert [email.subject for email in outbox] == [f"Подтверждение заказа №{order.id}" for order in orders]
@@ -0,0 +1,75 @@
+"""Плоские сериализаторы дают тот же ответ, что и ModelSerializer, из которого собраны."""
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.test import APIRequestFactory
+from benchmarks.serializers import run
+from factories import CartItemFactory, OrderFactory, OrderItemFactory, ProductFactory
+from orders.models import CartItem, Order
+from orders.serializers import CartItemSerializer, OrderSerializer
+from products.models import Product
+from products.serializers import ProductSerializer
+from retail_automation.flat_serializers import get_flat_serializer
+
+
+@pytest.fixture
+def request_for_uri():
+    return APIRequestFactory().get('/api/products/')
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('fields', [None, ('id', 'image', 'name', 'price')])
+def test_products_match_model_serializer(fields, request_for_uri):
+    ProductFactory.create_batch(3)
+    ProductFactory(image='product_images/phone.png', price='1999.50')
+    products = Product.objects.order_by('id')
+    flat = get_flat_serializer(ProductSerializer, fields)
+
+    expected = ProductSerializer(products, many=True, fields=fields, context={'request': request_for_uri}).data
+    assert flat.serialize(products.values(*flat.lookups), request_for_uri) == expected
+    assert flat.serialize(products.values_list(*flat.lookups), request_for_uri) == expected
+    assert expected[-1]['image'].startswith('http://testserver/')
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('zone', ['UTC', 'Europe/Moscow'])
+def test_orders_with_items_match_model_serializer(zone):
+    orders = [OrderFactory(), OrderFactory()]
+    OrderItemFactory.create_batch(2, order=orders[0])
+    queryset = Order.objects.order_by('id')
+    flat = get_flat_serializer(OrderSerializer)
+
+    with timezone.override(zone):
+        expected = OrderSerializer(queryset, many=True).data
+        assert flat.serialize(queryset.values(*flat.lookups)) == expected
+    assert expected[1]['items'] == []
+
+
+@pytest.mark.django_db
+def test_cart_items_match_model_serializer():
+    CartItemFactory.create_batch(3, quantity=2)
+    items = CartItem.objects.order_by('id')
+    flat = get_flat_serializer(CartItemSerializer)
+    assert flat.serialize(items.values_list(*flat.lookups)) == CartItemSerializer(items, many=True).data
+
+
+def test_unsupported_field_is_rejected():
+    class WithMethod(serializers.ModelSerializer):
+        label = serializers.SerializerMethodField()
+
+        class Meta:
+            model = Product
+            fields = ['id', 'label']
+
+    with pytest.raises(ImproperlyConfigured):
+        get_flat_serializer(WithMethod)
+
+
+@pytest.mark.django_db
+def test_micro_benchmark_checks_and_times_all_lists():
+    OrderItemFactory.create_batch(3)
+    CartItemFactory.create_batch(3)
+    report = run(rows=5, repeat=1)
+    assert set(report['endpoints']) == {'products-list', 'orders-list', 'cart-items'}
+    assert all(result['speedup'] > 0 for result in report['endpoints'].values())
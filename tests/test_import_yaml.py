@@ -1,7 +1,11 @@
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.core.files.temp import NamedTemporaryFile
-from products.models import Category, Product
-from products.tasks import import_products_from_yaml
+from products.models import Category, Product, ProductAttribute
+from products.search import get_search_backend
+from products.tasks import import_products_from_yaml, import_products_sharded, merge_import_stats
+from products.importers import CatalogImporter, iter_shard, shard_of, split_catalog
 
 @pytest.mark.django_db
 def test_import_products_from_yaml():
@@ -53,3 +57,224 @@ def test_import_products_from_yaml():
     assert smartphone.description == "A high-end smartphone"
     assert float(smartphone.price) == 799.99
     assert smartphone.quantity == 10
+
+
+@pytest.mark.django_db
+def test_reimport_products_in_chunks():
+    """Повторный импорт обновляет товары пачками и возвращает статистику."""
+    category = Category.objects.create(name="Electronics")
+    Product.objects.create(name="Smartphone", description="Old", price=1, quantity=1, category=category)
+
+    yaml_content = """
+    categories:
+      - products:
+          - name: "Smartphone"
+            description: "A high-end smartphone"
+            price: 799.99
+            quantity: 10
+            parameters:
+              color: "black"
+              memory: "128GB"
+          - name: "Laptop"
+            price: 1199.99
+            quantity: 5
+          - name: "Tablet"
+            price: 499.99
+            quantity: 7
+        name: "Electronics"
+      - name: "Книги"
+        products:
+          - name: "Python"
+            price: 29.99
+            quantity: 50
+    """
+    with NamedTemporaryFile(delete=True, suffix=".yaml") as temp_file:
+        temp_file.write(yaml_content.encode("utf-8"))
+        temp_file.flush()
+
+        result = import_products_from_yaml(temp_file.name, chunk_size=2)
+
+    assert result["status"] == "success"
+    assert result["rows"] == 4
+    assert result["created"] == 3
+    assert result["updated"] == 1
+    assert result["categories"] == 2
+    assert "rows_per_second" in result
+
+    assert Category.objects.count() == 2
+    assert Product.objects.count() == 4
+    smartphone = Product.objects.get(name="Smartphone")
+    assert smartphone.description == "A high-end smartphone"
+    assert smartphone.quantity == 10
+    assert smartphone.parameters == {"color": "black", "memory": "128GB"}
+    assert Product.objects.get(name="Python").category.name == "Книги"
+    # Импортированные товары попадают в поисковый индекс
+    assert get_search_backend().search("smartphone") == [smartphone.id]
+    assert set(smartphone.attributes.values_list("key", "value")) == {("color", "black"), ("memory", "128GB")}
+
+
+@pytest.mark.django_db
+def test_chunk_selects_products_by_name_once():
+    """Чанк ищет товары по названию одним запросом; id новых строк берутся из bulk_create."""
+    category = Category.objects.create(name="Electronics")
+    Product.objects.create(name="Old", price=1, quantity=1, category=category)
+    importer = CatalogImporter()
+    chunk = {
+        name: (category.id, {"name": name, "price": 1, "quantity": 1, "parameters": {"color": "red"}})
+        for name in ("Old", "New 1", "New 2")
+    }
+    with CaptureQueriesContext(connection) as queries:
+        importer.write_chunk(chunk)
+
+    by_name = [query["sql"] for query in queries if query["sql"].startswith("SELECT") and '"name" IN' in query["sql"]]
+    assert len(by_name) == 1
+    # Названия нужны только дифференциальному импорту (снятие пропавших товаров)
+    assert importer.seen_names == set()
+    assert set(ProductAttribute.objects.values_list("product__name", flat=True)) == {"Old", "New 1", "New 2"}
+    assert sorted(get_search_backend().search("new")) == sorted(
+        Product.objects.filter(name__startswith="New").values_list("id", flat=True)
+    )
+
+
+@pytest.mark.django_db
+def test_delta_import_touches_only_changed_rows():
+    """Дифференциальный импорт пропускает неизменённые товары и снимает с продажи пропавшие."""
+    first_feed = """
+    categories:
+      - name: "Electronics"
+        products:
+          - name: "Smartphone"
+            price: 799.99
+            quantity: 10
+          - name: "Laptop"
+            price: 1199.99
+            quantity: 5
+          - name: "Tablet"
+            price: 499.99
+            quantity: 7
+    """
+    second_feed = """
+    categories:
+      - name: "Electronics"
+        products:
+          - name: "Smartphone"
+            price: 799.99
+            quantity: 10
+          - name: "Laptop"
+            price: 999.99
+            quantity: 5
+          - name: "Headphones"
+            price: 99.99
+            quantity: 30
+    """
+    with NamedTemporaryFile(delete=True, suffix=".yaml") as temp_file:
+        temp_file.write(first_feed.encode("utf-8"))
+        temp_file.flush()
+        import_products_from_yaml(temp_file.name, delta=True)
+
+    with NamedTemporaryFile(delete=True, suffix=".yaml") as temp_file:
+        temp_file.write(second_feed.encode("utf-8"))
+        temp_file.flush()
+        result = import_products_from_yaml(temp_file.name, delta=True)
+
+    assert result["created"] == 1
+    assert result["updated"] == 1
+    assert result["unchanged"] == 1
+    assert result["removed"] == 1
+
+    assert float(Product.objects.get(name="Laptop").price) == 999.99
+    assert Product.objects.get(name="Tablet").quantity == 0
+    assert Product.objects.get(name="Headphones").quantity == 30
+
+
+@pytest.mark.django_db
+def test_sharded_import(celery_eager, tmp_path):
+    """Параллельный импорт режет прайс на шарды и сводит их статистику."""
+    yaml_path = tmp_path / "feed.yaml"
+    lines = ["categories:"]
+    for category in ("Electronics", "Books"):
+        lines += [f"  - name: \"{category}\"", "    products:"]
+        for number in range(5):
+            lines += [
+                f"      - name: \"{category} {number}\"",
+                f"        price: {number + 1}.50",
+                f"        quantity: {number}",
+            ]
+    yaml_path.write_text("\n".join(lines), encoding="utf-8")
+
+    result = import_products_sharded.delay(str(yaml_path), shards=4).get()
+
+    assert result["status"] == "started"
+    assert result["shards"] == len({shard_of(name, 4) for name in Product.objects.values_list("name", flat=True)})
+    assert Category.objects.count() == 2
+    assert Product.objects.count() == 10
+    assert list(tmp_path.iterdir()) == [yaml_path]
+
+
+@pytest.mark.django_db
+def test_sharded_import_keeps_duplicate_names_in_one_shard(celery_eager, tmp_path):
+    """Повторы одного товара попадают в один шард: товар создаётся один раз, побеждает последняя строка."""
+    yaml_path = tmp_path / "feed.yaml"
+    lines = ["categories:"]
+    for category in ("Electronics", "Books"):
+        lines += [f"  - name: \"{category}\"", "    products:"]
+        for number in range(6):
+            lines += [
+                f"      - name: \"Item {number}\"",
+                f"        price: {number + 1}.50",
+                f"        quantity: {len(category)}",
+            ]
+    yaml_path.write_text("\n".join(lines), encoding="utf-8")
+
+    shards, _, _ = split_catalog(str(yaml_path), 3)
+    owners = {}
+    for path in shards:
+        for category_name, product_data in iter_shard(path):
+            owners.setdefault(product_data["name"], set()).add(path)
+    assert all(len(paths) == 1 for paths in owners.values())
+
+    import_products_sharded.delay(str(yaml_path), shards=3).get()
+
+    assert Product.objects.count() == 6
+    assert set(Product.objects.values_list("category__name", "quantity")) == {("Books", 5)}
+
+
+@pytest.mark.django_db
+def test_date_parameters_are_stored_the_same_in_both_modes(celery_eager, tmp_path):
+    """Даты из YAML в параметрах приводятся к строкам ISO одинаково в обычном и параллельном импорте."""
+    yaml_path = tmp_path / "feed.yaml"
+    yaml_path.write_text("\n".join([
+        "categories:",
+        "  - name: \"Phones\"",
+        "    products:",
+        "      - name: \"Phone\"",
+        "        price: 10",
+        "        quantity: 1",
+        "        parameters:",
+        "          released: 2023-01-01",
+        "          updated: 2023-01-02 10:30:00",
+    ]), encoding="utf-8")
+    expected = {"released": "2023-01-01", "updated": "2023-01-02T10:30:00"}
+
+    import_products_from_yaml(str(yaml_path))
+    assert Product.objects.get(name="Phone").parameters == expected
+
+    Product.objects.update(parameters={})
+    import_products_sharded.delay(str(yaml_path), shards=2).get()
+    assert Product.objects.get(name="Phone").parameters == expected
+
+
+def test_merge_import_stats():
+    """Итог параллельного импорта складывается из статистики шардов."""
+    result = merge_import_stats([
+        {"rows": 3, "created": 2, "updated": 1, "unchanged": 0},
+        {"rows": 2, "created": 0, "updated": 1, "unchanged": 1},
+    ], removed=4)
+
+    assert result["status"] == "success"
+    assert result["shards"] == 2
+    assert result["rows"] == 5
+    assert result["created"] == 2
+    assert result["updated"] == 2
+    assert result["unchanged"] == 1
+    assert result["removed"] == 4
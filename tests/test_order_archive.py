@@ -0,0 +1,99 @@
+from datetime import timedelta
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from factories import OrderFactory, OrderItemFactory, UserFactory
+from orders.archive import archive_orders
+from orders.models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem, OrderStatusLog, UserOrderStats
+from orders.state_machine import transition
+from orders.tasks import archive_old_orders
+
+
+@pytest.fixture
+def user(auth_client):
+    return auth_client.handler._force_user
+
+
+def make_order(user, status, age_days, items=1):
+    order = OrderFactory(user=user, status=status)
+    OrderItemFactory.create_batch(items, order=order)
+    Order.objects.filter(pk=order.pk).update(created_at=timezone.now() - timedelta(days=age_days))
+    return order
+
+
+@pytest.mark.django_db
+def test_moves_only_old_terminal_orders(settings, user):
+    settings.ORDER_ARCHIVE_AFTER_DAYS = 30
+    delivered = make_order(user, 'delivered', age_days=60, items=2)
+    canceled = make_order(user, 'canceled', age_days=60)
+    recent = make_order(user, 'delivered', age_days=1)
+    active = make_order(user, 'sent', age_days=60)
+
+    result = archive_old_orders()
+
+    assert result == {'orders': 2, 'items': 3, 'batches': 1, 'complete': True}
+    assert set(Order.objects.values_list('id', flat=True)) == {recent.id, active.id}
+    assert set(ArchivedOrder.objects.values_list('id', flat=True)) == {delivered.id, canceled.id}
+    assert ArchivedOrderItem.objects.filter(order_id=delivered.id).count() == 2
+    assert not OrderItem.objects.filter(order_id__in=[delivered.id, canceled.id]).exists()
+
+
+@pytest.mark.django_db
+def test_batches_are_bounded_per_run(user):
+    for _ in range(5):
+        make_order(user, 'delivered', age_days=365)
+    assert archive_orders(batch_size=2, max_batches=2)['complete'] is False
+    assert archive_orders(batch_size=2, max_batches=2) == {'orders': 1, 'items': 1, 'batches': 1, 'complete': True}
+    assert not Order.objects.exists()
+
+
+@pytest.mark.django_db
+def test_archived_order_is_readable_through_detail(auth_client, user):
+    order = make_order(user, 'delivered', age_days=365, items=2)
+    before = auth_client.get(f'/api/orders/orders/{order.id}/')
+    archive_orders()
+
+    after = auth_client.get(f'/api/orders/orders/{order.id}/')
+    assert after.status_code == 200
+    assert after.data == before.data
+    assert after['ETag'] == before['ETag']
+    assert auth_client.get(f'/api/orders/orders/{order.id}/', HTTP_IF_NONE_MATCH=after['ETag']).status_code == 304
+
+
+@pytest.mark.django_db
+def test_foreign_archived_order_is_forbidden(auth_client):
+    order = make_order(UserFactory(), 'delivered', age_days=365)
+    archive_orders()
+    assert auth_client.get(f'/api/orders/orders/{order.id}/').status_code == 403
+    assert auth_client.get('/api/orders/orders/999999/').status_code == 404
+
+
+@pytest.mark.django_db
+def test_archived_list_and_etags(auth_client, user):
+    old = make_order(user, 'delivered', age_days=365)
+    recent = make_order(user, 'new', age_days=0)
+    list_etag = auth_client.get('/api/orders/orders/')['ETag']
+    archive_orders()
+
+    response = auth_client.get('/api/orders/orders/')
+    assert [row['id'] for row in response.data['results']] == [recent.id]
+    assert response['ETag'] != list_etag
+
+    archived = auth_client.get('/api/orders/orders/?archived=true')
+    assert [row['id'] for row in archived.data['results']] == [old.id]
+    assert archived.data['results'][0]['items'][0]['product_name']
+    assert archived['ETag'] != response['ETag']
+
+
+@pytest.mark.django_db
+def test_history_and_summary_survive_archiving(user):
+    order = make_order(user, 'confirmed', age_days=0)
+    for status in ('assembled', 'sent', 'delivered'):
+        transition(order, status)
+    Order.objects.filter(pk=order.pk).update(created_at=timezone.now() - timedelta(days=365))
+    call_command('rebuild_order_stats')
+    archive_orders()
+
+    assert OrderStatusLog.objects.filter(order_id=order.id).count() == 3
+    call_command('rebuild_order_stats')
+    assert UserOrderStats.objects.get(user=user, status='delivered').order_count == 1
@@ -0,0 +1,77 @@
+from datetime import timedelta
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from factories import OrderFactory, OrderItemFactory, ProductFactory
+from orders.expiry import expire_pending_orders
+from orders.models import Order, OrderStatusLog
+from orders.tasks import check_pending_orders
+
+
+def make_pending(age_hours, count=1, **kwargs):
+    """Заказы в статусе 'pending', созданные age_hours часов назад (created_at — auto_now_add)."""
+    orders = OrderFactory.create_batch(count, status='pending', **kwargs)
+    Order.objects.filter(id__in=[order.id for order in orders]).update(
+        created_at=timezone.now() - timedelta(hours=age_hours)
+    )
+    return orders
+
+
+@pytest.mark.django_db
+def test_expires_only_old_pending_orders(settings):
+    settings.ORDER_PENDING_TTL = 60 * 60
+    old = make_pending(age_hours=2, count=3)
+    fresh = make_pending(age_hours=0)
+    delivered = OrderFactory(status='delivered')
+
+    result = check_pending_orders()
+
+    assert result == {'expired': 3, 'released': 0, 'batches': 1, 'complete': True}
+    assert set(Order.objects.filter(status='canceled').values_list('id', flat=True)) == {o.id for o in old}
+    assert Order.objects.get(pk=fresh[0].id).status == 'pending'
+    assert Order.objects.get(pk=delivered.id).status == 'delivered'
+    logs = OrderStatusLog.objects.all()
+    assert {(log.order_id, log.old_status, log.new_status, log.reason) for log in logs} == {
+        (order.id, 'pending', 'canceled', 'expired') for order in old
+    }
+
+
+@pytest.mark.django_db
+def test_reserved_stock_is_released():
+    phone = ProductFactory(quantity=5)
+    order = make_pending(age_hours=48, stock_reserved=True)[0]
+    OrderItemFactory(order=order, product=phone, quantity=3)
+    unreserved = make_pending(age_hours=48)[0]
+    OrderItemFactory(order=unreserved, product=phone, quantity=2)
+
+    result = expire_pending_orders()
+
+    assert (result['expired'], result['released']) == (2, 1)
+    phone.refresh_from_db()
+    assert phone.quantity == 8
+    assert not Order.objects.get(pk=order.id).stock_reserved
+
+
+@pytest.mark.django_db
+def test_batches_are_bounded_per_run():
+    make_pending(age_hours=48, count=7)
+
+    first = expire_pending_orders(batch_size=2, max_batches=2)
+    assert first == {'expired': 4, 'released': 0, 'batches': 2, 'complete': False}
+
+    second = expire_pending_orders(batch_size=2, max_batches=10)
+    assert second == {'expired': 3, 'released': 0, 'batches': 2, 'complete': True}
+    assert not Order.objects.filter(status='pending').exists()
+
+
+@pytest.mark.django_db
+def test_batch_cost_does_not_depend_on_size():
+    """Пачка — постоянное число запросов: выборка, UPDATE, журнал."""
+    make_pending(age_hours=48, count=2)
+    with CaptureQueriesContext(connection) as small:
+        expire_pending_orders()
+    make_pending(age_hours=48, count=20)
+    with CaptureQueriesContext(connection) as large:
+        expire_pending_orders()
+    assert len(large) == len(small)
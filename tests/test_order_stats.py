@@ -0,0 +1,105 @@
+from datetime import timedelta
+from importlib import import_module
+import pytest
+from django.apps import apps
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from factories import ContactFactory, OrderFactory, ProductFactory
+from orders.cart_store import get_cart_store
+from orders.expiry import expire_pending_orders
+from orders.models import Order, UserOrderStats
+from orders.state_machine import bulk_transition, transition
+from orders.stats import record_created
+
+
+def stats_of(user):
+    return {
+        row.status: (row.order_count, row.total_amount)
+        for row in UserOrderStats.objects.filter(user=user, order_count__gt=0)
+    }
+
+
+@pytest.fixture
+def user(auth_client):
+    return auth_client.handler._force_user
+
+
+def make_orders(user, count, status, total_amount):
+    orders = OrderFactory.create_batch(count, user=user, status=status, total_amount=total_amount)
+    record_created(orders)
+    return orders
+
+
+@pytest.mark.django_db
+def test_checkout_and_status_changes_update_summary(auth_client, user):
+    product = ProductFactory(price=100, quantity=10)
+    get_cart_store().add(user.id, product.id, 3)
+    response = auth_client.post('/api/orders/create-from-cart/', {'contact_id': ContactFactory(user=user).id})
+    assert response.status_code == 201
+    assert stats_of(user) == {'new': (1, 300)}
+
+    order = Order.objects.get(pk=response.data['id'])
+    transition(order, 'confirmed')
+    assert stats_of(user) == {'confirmed': (1, 300)}
+
+    response = auth_client.get('/api/orders/orders/summary/')
+    assert response.status_code == 200
+    assert response.data == {'orders': 1, 'spent': '300.00',
+                             'by_status': {'confirmed': {'count': 1, 'total_amount': '300.00'}}}
+
+
+@pytest.mark.django_db
+def test_bulk_transition_and_expiry_move_counters(user):
+    assembled = make_orders(user, 3, 'assembled', 50)
+    pending = make_orders(user, 2, 'pending', 20)
+    Order.objects.filter(id__in=[order.id for order in pending]).update(created_at=timezone.now() - timedelta(days=2))
+
+    bulk_transition([order.id for order in assembled[:2]], 'sent')
+    expire_pending_orders()
+
+    assert stats_of(user) == {'assembled': (1, 50), 'sent': (2, 100), 'canceled': (2, 40)}
+
+
+@pytest.mark.django_db
+def test_summary_excludes_canceled_from_spent(auth_client, user):
+    make_orders(user, 2, 'delivered', 100)
+    make_orders(user, 1, 'canceled', 70)
+    data = auth_client.get('/api/orders/orders/summary/').data
+    assert (data['orders'], data['spent']) == (3, '200.00')
+
+
+@pytest.mark.django_db
+def test_summary_cost_does_not_depend_on_order_count(auth_client, user):
+    make_orders(user, 1, 'new', 10)
+    with CaptureQueriesContext(connection) as few:
+        auth_client.get('/api/orders/orders/summary/')
+    make_orders(user, 50, 'new', 10)
+    with CaptureQueriesContext(connection) as many:
+        auth_client.get('/api/orders/orders/summary/')
+    assert len(many) == len(few)
+
+
+@pytest.mark.django_db
+def test_rebuild_command_backfills_summary(user):
+    OrderFactory.create_batch(2, user=user, status='new', total_amount=15)
+    OrderFactory(user=user, status='sent', total_amount=5)
+    UserOrderStats.objects.create(user=user, status='delivered', order_count=9, total_amount=999)
+
+    call_command('rebuild_order_stats')
+
+    assert stats_of(user) == {'new': (2, 30), 'sent': (1, 5)}
+
+
+@pytest.mark.django_db
+def test_migration_backfills_summary_for_existing_orders(user):
+    """Заказы, созданные до появления сводки, попадают в неё при миграции, и переходы не уводят счётчики в минус."""
+    order = OrderFactory(user=user, status='new', total_amount=40)
+    OrderFactory(user=user, status='delivered', total_amount=60)
+
+    import_module('orders.migrations.0013_backfill_user_order_stats').backfill(apps, None)
+    transition(order, 'confirmed')
+
+    assert stats_of(user) == {'confirmed': (1, 40), 'delivered': (1, 60)}
+    assert not UserOrderStats.objects.filter(order_count__lt=0).exists()
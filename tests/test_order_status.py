@@ -0,0 +1,107 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from factories import OrderFactory, OrderItemFactory, ProductFactory, UserFactory
+from orders.models import Order, OrderStatusLog
+from orders.state_machine import InvalidTransition, TransitionConflict, bulk_transition, transition
+
+
+@pytest.fixture
+def admin_client(db):
+    client = APIClient()
+    client.force_authenticate(user=UserFactory(is_staff=True))
+    return client
+
+
+@pytest.mark.django_db
+def test_transition_updates_status_and_writes_log():
+    order = OrderFactory(status='new')
+    transition(order, 'confirmed', reason='test')
+
+    assert Order.objects.get(pk=order.pk).status == order.status == 'confirmed'
+    log = OrderStatusLog.objects.get(order=order)
+    assert (log.old_status, log.new_status, log.reason) == ('new', 'confirmed', 'test')
+
+
+@pytest.mark.django_db
+def test_invalid_transition_is_rejected():
+    order = OrderFactory(status='delivered')
+    with pytest.raises(InvalidTransition):
+        transition(order, 'canceled')
+    assert Order.objects.get(pk=order.pk).status == 'delivered'
+
+
+@pytest.mark.django_db
+def test_concurrent_change_is_detected():
+    """Второй оператор работает с устаревшей копией заказа: его UPDATE не находит прежний статус."""
+    first = OrderFactory(status='assembled')
+    second = Order.objects.get(pk=first.pk)
+    transition(first, 'sent')
+
+    with pytest.raises(TransitionConflict):
+        transition(second, 'canceled')
+    assert Order.objects.get(pk=first.pk).status == 'sent'
+    assert OrderStatusLog.objects.filter(order=first).count() == 1
+
+
+@pytest.mark.django_db
+def test_cancel_releases_reserved_stock_once():
+    phone = ProductFactory(quantity=5)
+    order = OrderFactory(status='new', stock_reserved=True)
+    OrderItemFactory(order=order, product=phone, quantity=3)
+
+    results = bulk_transition([order.id], 'canceled')
+    assert results == {order.id: 'changed'}
+    phone.refresh_from_db()
+    assert phone.quantity == 8
+    assert not Order.objects.get(pk=order.pk).stock_reserved
+
+
+@pytest.mark.django_db
+def test_bulk_endpoint_reports_per_order_outcomes(admin_client):
+    assembled = OrderFactory.create_batch(3, status='assembled')
+    new = OrderFactory(status='new')
+    ids = [order.id for order in assembled] + [new.id, 999999]
+
+    response = admin_client.post('/api/orders/orders/bulk-change-status/', {'ids': ids, 'status': 'sent'},
+                                 format='json')
+
+    assert response.status_code == 200
+    assert response.data['changed'] == 3
+    assert response.data['results'] == [
+        {'id': order.id, 'result': 'changed'} for order in assembled
+    ] + [{'id': new.id, 'result': 'invalid'}, {'id': 999999, 'result': 'not_found'}]
+    assert set(Order.objects.filter(status='sent').values_list('id', flat=True)) == {o.id for o in assembled}
+
+
+@pytest.mark.django_db
+def test_bulk_transition_cost_does_not_depend_on_size():
+    small = [order.id for order in OrderFactory.create_batch(2, status='assembled')]
+    large = [order.id for order in OrderFactory.create_batch(40, status='assembled')]
+    with CaptureQueriesContext(connection) as few:
+        bulk_transition(small, 'sent')
+    with CaptureQueriesContext(connection) as many:
+        bulk_transition(large, 'sent')
+    assert len(many) == len(few)
+
+
+@pytest.mark.django_db
+def test_bulk_endpoint_requires_admin(auth_client):
+    order = OrderFactory(status='assembled')
+    response = auth_client.post('/api/orders/orders/bulk-change-status/', {'ids': [order.id], 'status': 'sent'},
+                                format='json')
+    assert response.status_code == 403
+
+
+@pytest.mark.django_db
+def test_patch_goes_through_transition_rules(auth_client):
+    user = auth_client.handler._force_user
+    order = OrderFactory(user=user, status='new')
+
+    response = auth_client.patch(f'/api/orders/orders/{order.id}/', {'status': 'delivered'}, format='json')
+    assert response.status_code == 400
+    response = auth_client.patch(f'/api/orders/orders/{order.id}/', {'status': 'confirmed'}, format='json')
+    assert response.status_code == 200
+    assert response.data['status'] == 'confirmed'
+    assert OrderStatusLog.objects.filter(order=order, new_status='confirmed').exists()
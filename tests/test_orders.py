@@ -1,7 +1,9 @@
 from rest_framework.test import APIClient
 import pytest
 from django.contrib.auth import get_user_model
-from orders.models import Order, Cart, Contact
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from orders.models import Order, OrderItem, Cart, CartItem, Contact
 from products.models import Product, Category
 
 User = get_user_model()  # Получаем кастомную модель пользователя
@@ -107,3 +109,62 @@ def test_order_detail(auth_client, contact, cart):
     print(response.data)
     assert response.data["items"][0]["product_name"] == "Smartphone", "Некорректное название товара."
 
+
+
+def create_orders(user, product, count, items_per_order=3):
+    orders = Order.objects.bulk_create([Order(user=user, status="new", total_amount=0) for _ in range(count)])
+    OrderItem.objects.bulk_create([
+        OrderItem(order=order, product=product, quantity=1, price=product.price)
+        for order in orders for _ in range(items_per_order)
+    ])
+    return orders
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    assert response.status_code == 200, response.data
+    return response, len(queries)
+
+
+@pytest.mark.django_db
+def test_order_list_query_count_does_not_grow(auth_client, test_user, product):
+    """Список заказов: число запросов не зависит от количества заказов и позиций."""
+    create_orders(test_user, product, 1)
+    _, few = count_queries(auth_client, "/api/orders/orders/")
+
+    create_orders(test_user, product, 15)
+    response, many = count_queries(auth_client, "/api/orders/orders/")
+
+    assert many == few
+    assert len(response.data["results"]) == 16
+    assert response.data["results"][0]["items"][0]["product_name"] == "Smartphone"
+
+
+@pytest.mark.django_db
+def test_order_list_is_paginated(auth_client, test_user, product):
+    """История заказов листается курсором, новые заказы первыми."""
+    orders = create_orders(test_user, product, 5, items_per_order=1)
+    response = auth_client.get("/api/orders/orders/", {"page_size": 2})
+    assert [order["id"] for order in response.data["results"]] == [orders[4].id, orders[3].id]
+
+    response = auth_client.get(response.data["next"])
+    assert [order["id"] for order in response.data["results"]] == [orders[2].id, orders[1].id]
+
+
+@pytest.mark.django_db
+def test_cart_query_count_does_not_grow(auth_client, test_user):
+    """Корзина: названия товаров подтягиваются в том же запросе, что и позиции."""
+    category = Category.objects.create(name="Phones")
+    products = Product.objects.bulk_create([
+        Product(name=f"Phone {number}", category=category, price=10, quantity=10) for number in range(20)
+    ])
+    cart = Cart.objects.create(user=test_user)
+    cart.items.create(product=products[0], quantity=1)
+    _, few = count_queries(auth_client, "/api/orders/cart/")
+
+    CartItem.objects.bulk_create([CartItem(cart=cart, product=product, quantity=1) for product in products[1:]])
+    response, many = count_queries(auth_client, "/api/orders/cart/")
+
+    assert many == few
+    assert len(response.data) == 20
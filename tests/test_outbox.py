@@ -0,0 +1,97 @@
+from datetime import timedelta
+import pytest
+from django.db import transaction
+from django.utils import timezone
+from factories import OrderFactory
+from orders import outbox, tasks as order_tasks
+from orders.models import OutboxEvent
+from orders.state_machine import transition
+
+
+@pytest.mark.django_db
+def test_event_is_written_only_with_committed_change():
+    with pytest.raises(RuntimeError):
+        with transaction.atomic():
+            outbox.publish('order.created', 'order.created:1', {'order_id': 1})
+            raise RuntimeError
+    assert not OutboxEvent.objects.exists()
+
+    outbox.publish('order.created', 'order.created:1', {'order_id': 1})
+    outbox.publish('order.created', 'order.created:1', {'order_id': 1})
+    assert OutboxEvent.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_status_change_publishes_event():
+    order = OrderFactory(status='new')
+    transition(order, 'confirmed')
+    event = OutboxEvent.objects.get(topic='order.status_changed')
+    assert event.payload == {'order_id': order.id, 'user_id': order.user_id,
+                             'old_status': 'new', 'new_status': 'confirmed'}
+
+
+@pytest.mark.django_db
+def test_relay_batches_confirmations_into_one_task(mocker):
+    delay = mocker.patch.object(order_tasks.send_order_confirmations, 'delay')
+    for order_id in (1, 2, 3):
+        outbox.publish('order.created', f'order.created:{order_id}', {'order_id': order_id})
+
+    assert outbox.relay(batch_size=2) == {'delivered': 3, 'failed': 0, 'dead': 0, 'batches': 2}
+    assert [call.args[0] for call in delay.call_args_list] == [[1, 2], [3]]
+    assert not OutboxEvent.objects.filter(processed_at__isnull=True).exists()
+    # Обработанные события повторно не доставляются
+    assert outbox.relay()['delivered'] == 0
+
+
+@pytest.mark.django_db
+def test_failed_handler_keeps_events_for_retry(mocker):
+    mocker.patch.dict(outbox.HANDLERS, {'order.broken': mocker.Mock(side_effect=ValueError('boom'))})
+    outbox.publish('order.broken', 'order.broken:1', {})
+    outbox.publish('order.unhandled', 'order.unhandled:1', {})
+
+    assert outbox.relay() == {'delivered': 1, 'failed': 1, 'dead': 0, 'batches': 1}
+    broken = OutboxEvent.objects.get(topic='order.broken')
+    assert broken.processed_at is None
+    assert broken.attempts == 1 and 'boom' in broken.last_error
+
+
+@pytest.mark.django_db
+def test_failed_events_back_off_and_give_up(mocker, settings):
+    settings.OUTBOX_RETRY_DELAY = 10
+    settings.OUTBOX_RETRY_MAX_DELAY = 30
+    broken = mocker.Mock(side_effect=ValueError('boom'))
+    mocker.patch.dict(outbox.HANDLERS, {'order.broken': broken})
+    outbox.publish('order.broken', 'order.broken:1', {})
+
+    started = timezone.now()
+    assert outbox.relay(max_attempts=3)['failed'] == 1
+    event = OutboxEvent.objects.get()
+    assert timedelta(seconds=10) <= event.next_attempt_at - started < timedelta(seconds=11)
+    # Пока задержка не прошла, событие не берётся
+    assert outbox.relay(max_attempts=3)['batches'] == 0
+
+    OutboxEvent.objects.update(next_attempt_at=timezone.now())
+    outbox.relay(max_attempts=3)
+    event.refresh_from_db()
+    assert event.attempts == 2 and event.next_attempt_at - timezone.now() > timedelta(seconds=19)
+
+    OutboxEvent.objects.update(next_attempt_at=timezone.now())
+    assert outbox.relay(max_attempts=3) == {'delivered': 0, 'failed': 1, 'dead': 1, 'batches': 1}
+    event.refresh_from_db()
+    assert event.attempts == 3 and event.failed_at is not None and event.processed_at is None
+    OutboxEvent.objects.update(next_attempt_at=timezone.now())
+    assert outbox.relay(max_attempts=3)['batches'] == 0
+    assert broken.call_count == 3
+    assert [outbox.retry_delay(attempts) for attempts in (1, 2, 3)] == [10, 20, 30]
+
+
+@pytest.mark.django_db
+def test_purge_removes_old_processed_events():
+    outbox.publish('order.created', 'old', {})
+    outbox.publish('order.created', 'fresh', {})
+    outbox.publish('order.created', 'pending', {})
+    OutboxEvent.objects.filter(key='old').update(processed_at=timezone.now() - timedelta(days=30))
+    OutboxEvent.objects.filter(key='fresh').update(processed_at=timezone.now())
+
+    assert outbox.purge() == 1
+    assert set(OutboxEvent.objects.values_list('key', flat=True)) == {'fresh', 'pending'}
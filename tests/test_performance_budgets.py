@@ -0,0 +1,173 @@
+"""
+Бюджеты SQL-запросов и времени ответа для эндпоинтов orders/urls.py, products/urls.py и users/urls.py.
+Данные засеваются в объёмах, на которых N+1 заметен сразу: сотни товаров, десятки заказов,
+полная корзина. Новый эндпоинт — новая строка в ENDPOINTS.
+
+Не покрыты: import-products (запускает импорт в Celery), error/trigger-error (падает намеренно)
+и вход через соцсети (нужен внешний провайдер).
+"""
+import pytest
+from rest_framework.test import APIClient
+from budgets import within_budget
+from factories import (
+    UserFactory, AddressFactory, ContactFactory, CategoryFactory, ProductFactory,
+    CartFactory, OrderFactory,
+)
+from django.utils import timezone
+from orders.models import ArchivedOrder, ArchivedOrderItem, CartItem, Order, OrderItem
+from products.attributes import sync_attributes
+from products.models import Product
+from products.search import get_search_backend
+
+PRODUCTS = 300
+ORDERS = 40
+ITEMS_PER_ORDER = 5
+ARCHIVED_ORDERS = 20
+CART_LINES = 30
+
+
+@pytest.fixture
+def perf_data(db):
+    """Каталог, история заказов, корзина и адреса одного покупателя."""
+    user = UserFactory()
+    categories = CategoryFactory.create_batch(10)
+    products = Product.objects.bulk_create([
+        ProductFactory.build(category=categories[number % len(categories)]) for number in range(PRODUCTS)
+    ])
+    get_search_backend().rebuild(Product.objects.all())
+    sync_attributes(products)
+
+    contact = ContactFactory(user=user)
+    orders = Order.objects.bulk_create([OrderFactory.build(user=user, contact=contact) for _ in range(ORDERS)])
+    OrderItem.objects.bulk_create([
+        OrderItem(order=order, product=products[(index + line) % PRODUCTS], quantity=1, price=10)
+        for index, order in enumerate(orders) for line in range(ITEMS_PER_ORDER)
+    ])
+    # Архивные заказы (orders/archive.py) с теми же позициями: id вне диапазона рабочих заказов
+    now = timezone.now()
+    archived = ArchivedOrder.objects.bulk_create([
+        ArchivedOrder(id=10 ** 6 + number, user=user, contact=contact, status='delivered', total_amount=50,
+                      created_at=now, updated_at=now)
+        for number in range(ARCHIVED_ORDERS)
+    ])
+    ArchivedOrderItem.objects.bulk_create([
+        ArchivedOrderItem(id=10 ** 6 + index * ITEMS_PER_ORDER + line, order=order,
+                          product=products[(index + line) % PRODUCTS], quantity=1, price=10)
+        for index, order in enumerate(archived) for line in range(ITEMS_PER_ORDER)
+    ])
+    cart = CartFactory(user=user)
+    cart_items = CartItem.objects.bulk_create([
+        CartItem(cart=cart, product=product, quantity=1) for product in products[:CART_LINES]
+    ])
+    addresses = AddressFactory.create_batch(5, user=user)
+
+    return {
+        'user': user,
+        'ids': {
+            'order': orders[0].id, 'product': products[-1].id, 'category': categories[0].id,
+            'cart_item': cart_items[0].id, 'address': addresses[0].id, 'contact': contact.id,
+        },
+        'products': [product.id for product in products],
+        'orders': [order.id for order in orders],
+    }
+
+
+def batch_payload(data):
+    return {'operations': [
+        {'op': 'add', 'product_id': product_id, 'quantity': 1} for product_id in data['products'][:CART_LINES]
+    ]}
+
+
+def order_payload(data):
+    return {'user': data['user'].id, 'items': [
+        {'product': product_id, 'quantity': 1, 'price': '10.00'} for product_id in data['products'][:CART_LINES]
+    ]}
+
+
+def bulk_status_payload(data):
+    return {'ids': data['orders'], 'status': 'confirmed'}
+
+
+# (название, метод, URL, тело запроса, клиент: False — аноним, True — покупатель, 'staff' — администратор,
+#  ожидаемый статус, бюджет запросов, бюджет мс)
+ENDPOINTS = [
+    # orders/urls.py
+    # Третий запрос — валидатор для ETag/Last-Modified (updated_at заказов), при 304 он единственный
+    ('orders-list', 'get', '/api/orders/orders/', None, True, 200, 3, 300),
+    ('orders-detail', 'get', '/api/orders/orders/{order}/', None, True, 200, 3, 250),
+    ('orders-archived-list', 'get', '/api/orders/orders/?archived=true', None, True, 200, 3, 300),
+    # Товары позиций читаются одним запросом, списание остатков — один UPDATE (orders/stock.py)
+    ('orders-create', 'post', '/api/orders/orders/', order_payload, True, 201, 13, 500),
+    # Все заказы пачки (ORDERS штук) меняют статус одним UPDATE, журнал и outbox — пакетными вставками
+    ('orders-bulk-change-status', 'post', '/api/orders/orders/bulk-change-status/', bulk_status_payload,
+     'staff', 200, 7, 500),
+    ('orders-summary', 'get', '/api/orders/orders/summary/', None, True, 200, 1, 250),
+    # Смена статуса и оформление заказа пишут событие в outbox (orders/outbox.py)
+    # и обновляют сводку по пользователю (orders/stats.py) — ещё два запроса
+    ('orders-change-status', 'patch', '/api/orders/orders/{order}/change-status/', {'status': 'confirmed'},
+     True, 200, 8, 250),
+    ('orders-create-from-cart', 'post', '/api/orders/create-from-cart/', {'contact_id': '{contact}'},
+     True, 201, 16, 500),
+    ('cart-view', 'get', '/api/orders/cart/', None, True, 200, 2, 250),
+    # Первое обращение к корзине загружает её из БД в Redis — отсюда лишний запрос
+    ('cart-add', 'post', '/api/orders/cart/add/', {'product_id': '{product}', 'quantity': 1}, True, 201, 2, 250),
+    ('cart-batch', 'post', '/api/orders/cart/batch/', batch_payload, True, 200, 8, 500),
+    ('cart-update', 'patch', '/api/orders/cart/update/{cart_item}/', {'quantity': 3}, True, 200, 2, 250),
+    ('cart-remove', 'delete', '/api/orders/cart/remove/{cart_item}/', None, True, 200, 2, 250),
+    ('addresses-list', 'get', '/api/orders/addresses/', None, True, 200, 1, 250),
+    ('addresses-create', 'post', '/api/orders/addresses/', {
+        'title': 'Работа', 'address_line': 'Тверская, 1', 'city': 'Москва', 'postal_code': '125009',
+        'country': 'Россия',
+    }, True, 201, 1, 250),
+    ('addresses-delete', 'delete', '/api/orders/addresses/{address}/', None, True, 204, 2, 250),
+    # products/urls.py
+    ('products-list', 'get', '/api/products/', None, True, 200, 2, 300),
+    ('products-search', 'get', '/api/products/?search=смартфон модель', None, True, 200, 2, 500),
+    ('products-filter-params', 'get', '/api/products/?param.Цвет=черный&price_min=1500', None, True, 200, 2, 500),
+    ('products-facets', 'get', '/api/products/facets/', None, True, 200, 2, 500),
+    ('products-detail', 'get', '/api/products/{product}/', None, True, 200, 1, 250),
+    # Перед сохранением cacheops читает прежнюю версию товара, чтобы сбросить запросы по старым значениям
+    ('products-update', 'put', '/api/products/{product}/', {
+        'name': 'Смартфон обновлённый', 'description': 'Новое описание', 'category': '{category}',
+        'supplier': 'DNS', 'price': '999.00', 'quantity': 5, 'parameters': {'Цвет': 'красный'},
+    }, True, 200, 10, 300),
+    ('categories-list', 'get', '/api/products/categories/', None, True, 200, 1, 250),
+    # users/urls.py: время здесь определяет хэширование пароля
+    ('users-register', 'post', '/api/users/register/', {
+        'username': 'newcomer', 'email': 'newcomer@example.com', 'password': 'Xk29!pass-word',
+    }, False, 201, 4, 2000),
+    ('users-login', 'post', '/api/users/login/', {'username': '{username}', 'password': 'password'},
+     False, 200, 3, 2000),
+    ('users-change-password', 'patch', '/api/users/change-password/', {
+        'old_password': 'password', 'new_password': 'Xk29!new-pass',
+    }, True, 200, 2, 3000),
+]
+
+
+def fill(value, placeholders):
+    """Подставляет id засеянных объектов в URL и тело запроса."""
+    if isinstance(value, str):
+        return value.format(**placeholders)
+    if isinstance(value, dict):
+        return {key: fill(item, placeholders) for key, item in value.items()}
+    return value
+
+
+@pytest.mark.parametrize(
+    'name, method, url, payload, authenticated, expected_status, max_queries, max_ms',
+    ENDPOINTS, ids=[endpoint[0] for endpoint in ENDPOINTS],
+)
+def test_endpoint_budget(perf_data, name, method, url, payload, authenticated, expected_status, max_queries, max_ms):
+    placeholders = dict(perf_data['ids'], username=perf_data['user'].username)
+    if callable(payload):
+        payload = payload(perf_data)
+    client = APIClient()
+    if authenticated == 'staff':
+        client.force_authenticate(user=UserFactory(is_staff=True))
+    elif authenticated:
+        client.force_authenticate(user=perf_data['user'])
+
+    with within_budget(name, max_queries, max_ms):
+        response = getattr(client, method)(fill(url, placeholders), fill(payload, placeholders), format='json')
+
+    assert response.status_code == expected_status, getattr(response, 'data', response)
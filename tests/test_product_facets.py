@@ -0,0 +1,64 @@
+import pytest
+from rest_framework.test import APIClient
+from products.models import Category, Product
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+
+@pytest.fixture
+def api_client(db):
+    client = APIClient()
+    user = User.objects.create_user(username="testuser", password="password123")
+    client.force_authenticate(user=user)
+    return client
+
+
+@pytest.fixture
+def catalog(db):
+    phones = Category.objects.create(name="Phones")
+    books = Category.objects.create(name="Books")
+    Product.objects.create(name="Phone A", category=phones, supplier="Acme", price=500, quantity=1,
+                           parameters={"color": "black"})
+    Product.objects.create(name="Phone B", category=phones, supplier="Acme", price=7000, quantity=1,
+                           parameters={"color": "red"})
+    Product.objects.create(name="Phone C", category=phones, supplier="Globex", price=60000, quantity=1,
+                           parameters={"color": "red"})
+    Product.objects.create(name="Book", category=books, supplier="Globex", price=20, quantity=1)
+    return phones, books
+
+
+@pytest.mark.django_db
+def test_product_facets(api_client, catalog, django_assert_max_num_queries):
+    """Фасеты считаются группировкой в БД за постоянное число запросов."""
+    phones, books = catalog
+    with django_assert_max_num_queries(3):
+        response = api_client.get('/api/products/facets/')
+    assert response.status_code == 200
+    data = response.json()
+
+    assert data['total'] == 4
+    assert data['categories'] == [
+        {'id': phones.id, 'name': 'Phones', 'count': 3},
+        {'id': books.id, 'name': 'Books', 'count': 1},
+    ]
+    assert data['suppliers'] == [{'name': 'Acme', 'count': 2}, {'name': 'Globex', 'count': 2}]
+    assert [bucket['count'] for bucket in data['price']] == [2, 0, 1, 0, 1]
+    assert data['price'][0] == {'min': None, 'max': 1000, 'count': 2}
+    assert data['parameters'] == {'color': [{'value': 'red', 'count': 2}, {'value': 'black', 'count': 1}]}
+
+    response = api_client.get('/api/products/facets/?category=Books')
+    assert response.json()['total'] == 1
+    assert response.json()['parameters'] == {}
+
+
+@pytest.mark.django_db
+def test_product_facets_cache_invalidated_on_write(api_client, catalog, django_capture_on_commit_callbacks):
+    """Закэшированные фасеты сбрасываются после записи в каталог."""
+    phones, _ = catalog
+    assert api_client.get('/api/products/facets/').json()['total'] == 4
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Product.objects.create(name="Phone D", category=phones, supplier="Acme", price=100, quantity=1)
+
+    assert api_client.get('/api/products/facets/').json()['total'] == 5
@@ -23,8 +23,8 @@ def test_product_filtering(api_client):
     # Тестируем фильтрацию по имени
     response = api_client.get('/api/products/?name=Smartphone')  # Учитываем префикс
     assert response.status_code == 200
-    assert len(response.json()) == 1
-    assert response.json()[0]['name'] == "Smartphone"
+    assert len(response.json()['results']) == 1
+    assert response.json()['results'][0]['name'] == "Smartphone"
 
 
 @pytest.mark.django_db
@@ -37,5 +37,71 @@ def test_product_search(api_client):
     # Тестируем поиск по описанию
     response = api_client.get('/api/products/?search=Python')  # Учитываем префикс
     assert response.status_code == 200
-    assert len(response.json()) == 1
-    assert response.json()[0]['name'] == "Python Programming"
+    assert len(response.json()['results']) == 1
+    assert response.json()['results'][0]['name'] == "Python Programming"
+
+
+@pytest.mark.django_db
+def test_product_search_russian_stemming_and_ranking(api_client):
+    """Поиск учитывает словоформы, префиксы и ставит совпадения в названии выше."""
+    category = Category.objects.create(name="Электроника")
+    case = Product.objects.create(name="Чехол", description="Подходит для смартфонов", price=9.99, quantity=5, category=category)
+    phone = Product.objects.create(name="Смартфоны", description="Новые модели", price=299.99, quantity=5, category=category)
+    Product.objects.create(name="Наушники", description="Беспроводные", price=49.99, quantity=5, category=category)
+
+    response = api_client.get('/api/products/?search=смартфон')
+    assert response.status_code == 200
+    assert [item['id'] for item in response.json()['results']] == [phone.id, case.id]
+
+    response = api_client.get('/api/products/?search=беспровод')
+    assert [item['name'] for item in response.json()['results']] == ["Наушники"]
+
+    # После изменения товара индекс обновляется
+    case.name = "Чехол для смартфона"
+    case.save()
+    response = api_client.get('/api/products/?name=смартфоном')
+    assert {item['id'] for item in response.json()['results']} == {phone.id, case.id}
+
+    case.delete()
+    response = api_client.get('/api/products/?search=смартфон')
+    assert [item['id'] for item in response.json()['results']] == [phone.id]
+
+
+@pytest.mark.django_db
+def test_product_parameter_filtering(api_client):
+    """Фильтрация по параметрам товара: разные ключи — И, повторы одного ключа — ИЛИ."""
+    category = Category.objects.create(name="Phones")
+    black = Product.objects.create(name="Phone A", price=1, quantity=1, category=category,
+                                   parameters={"color": "black", "memory": "128GB"})
+    red = Product.objects.create(name="Phone B", price=1, quantity=1, category=category,
+                                 parameters={"color": "red", "memory": "128GB", "sim": [1, 2]})
+    Product.objects.create(name="Phone C", price=1, quantity=1, category=category,
+                           parameters={"color": "red", "memory": "64GB"})
+
+    response = api_client.get('/api/products/?param.color=red&param.memory=128GB')
+    assert [item['id'] for item in response.json()['results']] == [red.id]
+
+    response = api_client.get('/api/products/?param.memory=128GB&param.color=red&param.color=black')
+    assert [item['id'] for item in response.json()['results']] == [black.id, red.id]
+
+    response = api_client.get('/api/products/?param.sim=2')
+    assert [item['id'] for item in response.json()['results']] == [red.id]
+
+    # Изменение параметров сразу отражается в фильтрах
+    black.parameters = {"color": "red", "memory": "128GB"}
+    black.save()
+    response = api_client.get('/api/products/?param.color=red&param.memory=128GB')
+    assert [item['id'] for item in response.json()['results']] == [black.id, red.id]
+
+
+@pytest.mark.django_db
+def test_product_name_filter_is_capped_by_search_limit(api_client, settings):
+    """Фильтр ?name= берёт из индекса не больше PRODUCT_SEARCH_LIMIT совпадений, как и ?search=."""
+    settings.PRODUCT_SEARCH_LIMIT = 3
+    category = Category.objects.create(name="Cables")
+    for number in range(5):
+        Product.objects.create(name=f"Cable {number}", price=1, quantity=1, category=category)
+
+    response = api_client.get('/api/products/?name=cable')
+    assert response.status_code == 200
+    assert len(response.json()['results']) == 3
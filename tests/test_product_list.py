@@ -0,0 +1,70 @@
+import pytest
+from rest_framework.test import APIClient
+from products.models import Category, Product
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+
+@pytest.fixture
+def api_client(db):
+    client = APIClient()
+    user = User.objects.create_user(username="testuser", password="password123")
+    client.force_authenticate(user=user)
+    return client
+
+
+@pytest.fixture
+def catalog(db):
+    """Каталог из 25 товаров в двух категориях."""
+    phones = Category.objects.create(name="Phones")
+    books = Category.objects.create(name="Books")
+    return [
+        Product.objects.create(
+            name=f"Product {number}",
+            description="Long description",
+            category=phones if number % 2 else books,
+            supplier="Supplier",
+            price=number + 1,
+            quantity=number,
+            parameters={"color": "black"},
+        )
+        for number in range(25)
+    ]
+
+
+@pytest.mark.django_db
+def test_product_list_cursor_pagination(api_client, catalog):
+    """Список товаров отдаётся страницами по курсору в порядке id."""
+    response = api_client.get('/api/products/?page_size=10')
+    assert response.status_code == 200
+    data = response.json()
+    assert [item['id'] for item in data['results']] == [product.id for product in catalog[:10]]
+    assert data['previous'] is None
+
+    seen = [item['id'] for item in data['results']]
+    while data['next']:
+        data = api_client.get(data['next']).json()
+        seen += [item['id'] for item in data['results']]
+    assert seen == [product.id for product in catalog]
+
+
+@pytest.mark.django_db
+def test_product_list_slim_representation(api_client, catalog):
+    """По умолчанию тяжёлые поля не отдаются, ?fields= включает нужные."""
+    item = api_client.get('/api/products/').json()['results'][0]
+    assert 'description' not in item
+    assert 'parameters' not in item
+    assert item['category_name'] == "Books"
+
+    item = api_client.get('/api/products/?fields=id,name,parameters').json()['results'][0]
+    assert set(item) == {'id', 'name', 'parameters'}
+    assert item['parameters'] == {"color": "black"}
+
+
+@pytest.mark.django_db
+def test_product_list_query_count_is_bounded(api_client, catalog, django_assert_max_num_queries):
+    """Число запросов не зависит от количества товаров на странице."""
+    with django_assert_max_num_queries(2):
+        response = api_client.get('/api/products/?page_size=25')
+    assert len(response.json()['results']) == 25
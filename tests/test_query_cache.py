@@ -0,0 +1,136 @@
+"""
+Кэш запросов ORM (django-cacheops): повторное чтение не идёт в БД, а запись в обход сигналов
+(UPDATE остатков, импорт прайса) всё равно сбрасывает закэшированные выборки.
+Тесты транзакционные: внутри изменённой транзакции cacheops чтения не кэширует.
+"""
+import pytest
+import redis
+from cacheops.redis import redis_client
+from django.core.cache import cache
+from django.core.files.temp import NamedTemporaryFile
+from rest_framework.test import APIClient
+from factories import UserFactory, CategoryFactory, ProductFactory
+from orders.stock import reserve_stock, release_stock
+from products.cache import flush_query_cache_stats
+from products.models import Product
+from products.tasks import import_products_from_yaml
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+def in_stock():
+    return {product.name: product.quantity for product in Product.objects.filter(quantity__gt=0)}
+
+
+def test_repeated_read_is_served_from_cache(django_assert_num_queries):
+    category = CategoryFactory()
+    ProductFactory.create_batch(3, category=category)
+
+    with django_assert_num_queries(1):
+        first = list(Product.objects.filter(category=category))
+    with django_assert_num_queries(0):
+        second = list(Product.objects.filter(category=category))
+    assert [product.id for product in second] == [product.id for product in first]
+
+
+def test_save_invalidates_cached_reads():
+    product = ProductFactory(name='Смартфон', quantity=5)
+    assert in_stock() == {'Смартфон': 5}
+
+    product.quantity = 0
+    product.save()
+    assert in_stock() == {}
+
+
+def test_stock_updates_invalidate_cached_reads():
+    product = ProductFactory(name='Смартфон', quantity=5)
+    assert in_stock() == {'Смартфон': 5}
+
+    reserve_stock([(product.id, 5)])
+    assert in_stock() == {}
+    release_stock([(product.id, 2)])
+    assert in_stock() == {'Смартфон': 2}
+
+
+def test_import_invalidates_cached_reads():
+    ProductFactory(name='Smartphone', quantity=3)
+    assert in_stock() == {'Smartphone': 3}
+
+    feed = """
+    categories:
+      - name: "Electronics"
+        products:
+          - name: "Smartphone"
+            price: 799.99
+            quantity: 10
+          - name: "Laptop"
+            price: 1199.99
+            quantity: 5
+    """
+    with NamedTemporaryFile(delete=True, suffix=".yaml") as temp_file:
+        temp_file.write(feed.encode("utf-8"))
+        temp_file.flush()
+        import_products_from_yaml(temp_file.name)
+
+    assert in_stock() == {'Smartphone': 10, 'Laptop': 5}
+
+
+def test_delta_import_keeps_cached_reads_of_unchanged_products(django_assert_num_queries):
+    category = CategoryFactory(name='Electronics')
+    kept = ProductFactory(name='Laptop', category=category, price=1199.99, quantity=5, description='', parameters={})
+    changed = ProductFactory(name='Smartphone', category=category, price=1, quantity=3)
+    list(Product.objects.filter(id=kept.id))
+    assert in_stock() == {'Laptop': 5, 'Smartphone': 3}
+
+    feed = """
+    categories:
+      - name: "Electronics"
+        products:
+          - name: "Smartphone"
+            price: 799.99
+            quantity: 10
+          - name: "Laptop"
+            price: 1199.99
+            quantity: 5
+    """
+    with NamedTemporaryFile(delete=True, suffix=".yaml") as temp_file:
+        temp_file.write(feed.encode("utf-8"))
+        temp_file.flush()
+        result = import_products_from_yaml(temp_file.name, delta=True)
+
+    assert (result['updated'], result['unchanged']) == (1, 1)
+    # Неизменённый товар по-прежнему читается из кэша, выборка с изменённым — сброшена
+    with django_assert_num_queries(0):
+        list(Product.objects.filter(id=kept.id))
+    assert in_stock() == {'Laptop': 5, 'Smartphone': 10}
+    assert Product.objects.get(id=changed.id).quantity == 10
+
+
+def test_reads_fall_back_to_database_when_redis_is_down(monkeypatch):
+    ProductFactory(name='Смартфон', quantity=5)
+
+    def unavailable(*args, **kwargs):
+        raise redis.ConnectionError('Redis недоступен')
+
+    redis_client.ping()  # создаём клиент, чтобы подменить метод у него, а не у ленивой обёртки
+    monkeypatch.setattr(redis_client, 'execute_command', unavailable)
+    with pytest.warns(RuntimeWarning):
+        assert in_stock() == {'Смартфон': 5}
+
+
+def test_cache_stats_endpoint():
+    flush_query_cache_stats()
+    cache.clear()
+    category = CategoryFactory()
+    ProductFactory.create_batch(2, category=category)
+    for _ in range(3):
+        list(Product.objects.filter(category=category))
+
+    client = APIClient()
+    client.force_authenticate(user=UserFactory())
+    assert client.get('/api/products/cache-stats/').status_code == 403
+
+    client.force_authenticate(user=UserFactory(is_staff=True))
+    response = client.get('/api/products/cache-stats/')
+    assert response.status_code == 200
+    assert response.data['products.product'] == {'hits': 2, 'misses': 1, 'hit_rate': 0.667}
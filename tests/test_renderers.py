@@ -0,0 +1,85 @@
+"""UJSONRenderer / UJSONParser дают тот же JSON, что и стандартные классы DRF."""
+import io
+import json
+import uuid
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+import pytest
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from benchmarks.json_renderers import make_payload, measure
+from retail_automation.renderers import UJSONParser, UJSONRenderer
+
+PAYLOAD = {
+    'price': Decimal('799.99'),
+    'zero': Decimal('0.00'),
+    'created_at': datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc),
+    'naive': datetime(2024, 5, 1, 12, 30),
+    'day': date(2024, 5, 1),
+    'time': time(9, 15),
+    'delay': timedelta(minutes=30),
+    'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+    'lazy': gettext_lazy('Заказ'),
+    'text': 'Смартфон "Про" / 128 ГБ ',
+    'ids': (1, 2, 3),
+    'parameters': {'Цвет': 'черный', 'Память': ['128', '256']},
+    'nothing': None,
+    'flags': [True, False],
+    'ratio': 0.1,
+    2: 'числовой ключ',
+}
+
+
+def test_renders_same_json_as_drf():
+    fast = UJSONRenderer().render(PAYLOAD, 'application/json')
+    default = JSONRenderer().render(PAYLOAD, 'application/json')
+    assert json.loads(fast) == json.loads(default)
+    assert b'\\u2028' in fast
+    assert b'\\/' not in fast  # слеши не экранируются
+
+
+def test_indent_from_media_type():
+    rendered = UJSONRenderer().render({'a': [1]}, 'application/json; indent=4')
+    assert rendered.decode().splitlines()[1].startswith('    "a"')
+
+
+def test_empty_data_renders_empty_body():
+    assert UJSONRenderer().render(None) == b''
+
+
+def test_nan_is_rejected_like_drf():
+    with pytest.raises(ValueError):
+        JSONRenderer().render({'value': float('nan')})
+    with pytest.raises(ValueError):
+        UJSONRenderer().render({'value': float('nan')})
+
+
+@pytest.mark.parametrize('body', [
+    b'{"operations": [{"op": "add", "product_id": 1, "quantity": 2}]}',
+    '{"name": "Смартфон", "price": "799.99", "note": "NaN в тексте"}'.encode(),
+    b'[1, 2.5, null, true]',
+])
+def test_parses_same_data_as_drf(body):
+    assert UJSONParser().parse(io.BytesIO(body)) == JSONParser().parse(io.BytesIO(body))
+
+
+@pytest.mark.parametrize('body', [b'{"price": NaN}', b'{"price": Infinity}', b'{"price": ', b'\xff'])
+def test_invalid_body_raises_parse_error(body):
+    with pytest.raises(ParseError):
+        UJSONParser().parse(io.BytesIO(body))
+
+
+@pytest.mark.django_db
+def test_api_uses_fast_renderer(auth_client):
+    response = auth_client.get('/api/products/')
+    assert response.status_code == 200
+    assert isinstance(response.accepted_renderer, UJSONRenderer)
+
+
+def test_micro_benchmark_reports_both_renderers():
+    report = measure(make_payload(products=50), repeat=2)
+    assert report['bytes'] > 0
+    assert set(report['drf']) == set(report['ujson']) == {'render', 'parse'}
+    assert report['render_speedup'] > 0